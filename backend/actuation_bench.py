@@ -0,0 +1,319 @@
+"""
+Modulo: actuation_bench
+
+Descrizione:
+Benchmark della latenza comando -> motore durante lo streaming video, eseguito interamente su
+localhost.
+
+Per ogni configurazione della videocamera (frame al secondo e risoluzione) il server viene avviato
+in un processo separato, con videocamera sintetica (`SyntheticCapture`) e motori simulati
+(`SimulatedBackend`). Un client WSS pilota avvia lo streaming, riceve i frame e invia a intervalli
+regolari "move-forward", "turn-left", "stop-moving" e "unturn". Il server, instrumentato, registra
+per ogni comando gli istanti di:
+- arrivo del messaggio in `handle_message`;
+- cambio dell'obiettivo in `MotorUtils`;
+- primo tick del ciclo di controllo successivo al cambio;
+- primo aggiornamento dei motori consegnato al backend (con i profili a jerk limitato il valore
+  inviato ai motori cambia solo dopo alcuni tick dalla partenza o dall'inversione);
+- fine della scrittura simulata sul bus.
+
+Vengono riportati i percentili di ogni fase e della latenza complessiva (invio dal client ->
+fine della scrittura), per configurazione e tipo di comando. Gli istanti del client e del server
+sono confrontabili perché `time.perf_counter` è un orologio di sistema. La latenza dell'elettronica
+del backend simulato (`MotorBackendSettings.LATENCY_MS`) non è inclusa.
+
+Esempio di utilizzo (dalla cartella backend):
+    python actuation_bench.py --commands 200
+    python actuation_bench.py --settings "30@640x480,60@1280x720" --json actuation.json
+
+Ogni configurazione è "fps@larghezzaxaltezza"; con fps 0 lo streaming non viene avviato (riferimento
+senza carico video).
+
+Dipendenze:
+- asyncio, argparse, multiprocessing, ssl, time per l'esecuzione del test (`builtin`).
+- websockets per il client WebSocket (`websockets`).
+- loadtest per certificati, attesa del server e calcolo dei percentili.
+- utils.protocol.codec per la codifica dei messaggi.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import ssl
+import time
+from collections import defaultdict
+from pathlib import Path
+import websockets
+from loadtest import CERTFILE, KEYFILE, percentiles, wait_for_server
+from utils.protocol.codec import encode, decode
+
+COMMANDS = ("move-forward", "turn-left", "stop-moving", "unturn")
+STAGES = ("transitMs", "dispatchMs", "tickMs", "rampMs", "writeMs", "totalMs")
+REPORT_TYPE = "bench-report"
+
+
+def parse_settings(settings: str) -> list:
+    """
+    Converte "fps@LxA,fps@LxA" in una lista di tuple (fps, larghezza, altezza).
+
+    Raises:
+        ValueError: Se una configurazione non è nel formato atteso.
+    """
+    parsed = []
+    for item in filter(None, (part.strip() for part in settings.split(","))):
+        fps, _, size = item.partition("@")
+        width, _, height = size.partition("x")
+        try:
+            parsed.append((float(fps), int(width), int(height)))
+        except ValueError:
+            raise ValueError(f"Configurazione non valida: '{item}' (atteso fps@larghezzaxaltezza)")
+    if not parsed:
+        raise ValueError("Nessuna configurazione della videocamera indicata")
+    return parsed
+
+
+def _serve(port: int, use_tls: bool, fps: float, width: int, height: int, log_level: str) -> None:
+    """
+    Processo server: `Server` instrumentato con videocamera sintetica e motori simulati.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from server import Server
+    from utils.camera.CameraUtils import CameraUtils
+    from utils.camera.synthetic_capture import SyntheticCapture
+    from utils.motor.MotorUtils import MotorUtils
+    from utils.motor.simulated_backend import SimulatedBackend
+    from utils.audio.AudioUtils import AudioUtils
+    from utils.protocol.payloads import EmptyPayload
+
+    logging.getLogger().setLevel(log_level)
+    probes = []  # Un dizionario di istanti per ogni comando ricevuto
+
+    def current_probe():
+        return probes[-1] if probes else {}
+
+    def record_write(started: float, finished: float) -> None:
+        probe = current_probe()
+        if "submit" in probe and "write" not in probe and started >= probe["submit"]:
+            probe["write"] = finished
+
+    class BenchBackend(SimulatedBackend):
+        def submit(self, command):
+            probe = current_probe()
+            if "tick" in probe and "submit" not in probe:
+                probe["submit"] = time.perf_counter()
+            super().submit(command)
+
+        def _write(self, command):
+            started = time.perf_counter()
+            super()._write(command)
+            self._loop.call_soon_threadsafe(record_write, started, time.perf_counter())
+
+    class BenchMotorUtils(MotorUtils):
+        def _mark_target(self):
+            probe = current_probe()
+            probe.setdefault("target", time.perf_counter())
+
+        def _step(self, elapsed):
+            probe = current_probe()
+            if "target" in probe and "tick" not in probe:
+                probe["tick"] = time.perf_counter()
+            super()._step(elapsed)
+
+        def move_forward(self):
+            super().move_forward()
+            self._mark_target()
+
+        def stop(self):
+            super().stop()
+            self._mark_target()
+
+        def turn(self, side):
+            super().turn(side)
+            self._mark_target()
+
+        def unturn(self):
+            super().unturn()
+            self._mark_target()
+
+    class BenchServer(Server):
+        def _create_controllers(self, session):
+            capture = SyntheticCapture(width=width, height=height, fps=fps or 30.0)
+            camera_controller = CameraUtils(websocket=session.sender, monitor_max_hz=int(fps or 30), camera_dimension=(width, height), capture=capture)
+            motor_controller = BenchMotorUtils(websocket=session.sender, tick_hz=self.motor_tick_hz, backend=BenchBackend())
+            return camera_controller, motor_controller, AudioUtils(sound_cache=self._sound_cache)
+
+        def _register_handlers(self):
+            super()._register_handlers()
+            self._dispatcher.register(REPORT_TYPE, self._on_bench_report, EmptyPayload, readonly=True)
+
+        async def handle_message(self, message, session):
+            arrival = time.perf_counter()
+            if isinstance(message, str):
+                message_type = decode(message).get("type")
+                if message_type in COMMANDS:
+                    probes.append({"type": message_type, "arrival": arrival})
+            await super().handle_message(message, session)
+
+        async def _on_bench_report(self, session, payload):
+            report = list(probes)
+            probes.clear()
+            await session.sender.send(encode({"ok": True, "benchReport": report}))
+
+    ssl_context = None
+    if use_tls:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(certfile=str(CERTFILE), keyfile=str(KEYFILE))
+
+    # Senza ripresa di sessione: la connessione di prova di `wait_for_server` non deve tenere occupato il posto di pilota
+    asyncio.run(BenchServer(port, "127.0.0.1", ssl_context, resume_grace=0, loop_stall_ms=None, motor_backend="simulated").start_server())
+
+
+async def measure_setting(args, fps: float, width: int, height: int) -> dict:
+    """
+    Avvia il server con una configurazione della videocamera e misura le latenze dei comandi.
+
+    Returns:
+        dict: Percentili delle fasi per tipo di comando e frame ricevuti al secondo.
+    """
+    use_tls = not args.no_tls
+    url = f"{'wss' if use_tls else 'ws'}://127.0.0.1:{args.port}"
+    client_ssl = None
+    if use_tls:
+        client_ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_ssl.check_hostname = False
+        client_ssl.verify_mode = ssl.CERT_NONE
+
+    context = multiprocessing.get_context("spawn")
+    server = context.Process(target=_serve, args=(args.port, use_tls, fps, width, height, args.log_level), daemon=True)
+    server.start()
+    try:
+        await wait_for_server(url, client_ssl)
+        async with websockets.connect(url, ssl=client_ssl, max_size=None) as ws:
+            while "role" not in (message := decode(await ws.recv())):
+                pass
+            if message["role"] != "driver":
+                raise RuntimeError("Il client di test non è stato registrato come pilota")
+
+            frames = 0
+            reports = asyncio.Queue()
+
+            async def receive():
+                nonlocal frames
+                async for message in ws:
+                    if isinstance(message, bytes):
+                        frames += 1
+                        continue
+                    data = decode(message)
+                    if data.get("frame"):
+                        frames += 1
+                    elif "benchReport" in data:
+                        reports.put_nowait(data["benchReport"])
+
+            receiver = asyncio.create_task(receive())
+
+            await ws.send(encode({"type": "toggle-motor-status", "content": ""}))
+            await ws.send(encode({"type": "switch-gear", "content": "1"}))
+            if fps:
+                hello = {"refreshRate": fps, "viewport": {"width": width, "height": height}, "codecs": ["jpeg"], "transport": "binary"}
+                await ws.send(encode({"type": "hello", "content": hello}))
+                await ws.send(encode({"type": "start-video-streaming", "content": ""}))
+            await asyncio.sleep(args.warmup)
+            await ws.send(encode({"type": REPORT_TYPE, "content": ""}))
+            await reports.get()  # Scarta i comandi di preparazione
+
+            sent_at = []
+            frames = 0
+            start = time.perf_counter()
+            for index in range(args.commands):
+                sent_at.append(time.perf_counter())
+                await ws.send(encode({"type": COMMANDS[index % len(COMMANDS)], "content": ""}))
+                await asyncio.sleep(args.interval)
+            elapsed = time.perf_counter() - start
+
+            await ws.send(encode({"type": REPORT_TYPE, "content": ""}))
+            probes = await asyncio.wait_for(reports.get(), timeout=10)
+            receiver.cancel()
+    finally:
+        server.kill()  # SDL intercetta SIGTERM
+        server.join()
+
+    stages = defaultdict(lambda: defaultdict(list))
+    for sent, probe in zip(sent_at, probes):
+        if "write" not in probe:
+            continue  # Comando scartato o senza effetto sui motori
+        values = {
+            "transitMs": probe["arrival"] - sent,
+            "dispatchMs": probe["target"] - probe["arrival"],
+            "tickMs": probe["tick"] - probe["target"],
+            "rampMs": probe["submit"] - probe["tick"],
+            "writeMs": probe["write"] - probe["submit"],
+            "totalMs": probe["write"] - sent,
+        }
+        for stage, value in values.items():
+            stages[probe["type"]][stage].append(value * 1000)
+            stages["TOTALE"][stage].append(value * 1000)
+
+    return {
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "framesPerSecond": round(frames / elapsed, 1),
+        "commands": len(sent_at),
+        "measured": len(stages["TOTALE"]["totalMs"]),
+        "latencyMs": {name: {stage: percentiles(values[stage]) for stage in STAGES} for name, values in stages.items()},
+    }
+
+
+def print_report(results: list) -> None:
+    for result in results:
+        label = f"{result['fps']:g} fps @ {result['width']}x{result['height']}" if result["fps"] else "senza streaming"
+        print(f"\n{label}: frame ricevuti {result['framesPerSecond']}/s, comandi misurati {result['measured']}/{result['commands']}")
+        print(f"  {'comando':<14}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}   fasi p50: arrivo / obiettivo / tick / rampa / scrittura")
+        for name in (*COMMANDS, "TOTALE"):
+            stages = result["latencyMs"].get(name, {})
+            total = stages.get("totalMs", {})
+            if not total.get("count"):
+                continue
+            phases = " / ".join(f"{stages[stage]['p50']}" for stage in STAGES[:-1])
+            print(f"  {name:<14}{total['p50']:>8}{total['p90']:>8}{total['p99']:>8}{total['max']:>8}   {phases}")
+
+
+async def run(args) -> list:
+    results = []
+    for fps, width, height in parse_settings(args.settings):
+        results.append(await measure_setting(args, fps, width, height))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latenza comando -> motore durante lo streaming video (solo localhost).")
+    parser.add_argument("--settings", default="0@640x480,15@640x480,30@640x480,30@1280x720",
+                        help="Configurazioni della videocamera fps@LxA separate da virgole")
+    parser.add_argument("--commands", type=int, default=100, help="Comandi inviati per configurazione (default: 100)")
+    parser.add_argument("--interval", type=float, default=0.15, help="Secondi tra due comandi (default: 0.15)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Secondi di streaming prima delle misure (default: 1)")
+    parser.add_argument("--port", type=int, default=8897, help="Porta del server di test (default: 8897)")
+    parser.add_argument("--no-tls", action="store_true", help="Usa ws:// invece di wss://")
+    parser.add_argument("--log-level", default="WARNING", help="Livello di log del server (default: WARNING)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    args = parser.parse_args()
+
+    parse_settings(args.settings)
+    if not args.no_tls and (not CERTFILE.is_file() or not KEYFILE.is_file()):
+        parser.error(f"Certificati non trovati ({CERTFILE}, {KEYFILE}): generarli o usare --no-tls")
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.json:
+        Path(args.json).write_text(encode(results), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Modulo: effect_bench
+
+Descrizione:
+Benchmark della latenza "play-effect" -> uscita audio del banco degli effetti, eseguito interamente
+su localhost.
+
+Per ogni dimensione del buffer del mixer il server viene avviato in un processo separato, con un
+banco di clip generate per il test (segnale acustico, clacson, avviamento del motore). Un client
+WSS pilota invia "play-effect" a intervalli regolari e poi una raffica di effetti diversi, più
+numerosi dei canali del gruppo, per verificare la sottrazione dei canali. Il server, instrumentato,
+registra per ogni effetto gli istanti di arrivo del messaggio in `handle_message` e di ritorno di
+`Channel.play`.
+
+Il mixer di SDL inizia a riprodurre un suono al riempimento successivo del buffer e il buffer
+riempito impiega a sua volta un periodo per arrivare all'uscita: la latenza fino all'uscita viene
+stimata come latenza misurata fino a `Channel.play` più 1,5 periodi del buffer (attesa media di
+mezzo periodo più il periodo di uscita). Il buffer del dispositivo audio e del sistema operativo
+non è incluso. Gli istanti del client e del server sono confrontabili perché `time.perf_counter`
+è un orologio di sistema.
+
+Esempio di utilizzo (dalla cartella backend):
+    python effect_bench.py --triggers 200
+    python effect_bench.py --buffers "256,512,2048" --json effects.json
+
+Dipendenze:
+- asyncio, argparse, multiprocessing, ssl, tempfile, time, wave per l'esecuzione del test (`builtin`).
+- numpy per la generazione delle clip di prova.
+- websockets per il client WebSocket (`websockets`).
+- loadtest per certificati, attesa del server e calcolo dei percentili.
+- utils.protocol.codec per la codifica dei messaggi.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import ssl
+import tempfile
+import time
+import wave
+from pathlib import Path
+import numpy as np
+import websockets
+from loadtest import CERTFILE, KEYFILE, percentiles, wait_for_server
+from utils.protocol.codec import encode, decode
+
+EFFECTS = {"beep": (0.15, 880.0), "horn": (0.6, 392.0), "engine": (1.5, 55.0)}  # {nome: (secondi, frequenza)}
+BURST_SECONDS = 2.0  # Durata delle clip della raffica: restano tutte in riproduzione
+STAGES = ("transitMs", "dispatchMs", "triggerMs", "outputMs")
+REPORT_TYPE = "bench-report"
+
+
+def make_effects(directory: Path, burst: int, rate: int = 44100) -> None:
+    """
+    Genera le clip di prova (onde sinusoidali con inviluppo) nella cartella indicata: gli effetti di
+    `EFFECTS` e `burst` clip "burst-<n>" per la raffica.
+    """
+    clips = {**EFFECTS, **{f"burst-{index}": (BURST_SECONDS, 220.0 + 20 * index) for index in range(burst)}}
+    for name, (seconds, frequency) in clips.items():
+        t = np.arange(int(seconds * rate)) / rate
+        envelope = np.minimum(1.0, np.minimum(t, seconds - t) * 50)
+        samples = (np.sin(2 * np.pi * frequency * t) * envelope * 12000).astype("<i2")
+        with wave.open(str(directory / f"{name}.wav"), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(samples.tobytes())
+
+
+def _serve(port: int, use_tls: bool, effects_dir: str, voices: int, buffer: int, log_level: str) -> None:
+    """
+    Processo server: `Server` instrumentato con il banco degli effetti di prova.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from server import Server
+    from utils.protocol.payloads import EmptyPayload
+
+    logging.getLogger().setLevel(log_level)
+    probes = []  # Un dizionario di istanti per ogni effetto richiesto
+
+    class BenchServer(Server):
+        async def _load_effects(self):
+            await super()._load_effects()
+            bank = self._effects
+            if bank is None:
+                return
+            play = bank.play
+
+            def timed_play(effect, volume=1.0):
+                started = play(effect, volume)
+                if probes and "play" not in probes[-1]:
+                    probes[-1]["play"] = time.perf_counter()
+                return started
+
+            bank.play = timed_play
+
+        def _register_handlers(self):
+            super()._register_handlers()
+            self._dispatcher.register(REPORT_TYPE, self._on_bench_report, EmptyPayload, readonly=True)
+
+        async def handle_message(self, message, session):
+            arrival = time.perf_counter()
+            if isinstance(message, str) and decode(message).get("type") == "play-effect":
+                probes.append({"arrival": arrival})
+            await super().handle_message(message, session)
+
+        async def _on_bench_report(self, session, payload):
+            report = list(probes)
+            probes.clear()
+            await session.sender.send(encode({
+                "ok": True,
+                "benchReport": report,
+                "effects": self._effects.get_stats() if self._effects else None
+            }))
+
+    ssl_context = None
+    if use_tls:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(certfile=str(CERTFILE), keyfile=str(KEYFILE))
+
+    # Senza ripresa di sessione: la connessione di prova di `wait_for_server` non deve tenere occupato il posto di pilota
+    server = BenchServer(port, "127.0.0.1", ssl_context, resume_grace=0, loop_stall_ms=None, flight_recorder_dir=None,
+                         link_ping_interval=0, motor_backend="simulated", effects_dir=effects_dir, effect_voices=voices, audio_buffer=buffer)
+    asyncio.run(server.start_server())
+
+
+async def measure_buffer(args, buffer: int, effects_dir: str) -> dict:
+    """
+    Avvia il server con una dimensione del buffer del mixer e misura la latenza degli effetti.
+
+    Returns:
+        dict: Percentili delle fasi, statistiche del banco degli effetti e durata del buffer.
+    """
+    use_tls = not args.no_tls
+    url = f"{'wss' if use_tls else 'ws'}://127.0.0.1:{args.port}"
+    client_ssl = None
+    if use_tls:
+        client_ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_ssl.check_hostname = False
+        client_ssl.verify_mode = ssl.CERT_NONE
+
+    context = multiprocessing.get_context("spawn")
+    server = context.Process(target=_serve, args=(args.port, use_tls, effects_dir, args.voices, buffer, args.log_level), daemon=True)
+    server.start()
+    try:
+        await wait_for_server(url, client_ssl)
+        async with websockets.connect(url, ssl=client_ssl, max_size=None) as ws:
+            while "role" not in (message := decode(await ws.recv())):
+                pass
+            if message["role"] != "driver":
+                raise RuntimeError("Il client di test non è stato registrato come pilota")
+
+            reports = asyncio.Queue()
+
+            async def receive():
+                async for message in ws:
+                    if isinstance(message, str) and "benchReport" in (data := decode(message)):
+                        reports.put_nowait(data)
+
+            receiver = asyncio.create_task(receive())
+
+            # Attende il caricamento del banco degli effetti (in background dopo l'avvio)
+            deadline = time.monotonic() + 20
+            while True:
+                await ws.send(encode({"type": REPORT_TYPE, "content": ""}))
+                report = await asyncio.wait_for(reports.get(), timeout=10)
+                if report["effects"] and report["effects"]["effects"]:
+                    break
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Banco degli effetti non caricato")
+                await asyncio.sleep(0.2)
+
+            names = list(EFFECTS)
+            sent_at = []
+            for index in range(args.triggers):
+                sent_at.append(time.perf_counter())
+                await ws.send(encode({"type": "play-effect", "content": names[index % len(names)]}))
+                await asyncio.sleep(args.interval)
+
+            # Raffica: più effetti diversi dei canali disponibili, senza attendere la fine dei precedenti
+            for index in range(args.voices * 2):
+                sent_at.append(time.perf_counter())
+                await ws.send(encode({"type": "play-effect", "content": f"burst-{index}"}))
+                await asyncio.sleep(0.002)
+
+            await asyncio.sleep(0.2)
+            await ws.send(encode({"type": REPORT_TYPE, "content": ""}))
+            report = await asyncio.wait_for(reports.get(), timeout=10)
+            receiver.cancel()
+    finally:
+        server.kill()  # SDL intercetta SIGTERM
+        server.join()
+
+    buffer_ms = report["effects"]["bufferMs"]
+    stages = {stage: [] for stage in STAGES}
+    for sent, probe in zip(sent_at, report["benchReport"]):
+        if "play" not in probe:
+            continue
+        trigger = (probe["play"] - sent) * 1000
+        stages["transitMs"].append((probe["arrival"] - sent) * 1000)
+        stages["dispatchMs"].append((probe["play"] - probe["arrival"]) * 1000)
+        stages["triggerMs"].append(trigger)
+        stages["outputMs"].append(trigger + 1.5 * buffer_ms)
+
+    return {
+        "buffer": buffer,
+        "bufferMs": buffer_ms,
+        "triggers": len(sent_at),
+        "measured": len(stages["triggerMs"]),
+        "effects": report["effects"],
+        "latencyMs": {stage: percentiles(values) for stage, values in stages.items()},
+    }
+
+
+def print_report(results: list) -> None:
+    print(f"\n{'buffer':>8}{'periodo':>9}   {'uscita p50':>10}{'p90':>8}{'p99':>8}{'max':>8}   fasi p50: arrivo / play    canali sottratti")
+    for result in results:
+        latency = result["latencyMs"]
+        output = latency["outputMs"]
+        if not output.get("count"):
+            print(f"{result['buffer']:>8}  nessun effetto misurato")
+            continue
+        phases = f"{latency['transitMs']['p50']} / {latency['dispatchMs']['p50']}"
+        print(f"{result['buffer']:>8}{result['bufferMs']:>7} ms   {output['p50']:>10}{output['p90']:>8}{output['p99']:>8}{output['max']:>8}   "
+              f"{phases:<24}{result['effects']['stolen']}/{result['effects']['plays']}")
+
+
+async def run(args, buffers: list) -> list:
+    with tempfile.TemporaryDirectory(prefix="lego-effects-") as effects_dir:
+        make_effects(Path(effects_dir), burst=args.voices * 2)
+        return [await measure_buffer(args, buffer, effects_dir) for buffer in buffers]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latenza play-effect -> uscita audio del banco degli effetti (solo localhost).")
+    parser.add_argument("--buffers", default="256,512,1024,4096",
+                        help="Dimensioni del buffer del mixer (campioni) separate da virgole")
+    parser.add_argument("--triggers", type=int, default=100, help="Effetti richiesti per configurazione (default: 100)")
+    parser.add_argument("--interval", type=float, default=0.05, help="Secondi tra due effetti (default: 0.05)")
+    parser.add_argument("--voices", type=int, default=8, help="Canali del mixer riservati agli effetti (default: 8)")
+    parser.add_argument("--port", type=int, default=8895, help="Porta del server di test (default: 8895)")
+    parser.add_argument("--no-tls", action="store_true", help="Usa ws:// invece di wss://")
+    parser.add_argument("--log-level", default="WARNING", help="Livello di log del server (default: WARNING)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    args = parser.parse_args()
+
+    try:
+        buffers = [int(value) for value in args.buffers.split(",") if value.strip()]
+    except ValueError:
+        parser.error(f"Dimensioni del buffer non valide: {args.buffers}")
+    if not buffers:
+        parser.error("Nessuna dimensione del buffer indicata")
+    if not args.no_tls and (not CERTFILE.is_file() or not KEYFILE.is_file()):
+        parser.error(f"Certificati non trovati ({CERTFILE}, {KEYFILE}): generarli o usare --no-tls")
+
+    results = asyncio.run(run(args, buffers))
+    print_report(results)
+
+    if args.json:
+        Path(args.json).write_text(encode(results), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
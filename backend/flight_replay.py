@@ -0,0 +1,169 @@
+"""
+Modulo: flight_replay
+
+Descrizione:
+Analisi delle registrazioni del registratore di volo (`utils.telemetry.flight_recorder`).
+
+Ogni file di sessione viene caricato in un unico array NumPy strutturato e le statistiche vengono
+calcolate in forma vettoriale: durata, distanza percorsa (integrale della velocità, in unità di
+velocità per secondo), velocità massima e media in movimento, sterzata massima, tempo per marcia e
+numero di comandi per tipo. I campioni vengono registrati solo quando lo stato cambia (e comunque
+una volta al secondo), quindi ogni campione vale fino al successivo.
+
+Con `--plot` viene salvato per ogni sessione un grafico di velocità e angolo di sterzata nel tempo,
+con i comandi ricevuti (richiede matplotlib).
+
+Esempio di utilizzo (dalla cartella backend):
+    python flight_replay.py                              # Tutte le sessioni in ../user/recordings/
+    python flight_replay.py ../user/recordings/flight-20261019-101500-123.lfr --plot grafici/
+    python flight_replay.py --json report.json
+
+Dipendenze:
+- argparse, json per l'interfaccia a riga di comando e il report (`builtin`).
+- importlib per verificare la presenza di matplotlib (`builtin`).
+- datetime per l'inizio delle sessioni (`builtin`).
+- numpy per il calcolo delle statistiche.
+- matplotlib per i grafici (opzionale, solo con `--plot`).
+- utils.telemetry per il formato dei file di registrazione e i tipi di record.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import importlib.util
+import json
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from utils.telemetry.flight_recorder import GEAR_NAMES, load_recording
+from utils.telemetry.telemetryenums.flight_event import FlightEvent
+from utils.telemetry.telemetryenums.flight_recorder_settings import FlightRecorderSettings
+
+
+def analyze(records: np.ndarray) -> dict:
+    """
+    Calcola le statistiche di una sessione.
+
+    Args:
+        records (np.ndarray): Record della sessione (`record_dtype()`).
+
+    Returns:
+        dict: Durata, distanza, velocità, sterzata, tempo per marcia e comandi per tipo.
+    """
+    samples = records[records["event"] == FlightEvent.SAMPLE.value]
+    events = records[records["event"] != FlightEvent.SAMPLE.value]
+    duration = float(records["t"][-1] - records["t"][0]) if len(records) else 0.0
+
+    # Ogni campione vale fino al successivo (l'ultimo non ha durata)
+    hold = np.diff(samples["t"], append=samples["t"][-1:]) if len(samples) else np.empty(0)
+    speed = np.abs(samples["speed"].astype(np.float64))
+    moving = speed > 0
+    moving_time = float(hold[moving].sum())
+
+    gear_codes, gear_index = np.unique(samples["gear"], return_inverse=True)
+    gear_time = np.bincount(gear_index, weights=hold, minlength=len(gear_codes)) if len(samples) else np.empty(0)
+    event_codes, event_counts = np.unique(events["event"], return_counts=True)
+
+    return {
+        "durationSeconds": round(duration, 2),
+        "records": int(len(records)),
+        "samples": int(len(samples)),
+        "distance": round(float((speed * hold).sum()), 1),
+        "maxSpeed": round(float(speed.max()), 1) if len(samples) else 0.0,
+        "meanMovingSpeed": round(float((speed * hold)[moving].sum() / moving_time), 1) if moving_time else 0.0,
+        "movingSeconds": round(moving_time, 2),
+        "maxAngle": round(float(np.abs(samples["angle"]).max()), 1) if len(samples) else 0.0,
+        "gearSeconds": {GEAR_NAMES.get(int(code), "?"): round(float(seconds), 2) for code, seconds in zip(gear_codes, gear_time)},
+        "commands": {_event_name(code): int(count) for code, count in zip(event_codes, event_counts)},
+    }
+
+
+def plot(records: np.ndarray, title: str, output: Path) -> None:
+    """
+    Salva il grafico di velocità e angolo di sterzata di una sessione, con i comandi ricevuti.
+    Richiede matplotlib.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    samples = records[records["event"] == FlightEvent.SAMPLE.value]
+    events = records[records["event"] != FlightEvent.SAMPLE.value]
+
+    figure, (speed_axis, angle_axis) = plt.subplots(2, 1, sharex=True, figsize=(12, 6))
+    speed_axis.step(samples["t"], samples["speed"], where="post")
+    speed_axis.set_ylabel("Velocità")
+    angle_axis.step(samples["t"], samples["angle"], where="post", color="tab:orange")
+    angle_axis.set_ylabel("Sterzata (gradi)")
+    angle_axis.set_xlabel("Tempo (s)")
+    for time_s, code in zip(events["t"], events["event"]):
+        speed_axis.axvline(time_s, color="grey", alpha=0.3, linewidth=0.8)
+        speed_axis.annotate(_event_name(code), (time_s, 1.0), xycoords=("data", "axes fraction"),
+                            rotation=90, fontsize=6, va="top", alpha=0.6)
+    figure.suptitle(title)
+    figure.tight_layout()
+    figure.savefig(output, dpi=120)
+    plt.close(figure)
+
+
+def _event_name(code: int) -> str:
+    try:
+        return FlightEvent(int(code)).name.lower()
+    except ValueError:
+        return f"event-{int(code)}"
+
+
+def _recording_files(paths: list) -> list:
+    """
+    Espande le cartelle nei file di registrazione che contengono, in ordine di nome.
+    """
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("*.lfr")) if path.is_dir() else [path])
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analisi delle registrazioni del registratore di volo.")
+    parser.add_argument("paths", nargs="*", default=[FlightRecorderSettings.DIRECTORY.value],
+                        help="File .lfr o cartelle di registrazioni (default: ../user/recordings/)")
+    parser.add_argument("--plot", help="Cartella in cui salvare un grafico per sessione (richiede matplotlib)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    args = parser.parse_args()
+
+    files = _recording_files(args.paths)
+    if not files:
+        parser.error("Nessuna registrazione trovata")
+    if args.plot:
+        if importlib.util.find_spec("matplotlib") is None:
+            parser.error("--plot richiede matplotlib (pip install matplotlib)")
+        Path(args.plot).mkdir(parents=True, exist_ok=True)
+
+    report = {}
+    for path in files:
+        try:
+            header, records = load_recording(path)
+        except (OSError, ValueError) as e:
+            print(f"{path.name}: {e}")
+            continue
+
+        started = datetime.fromtimestamp(header["startedAt"]).strftime("%d-%m-%Y %H:%M:%S")
+        stats = report[path.name] = {"startedAt": started, **analyze(records)}
+        print(f"{path.name} ({started}): {stats['durationSeconds']} s, {stats['records']} record, "
+              f"distanza {stats['distance']}, velocità max {stats['maxSpeed']} (media in movimento {stats['meanMovingSpeed']}), "
+              f"sterzata max {stats['maxAngle']}°")
+        print(f"  marce (s): {stats['gearSeconds']}")
+        print(f"  comandi: {stats['commands']}")
+
+        if args.plot and len(records):
+            output = Path(args.plot) / f"{path.stem}.png"
+            plot(records, f"{path.name} ({started})", output)
+            print(f"  grafico: {output}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
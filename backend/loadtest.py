@@ -0,0 +1,412 @@
+"""
+Modulo: loadtest
+
+Descrizione:
+Generatore di carico per il server WebSocket, eseguito interamente su localhost.
+
+Il server viene avviato in un processo separato con hardware simulato: videocamera sintetica
+(`SyntheticCapture`), motori senza PiStorms e audio pygame sul driver "dummy". Vengono poi aperti
+N client WSS concorrenti: il primo che si connette diventa pilota, gli altri spettatori. Ogni
+client invia a frequenza fissa una miscela configurabile dei messaggi del protocollo, ognuno con
+un campo "id" a cui il server risponde con `{"ok": true, "ack": id}`.
+
+Al termine vengono riportati:
+- percentili della latenza comando -> conferma (complessivi e per tipo di messaggio);
+- frame video ricevuti al secondo da ogni client;
+- CPU e memoria del processo server (richiede `psutil`, opzionale).
+
+Esempio di utilizzo (dalla cartella backend):
+    python loadtest.py --clients 20 --duration 30 --rate 20
+    python loadtest.py --driver-mix "move-forward:3,stop-moving:3,new-audio:1" --json report.json
+
+Le miscele sono liste "tipo:peso" separate da virgole. I comandi di guida degli spettatori
+vengono rifiutati dal server e quindi non ricevono conferma: per questo pilota e spettatori
+hanno miscele distinte. I messaggi che scrivono su disco ("take-picture", "start-recording")
+non fanno parte delle miscele di default.
+
+Dipendenze:
+- asyncio, argparse, multiprocessing, ssl, time, random per l'esecuzione del test (`builtin`).
+- io, wave, base64 per il file audio di prova (`builtin`).
+- websockets per i client WebSocket (`websockets`).
+- NumPy per il calcolo dei percentili (`numpy`).
+- psutil (opzionale) per CPU e memoria del processo server (`psutil`).
+- utils.protocol.codec per la codifica dei messaggi.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import random
+import ssl
+import time
+import wave
+from collections import defaultdict
+from pathlib import Path
+import numpy as np
+import websockets
+from websockets.exceptions import InvalidHandshake
+from utils.protocol.codec import encode, decode
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    psutil = None
+
+
+DEFAULT_DRIVER_MIX = "move-forward:4,stop-moving:3,turn-left:2,unturn:2,set-zoom:1,switch-gear:1,set-turbo:1"
+DEFAULT_SPECTATOR_MIX = "claim-driver:1"
+
+ROOT_DIR = Path(__file__).parent.parent
+CERTFILE = ROOT_DIR / "certificate.crt"
+KEYFILE = ROOT_DIR / "private.key"
+
+
+def _make_test_audio(seconds: float = 1.0, rate: int = 22050) -> str:
+    """
+    Crea un file WAV di silenzio e lo restituisce codificato in base64, come il messaggio "new-audio".
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\0\0" * int(seconds * rate))
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+CONTENT_FACTORIES = {
+    "set-zoom": lambda rng: round(rng.uniform(0.5, 3.0), 2),
+    "switch-gear": lambda rng: rng.choice(["1", "2", "3", "4"]),
+    "set-turbo": lambda rng: f"{rng.randint(0, 100)}%",
+    "set-brake-intensity": lambda rng: f"{rng.randint(1, 100)}%",
+    "set-sound-volume": lambda rng: rng.uniform(-60, 60),
+    "set-sound-pan": lambda rng: rng.uniform(-1, 1),
+    "toggle-night-mode": lambda rng: rng.choice([0, 1]),
+}
+
+
+def parse_mix(mix: str) -> tuple:
+    """
+    Converte una miscela "tipo:peso,tipo:peso" in due liste (tipi, pesi).
+
+    Raises:
+        ValueError: Se la miscela è vuota o un peso non è un numero positivo.
+    """
+    types, weights = [], []
+    for item in filter(None, (part.strip() for part in mix.split(","))):
+        name, _, weight = item.partition(":")
+        weight = float(weight or 1)
+        if weight <= 0:
+            raise ValueError(f"Peso non valido per '{name}': {weight}")
+        types.append(name)
+        weights.append(weight)
+
+    if not types:
+        raise ValueError("La miscela di messaggi è vuota")
+    return types, weights
+
+
+def _serve(port: int, use_tls: bool, camera_fps: float, log_level: str) -> None:
+    """
+    Processo server: avvia `Server` con telecamera sintetica e audio senza dispositivo.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from server import Server
+    from utils.camera.CameraUtils import CameraUtils
+    from utils.camera.synthetic_capture import SyntheticCapture
+    from utils.motor.MotorUtils import MotorUtils
+    from utils.motor.motor_backend import create_motor_backend
+    from utils.audio.AudioUtils import AudioUtils
+
+    logging.getLogger().setLevel(log_level)
+
+    class StubbedServer(Server):
+        """
+        Server con hardware simulato: nessuna videocamera, nessun PiStorms, nessuna scheda audio.
+        """
+
+        def _create_controllers(self, session):
+            capture = SyntheticCapture(fps=camera_fps)
+            camera_controller = CameraUtils(websocket=session.sender, monitor_max_hz=int(camera_fps), capture=capture)
+            motor_controller = MotorUtils(websocket=session.sender, backend=create_motor_backend("simulated"))
+            audio_controller = AudioUtils(sound_cache=self._sound_cache)
+            return camera_controller, motor_controller, audio_controller
+
+    ssl_context = None
+    if use_tls:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(certfile=str(CERTFILE), keyfile=str(KEYFILE))
+
+    # Senza ripresa di sessione: la connessione di prova di `wait_for_server` non deve tenere occupato il posto di pilota
+    asyncio.run(StubbedServer(port, "127.0.0.1", ssl_context, resume_grace=0, motor_backend="simulated").start_server())
+
+
+class ClientStats:
+    """
+    Misure raccolte da un singolo client simulato.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.role = None
+        self.sent = 0
+        self.latencies = defaultdict(list)  # {tipo messaggio: [latenza ms]}
+        self.frames = 0
+        self.frame_bytes = 0
+        self.pending = {}  # {id: (tipo, istante di invio)}
+
+
+async def run_client(index: int, url: str, ssl_context, args, audio_b64: str) -> ClientStats:
+    """
+    Client simulato: legge il ruolo assegnato, avvia lo streaming e invia la propria miscela
+    di messaggi fino alla scadenza, misurando la latenza delle conferme e i frame ricevuti.
+    """
+    stats = ClientStats(index)
+    rng = random.Random(args.seed + index)
+    next_id = 0
+
+    async with websockets.connect(url, ssl=ssl_context, max_size=None) as ws:
+        while stats.role is None:
+            stats.role = decode(await ws.recv()).get("role")
+
+        async def receive():
+            async for message in ws:
+                if isinstance(message, bytes):
+                    stats.frames += 1
+                    stats.frame_bytes += len(message)
+                    continue
+
+                data = decode(message)
+                if "ack" in data:
+                    pending = stats.pending.pop(data["ack"], None)
+                    if pending is not None:
+                        message_type, sent_at = pending
+                        stats.latencies[message_type].append((time.perf_counter() - sent_at) * 1000)
+                elif data.get("frame"):
+                    stats.frames += 1
+                    stats.frame_bytes += len(message)
+
+        async def send(message_type: str, **fields):
+            nonlocal next_id
+            next_id += 1
+            stats.pending[next_id] = (message_type, time.perf_counter())
+            stats.sent += 1
+            await ws.send(encode({"type": message_type, "id": next_id, **fields}))
+
+        receiver = asyncio.create_task(receive())
+
+        is_driver = stats.role == "driver"
+        types, weights = parse_mix(args.driver_mix if is_driver else args.spectator_mix)
+
+        if is_driver:
+            await send("toggle-motor-status", content="")
+            await send("switch-gear", content="1")
+            await send("start-video-streaming", content="")
+
+        period = 1 / args.rate
+        deadline = time.perf_counter() + args.duration
+        next_send = time.perf_counter()
+
+        while time.perf_counter() < deadline:
+            message_type = rng.choices(types, weights)[0]
+            if message_type == "new-audio":
+                await send("new-audio", name=f"loadtest_{index}.wav", content=audio_b64)
+            elif message_type in CONTENT_FACTORIES:
+                await send(message_type, content=CONTENT_FACTORIES[message_type](rng))
+            else:
+                await send(message_type, content="")
+
+            next_send += period
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+
+        # Attesa delle ultime conferme
+        await asyncio.sleep(args.grace)
+        receiver.cancel()
+
+    return stats
+
+
+async def sample_server(pid: int, samples: list, stop: asyncio.Event, interval: float = 0.5) -> None:
+    """
+    Campiona CPU (%) e memoria residente (MiB) del processo server.
+    """
+    process = psutil.Process(pid)
+    process.cpu_percent(None)
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        samples.append((process.cpu_percent(None), process.memory_info().rss / (1024 * 1024)))
+
+
+async def wait_for_server(url: str, ssl_context, timeout: float = 20.0) -> None:
+    """
+    Attende che il server accetti connessioni.
+
+    Raises:
+        TimeoutError: Se il server non risponde entro `timeout` secondi.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with websockets.connect(url, ssl=ssl_context):
+                return
+        except (OSError, InvalidHandshake):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Il server non risponde su {url}")
+            await asyncio.sleep(0.2)
+
+
+def percentiles(values: list) -> dict:
+    """
+    Restituisce numero di campioni, p50, p90, p99 e massimo (millisecondi).
+    """
+    if not values:
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": len(values), "p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2), "max": round(max(values), 2)}
+
+
+def build_report(clients: list, samples: list, duration: float) -> dict:
+    """
+    Aggrega le misure di tutti i client e del processo server.
+    """
+    by_type = defaultdict(list)
+    for stats in clients:
+        for message_type, values in stats.latencies.items():
+            by_type[message_type].extend(values)
+
+    all_latencies = [value for values in by_type.values() for value in values]
+    fps = [stats.frames / duration for stats in clients]
+
+    report = {
+        "clients": len(clients),
+        "sent": sum(stats.sent for stats in clients),
+        "acked": len(all_latencies),
+        "unacked": sum(len(stats.pending) for stats in clients),
+        "latencyMs": percentiles(all_latencies),
+        "latencyByTypeMs": {name: percentiles(values) for name, values in sorted(by_type.items())},
+        "fps": {
+            "min": round(min(fps), 2) if fps else 0,
+            "mean": round(float(np.mean(fps)), 2) if fps else 0,
+            "max": round(max(fps), 2) if fps else 0,
+            "perClient": {f"{stats.index}:{stats.role}": round(stats.frames / duration, 2) for stats in clients},
+        },
+    }
+
+    if samples:
+        cpu, rss = zip(*samples)
+        report["server"] = {
+            "cpuPercentMean": round(float(np.mean(cpu)), 1),
+            "cpuPercentMax": round(max(cpu), 1),
+            "rssMiBMax": round(max(rss), 1),
+        }
+    else:
+        report["server"] = None  # psutil non disponibile
+
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\nClient: {report['clients']}  messaggi inviati: {report['sent']}  "
+          f"confermati: {report['acked']}  senza conferma: {report['unacked']}")
+
+    print("\nLatenza comando -> conferma (ms)")
+    print(f"  {'tipo':<24}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    rows = list(report["latencyByTypeMs"].items()) + [("TOTALE", report["latencyMs"])]
+    for name, values in rows:
+        if values.get("count"):
+            print(f"  {name:<24}{values['count']:>7}{values['p50']:>9}{values['p90']:>9}{values['p99']:>9}{values['max']:>9}")
+
+    fps = report["fps"]
+    print(f"\nFrame ricevuti al secondo per client: min {fps['min']}  media {fps['mean']}  max {fps['max']}")
+
+    server = report["server"]
+    if server:
+        print(f"Server: CPU media {server['cpuPercentMean']}%  CPU max {server['cpuPercentMax']}%  RSS max {server['rssMiBMax']} MiB")
+    else:
+        print("Server: CPU e memoria non disponibili (installare psutil)")
+
+
+async def run(args) -> dict:
+    """
+    Avvia il server in un processo separato, esegue i client e restituisce il report.
+    """
+    use_tls = not args.no_tls
+    scheme = "wss" if use_tls else "ws"
+    url = f"{scheme}://127.0.0.1:{args.port}"
+
+    client_ssl = None
+    if use_tls:
+        client_ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_ssl.check_hostname = False
+        client_ssl.verify_mode = ssl.CERT_NONE
+
+    context = multiprocessing.get_context("spawn")
+    server = context.Process(target=_serve, args=(args.port, use_tls, args.camera_fps, args.log_level), daemon=True)
+    server.start()
+
+    samples = []
+    stop_sampling = asyncio.Event()
+    try:
+        await wait_for_server(url, client_ssl)
+        sampler = asyncio.create_task(sample_server(server.pid, samples, stop_sampling)) if psutil else None
+
+        audio_b64 = _make_test_audio()
+        clients = []
+        for index in range(args.clients):
+            clients.append(asyncio.create_task(run_client(index, url, client_ssl, args, audio_b64)))
+            if index == 0:
+                await asyncio.sleep(0.2)  # Il primo client diventa pilota
+
+        results = await asyncio.gather(*clients)
+
+        stop_sampling.set()
+        if sampler:
+            await sampler
+    finally:
+        server.terminate()
+        server.join(timeout=5)
+        if server.is_alive():  # SDL intercetta SIGTERM
+            server.kill()
+            server.join()
+
+    return build_report(results, samples, args.duration)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Test di carico del server WebSocket con hardware simulato (solo localhost).")
+    parser.add_argument("--clients", type=int, default=10, help="Numero di client concorrenti (default: 10)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durata dell'invio in secondi (default: 20)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Messaggi al secondo per client (default: 10)")
+    parser.add_argument("--driver-mix", default=DEFAULT_DRIVER_MIX, help="Miscela di messaggi del pilota (tipo:peso,...)")
+    parser.add_argument("--spectator-mix", default=DEFAULT_SPECTATOR_MIX, help="Miscela di messaggi degli spettatori")
+    parser.add_argument("--camera-fps", type=float, default=30.0, help="Frame al secondo della videocamera sintetica (default: 30)")
+    parser.add_argument("--port", type=int, default=8899, help="Porta del server di test (default: 8899)")
+    parser.add_argument("--no-tls", action="store_true", help="Usa ws:// invece di wss://")
+    parser.add_argument("--grace", type=float, default=1.0, help="Secondi di attesa delle ultime conferme (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seme della scelta casuale dei messaggi")
+    parser.add_argument("--log-level", default="WARNING", help="Livello di log del server (default: WARNING)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    args = parser.parse_args()
+
+    parse_mix(args.driver_mix)
+    parse_mix(args.spectator_mix)
+    if not args.no_tls and (not CERTFILE.is_file() or not KEYFILE.is_file()):
+        parser.error(f"Certificati non trovati ({CERTFILE}, {KEYFILE}): generarli o usare --no-tls")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json:
+        Path(args.json).write_text(encode(report), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
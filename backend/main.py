@@ -5,10 +5,35 @@ if __name__ == "__main__":
     import ssl
     import asyncio
     from server import Server
+    from utils.serverutils import ServerUtils
     load_dotenv()
     
     port = int(get_key(".env", "PORT"))
     host = get_key(".env", "URL")
+    telemetry_hz = float(get_key(".env", "TELEMETRY_HZ") or 10)  # Frequenza della telemetria di stato (opzionale)
+    audio_cache_mb = float(get_key(".env", "AUDIO_CACHE_MB") or 64)  # Memoria per i suoni decodificati (opzionale)
+    metrics_port = int(get_key(".env", "METRICS_PORT") or 0) or None  # Porta dell'endpoint Prometheus (opzionale)
+    use_uvloop = (get_key(".env", "UVLOOP") or "0").strip().lower() in ("1", "true", "yes")  # Event loop uvloop (opzionale)
+    loop_stall_ms = float(get_key(".env", "LOOP_STALL_MS") or 100)  # Soglia dei blocchi dell'event loop, 0 per disattivare (opzionale)
+    resume_grace = float(get_key(".env", "RESUME_GRACE_SECONDS") or 30)  # Secondi per riprendere la sessione del pilota, 0 per disattivare (opzionale)
+    motor_tick_hz = float(get_key(".env", "MOTOR_TICK_HZ") or 50)  # Frequenza del ciclo di controllo dei motori (opzionale)
+    motor_backend = get_key(".env", "MOTOR_BACKEND") or "pistorms"  # "simulated" per i motori simulati (opzionale)
+    flight_recorder_dir = get_key(".env", "FLIGHT_RECORDER_DIR")  # Cartella del registratore di volo, "off" per disattivarlo (opzionale)
+    trace_dir = get_key(".env", "TRACE_DIR") or None  # Cartella della cattura dei messaggi ricevuti (opzionale)
+    link_ping_interval = float(get_key(".env", "LINK_PING_INTERVAL") or 0.5)  # Secondi tra due ping del monitor del collegamento, 0 per disattivarlo (opzionale)
+    link_max_rtt_ms = float(get_key(".env", "LINK_MAX_RTT_MS") or 500)  # RTT oltre il quale il veicolo viene fermato (opzionale)
+    link_max_missed = int(get_key(".env", "LINK_MAX_MISSED") or 3)  # Ping senza risposta dopo i quali il veicolo viene fermato (opzionale)
+    effects_dir = get_key(".env", "EFFECTS_DIR")  # Cartella del banco degli effetti sonori, "off" per disattivarlo (opzionale)
+    effect_voices = int(get_key(".env", "EFFECT_VOICES") or 8)  # Effetti sonori riproducibili contemporaneamente (opzionale)
+    audio_buffer = int(get_key(".env", "AUDIO_BUFFER") or 512)  # Campioni del buffer del mixer audio (opzionale)
+    if flight_recorder_dir is None:
+        flight_recorder_dir = "../user/recordings/"
+    elif flight_recorder_dir.strip().lower() in ("", "0", "off", "false", "no"):
+        flight_recorder_dir = None
+    if effects_dir is None:
+        effects_dir = "../user/effects/"
+    elif effects_dir.strip().lower() in ("", "0", "off", "false", "no"):
+        effects_dir = None
 
     # Percorsi assoluti dei certificati
     _dirname = Path(__file__).parent
@@ -34,10 +59,10 @@ if __name__ == "__main__":
         exit(1)
 
     # Creazione e avvio del server WebSocket
-    server = Server(port, host, ssl_context)
+    server = Server(port, host, ssl_context, telemetry_hz=telemetry_hz, audio_cache_mb=audio_cache_mb, metrics_port=metrics_port, loop_stall_ms=loop_stall_ms, resume_grace=resume_grace, motor_tick_hz=motor_tick_hz, motor_backend=motor_backend, flight_recorder_dir=flight_recorder_dir, trace_dir=trace_dir, link_ping_interval=link_ping_interval, link_max_rtt_ms=link_max_rtt_ms, link_max_missed=link_max_missed, effects_dir=effects_dir, effect_voices=effect_voices, audio_buffer=audio_buffer)
 
-    if os.name == "nt":
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    event_loop = ServerUtils.configure_event_loop(use_uvloop)
+    print(f"Event loop: {event_loop}")
 
     try:
         asyncio.run(server.start_server())
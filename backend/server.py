@@ -6,15 +6,19 @@ Server WebSocket per la gestione delle comunicazioni tra client e dispositivi
 
 Questo modulo contiene la classe principale Server che gestisce:
 - Connessioni WebSocket sicure (WSS)
+- Sessioni per connessione con un solo pilota e più spettatori in sola lettura
+- Ripresa della sessione del pilota dopo una disconnessione, tramite token
 - Comunicazione con dispositivi hardware (motori, telecamera, audio)
 - Gestione dei comandi dai client
-- Elaborazione di messaggi JSON
+- Elaborazione di messaggi JSON tramite un dispatcher a tabella
 
 Dipendenze:
 - websockets: Per la gestione delle connessioni WebSocket
 - asyncio: Per la gestione asincrona delle operazioni
-- mutagen: Per l'elaborazione dei file audio
 - ssl: Per la gestione della sicurezza delle connessioni
+- utils.protocol: Per la codifica JSON condivisa e l'instradamento dei messaggi
+- utils.metrics: Per il registro delle metriche, l'endpoint Prometheus e il monitor dell'event loop
+- utils.startup: Per il caricamento in background dei controller hardware (OpenCV, NumPy, pygame)
 
 Author: Zs
 Date: 02-04-2025
@@ -22,27 +26,63 @@ Version: 1.0.0
 """
 
 import websockets
-import json
 import asyncio
 import base64
-from mutagen import File
+import secrets
+from urllib.parse import urlsplit, parse_qs
 from dotenv import load_dotenv, get_key
-import os
 import logging
 import ssl
 from pathlib import Path
 import time
-from utils.camera.CameraUtils import CameraUtils
-from utils.motor.MotorUtils import MotorUtils
-from utils.audio.AudioUtils import AudioUtils
 from utils.audio.audioenums.audio_settings import AudioSettings
+from utils.audio.audioenums.upload_settings import UploadSettings
+from utils.audio.audioenums.cache_settings import CacheSettings
+from utils.audio.audioenums.effect_settings import EffectSettings
+from utils.audio.audio_upload import AudioUploadManager, UploadError
+from utils.audio.audio_cache import AudioStore, SoundCache
+from utils.audio.audio_probe import AudioProbe
 from utils.motor.motorenums.direction import Direction
 from utils.motor.motorenums.turn import Turn
-from utils.motor.motorenums.gears import Gear
+from utils.motor.motorenums.control_loop_settings import ControlLoopSettings
+from utils.motor.motorenums.motor_backend_settings import MotorBackendSettings
+from utils.motor.motor_backend import create_motor_backend, check_motor_backend
 from utils.serverutils import ServerUtils
+from utils.session.session import Session
+from utils.session.spectator_hub import SpectatorHub
+from utils.session.sessionenums.resume_settings import ResumeSettings
+from utils.session.sessionenums.link_settings import LinkSettings
+from utils.session.link_monitor import LinkMonitor
+from utils.protocol.codec import encode, DecodeError
+from utils.protocol.dispatcher import MessageDispatcher
+from utils.protocol.send_scheduler import SendScheduler
+from utils.protocol.trace_capture import TraceCapture
+from utils.protocol.protocolenums.send_priority import SendPriority
+from utils.telemetry.state_publisher import StatePublisher
+from utils.metrics.registry import REGISTRY
+from utils.metrics.exporter import MetricsExporter
+from utils.metrics.loop_monitor import LoopMonitor
+from utils.metrics.metricsenums.loop_monitor_settings import LoopMonitorSettings
+from utils.startup.subsystem_loader import SubsystemLoader
+from utils.telemetry.telemetryenums.telemetry_settings import TelemetrySettings
+from utils.telemetry.telemetryenums.flight_recorder_settings import FlightRecorderSettings
+from utils.telemetry.flight_recorder import FlightRecorder
+from utils.protocol.payloads import (
+    EmptyPayload, NightModePayload, ZoomPayload, GearPayload, TurboPayload,
+    BrakePayload, LevelPayload, AudioUploadPayload, UploadBeginPayload, UploadCommitPayload, HelloPayload,
+    EffectPayload
+)
+from utils.protocol.stream_negotiation import negotiate
+from utils.protocol.protocolenums.stream_settings import StreamSettings
 
 ServerUtils.configure_logging()
 
+# Moduli dei controller hardware: vengono importati in background dopo l'apertura della porta
+CAMERA_MODULE = "utils.camera.CameraUtils"
+MOTOR_MODULE = "utils.motor.MotorUtils"
+AUDIO_MODULE = "utils.audio.AudioUtils"
+EFFECTS_MODULE = "utils.audio.effect_bank"
+
 class Server:
     """
     Classe Server che gestisce connessioni WebSocket e la comunicazione tra i client.
@@ -52,12 +92,46 @@ class Server:
         - port (int): Porta su cui il server è in ascolto.
         - host (str): Indirizzo host del server.
         - ssl_context (ssl.SSLContext): Contesto SSL per connessioni sicure.
-        - _movement_task (Task): Riferimento al task corrente per il movimento del motore.
-        - _steering_task (Task): Riferimento al task corrente per lo sterzo.
-        - _decelerating (bool): Flag che indica se il veicolo sta decelerando.
-        - _temp_sound (str): Nome del file audio temporaneo in riproduzione.
+        - telemetry_hz (float): Frequenza di pubblicazione dello stato del veicolo (Hz).
+        - _driver (Session | None): Sessione del client che comanda il veicolo.
+        - _spectators (SpectatorHub): Spettatori che ricevono video e telemetria in broadcast.
+        - _audio_store (AudioStore): Archivio dei file audio indicizzati per hash del contenuto.
+        - _sound_cache (SoundCache): Suoni decodificati, condivisi tra le sessioni di guida successive.
+        - _audio_probe (AudioProbe): Metadati dei file audio già analizzati, per hash del contenuto.
+        - _uploads (AudioUploadManager): Caricamenti audio a blocchi in corso, condivisi tra le connessioni.
+        - _dispatcher (MessageDispatcher): Tabella di instradamento dei messaggi per tipo.
+        - _metrics_exporter (MetricsExporter | None): Endpoint Prometheus delle metriche, se abilitato.
+        - _loop_monitor (LoopMonitor | None): Monitor della latenza e dei blocchi dell'event loop, se abilitato.
+        - _subsystems (SubsystemLoader): Caricamento in background dei moduli dei controller hardware.
+        - _host_refresh_rate (int | None): Frequenza del monitor dell'host, rilevata una sola volta all'avvio;
+          usata per lo streaming dei client che non inviano "hello".
+        - resume_grace (float): Secondi per cui la sessione di un pilota disconnesso resta riprendibile.
+        - motor_tick_hz (float): Frequenza del ciclo di controllo dei motori (Hz).
+        - motor_backend (str): Backend dei motori ("pistorms" sul veicolo, "simulated" altrove).
+        - flight_recorder_dir (str | None): Cartella del registratore di volo; None se disattivato.
+        - _traces (TraceCapture | None): Cattura dei messaggi in arrivo, se attiva.
+        - link_ping_interval (float): Secondi tra due ping del monitor del collegamento (0 se disattivato).
+        - link_max_rtt_ms (float): RTT oltre il quale il veicolo viene fermato.
+        - link_max_missed (int): Ping consecutivi senza risposta dopo i quali il veicolo viene fermato.
+        - effects_dir (str | None): Cartella delle clip del banco degli effetti; None se disattivato.
+        - effect_voices (int): Canali del mixer riservati agli effetti.
+        - audio_buffer (int): Campioni del buffer del mixer.
+        - _effects (EffectBank | None): Banco degli effetti, disponibile dopo il caricamento.
     """
-    def __init__(self, port: int, host: str, ssl_context):
+    def __init__(self, port: int, host: str, ssl_context, telemetry_hz: float = TelemetrySettings.DEFAULT_TICK_HZ.value,
+                 audio_cache_mb: float = CacheSettings.DEFAULT_BUDGET_MB.value, metrics_port: int | None = None,
+                 loop_stall_ms: float | None = LoopMonitorSettings.STALL_THRESHOLD_MS.value,
+                 resume_grace: float = ResumeSettings.GRACE_SECONDS.value,
+                 motor_tick_hz: float = ControlLoopSettings.DEFAULT_TICK_HZ.value,
+                 motor_backend: str = MotorBackendSettings.DEFAULT_BACKEND.value,
+                 flight_recorder_dir: str | None = FlightRecorderSettings.DIRECTORY.value,
+                 trace_dir: str | None = None,
+                 link_ping_interval: float = LinkSettings.PING_INTERVAL_SECONDS.value,
+                 link_max_rtt_ms: float = LinkSettings.MAX_RTT_MS.value,
+                 link_max_missed: int = LinkSettings.MAX_MISSED_PINGS.value,
+                 effects_dir: str | None = EffectSettings.DIRECTORY.value,
+                 effect_voices: int = EffectSettings.VOICES.value,
+                 audio_buffer: int = EffectSettings.MIXER_BUFFER.value):
         """
         Inizializza un'istanza del server WebSocket.
 
@@ -72,277 +146,502 @@ class Server:
             ssl_context (ssl.SSLContext): Il contesto SSL utilizzato per abilitare 
                         connessioni sicure (WSS - WebSocket Secure). Deve essere un'istanza 
                         valida di ssl.SSLContext configurata con certificati appropriati.
+            telemetry_hz (float, opzionale): Frequenza di pubblicazione dello stato del veicolo
+                        verso il client, in Hz (default: 10).
+            audio_cache_mb (float, opzionale): Memoria massima dei suoni decodificati in cache,
+                        in MiB (default: 64).
+            metrics_port (int | None, opzionale): Porta locale dell'endpoint Prometheus delle
+                        metriche; None per disattivarlo (default: None).
+            loop_stall_ms (float | None, opzionale): Durata in millisecondi oltre la quale un
+                        blocco dell'event loop viene registrato con il suo stack; None o 0 per
+                        disattivare il monitor (default: 100).
+            resume_grace (float, opzionale): Secondi per cui, dopo la disconnessione del pilota,
+                        la sua sessione resta riprendibile con il token di ripresa, mantenendo
+                        attivi i controller hardware; 0 per disattivare la ripresa (default: 30).
+            motor_tick_hz (float, opzionale): Frequenza del ciclo di controllo che porta velocità e
+                        sterzata verso i valori richiesti dai comandi, in Hz (default: 50).
+            motor_backend (str, opzionale): Backend dei motori, "pistorms" per i motori reali o
+                        "simulated" per i motori simulati; non viene mai sostituito in silenzio
+                        (default: "pistorms").
+            flight_recorder_dir (str | None, opzionale): Cartella in cui il registratore di volo
+                        salva la telemetria dei motori di ogni sessione di guida; None per
+                        disattivarlo (default: "../user/recordings/").
+            trace_dir (str | None, opzionale): Cartella in cui catturare i messaggi ricevuti da ogni
+                        connessione, con i loro istanti, per riprodurli con `trace_replay.py`; None
+                        per disattivare la cattura (default: None).
+            link_ping_interval (float, opzionale): Secondi tra due ping WebSocket con cui vengono
+                        misurati RTT e jitter di ogni connessione; 0 per disattivare il monitor e
+                        l'arresto di sicurezza (default: 0.5).
+            link_max_rtt_ms (float, opzionale): RTT del pilota, in ms, oltre il quale il veicolo
+                        viene fermato; 0 per considerare solo i ping persi (default: 500).
+            link_max_missed (int, opzionale): Ping consecutivi del pilota senza risposta dopo i
+                        quali il veicolo viene fermato (default: 3).
+            effects_dir (str | None, opzionale): Cartella delle clip brevi (clacson, segnali, ...)
+                        caricate in memoria all'avvio e riprodotte con "play-effect"; None per
+                        disattivare il banco degli effetti (default: "../user/effects/").
+            effect_voices (int, opzionale): Canali del mixer riservati agli effetti, cioè effetti
+                        riproducibili contemporaneamente (default: 8).
+            audio_buffer (int, opzionale): Campioni del buffer del mixer audio: valori piccoli
+                        riducono la latenza, valori grandi evitano interruzioni su hardware lento
+                        (default: 512).
         """
         self.clients = set() # Set to track singular client 
         self.port = port # Websocket server listening port
         self.host = host # Server url
         self.ssl_context = ssl_context
-        self._movement_task = None
-        self._steering_task = None
-        self._decelerating = False
-        self._temp_sound = None
+        self.telemetry_hz = telemetry_hz
+        self._driver = None
+        self._spectators = SpectatorHub()
+        self._audio_store = AudioStore()
+        self._sound_cache = SoundCache(audio_cache_mb)
+        self._audio_probe = AudioProbe()
+        self._uploads = AudioUploadManager(store=self._audio_store)
+        self._dispatcher = MessageDispatcher()
+        self._metrics_exporter = MetricsExporter(metrics_port) if metrics_port else None
+        self._loop_monitor = LoopMonitor(loop_stall_ms) if loop_stall_ms else None
+        self._subsystems = SubsystemLoader((CAMERA_MODULE, MOTOR_MODULE, AUDIO_MODULE, EFFECTS_MODULE))
+        self._host_refresh_rate = None
+        self.resume_grace = resume_grace
+        self.motor_tick_hz = motor_tick_hz
+        self.motor_backend = motor_backend
+        self.flight_recorder_dir = flight_recorder_dir
+        self._traces = TraceCapture(trace_dir) if trace_dir else None
+        self.link_ping_interval = link_ping_interval
+        self.link_max_rtt_ms = link_max_rtt_ms
+        self.link_max_missed = link_max_missed
+        self.effects_dir = effects_dir
+        self.effect_voices = effect_voices
+        self.audio_buffer = audio_buffer
+        self._effects = None
+        self._register_handlers()
+        self._register_metrics()
 
     async def handle_connection(self, websocket):
         """
         Gestisce una nuova connessione WebSocket.
 
+        Il primo client connesso diventa il pilota e riceve i controller hardware; i client
+        successivi entrano come spettatori in sola lettura e ricevono video e telemetria del
+        pilota tramite broadcast. Il ruolo assegnato viene comunicato subito al client.
+        Se i controller hardware sono ancora in caricamento, il futuro pilota attende la fine
+        del caricamento prima di ricevere il ruolo.
+
+        Un pilota che si ricollega con il token di ripresa nell'URL (`?resume=<token>`) riprende
+        la propria sessione, con controller e stato già inizializzati.
+
         Args:
-            websocket (websockets.WebSocketServerProtocol): L'oggetto WebSocket per la connessione.
+            websocket (websockets.ServerConnection): L'oggetto WebSocket per la connessione.
         """
         logging.info("Nuovo client connesso!")
         self.clients.add(websocket)
 
-        client_max_hz = ServerUtils.get_monitor_refresh_rate()
+        session = await self._resume_session(websocket)
+        resumed = session is not None
+        if not resumed:
+            # Tutti i messaggi in uscita passano dallo scheduler a priorità della connessione
+            sender = SendScheduler(websocket)
+            sender.start()
+            session = Session(websocket=websocket, sender=sender)
+
+            if self._driver is None:
+                await self._subsystems.wait()
 
-        # Creating instance of CameraUtils 
-        camera_controller = CameraUtils(websocket=websocket, monitor_max_hz=client_max_hz)
-        motor_controller = MotorUtils(websocket=websocket)
-        audio_controller = AudioUtils()
+            if self._driver is None:
+                self._attach_driver(session)
+            else:
+                self._attach_spectator(session)
 
+        trace = self._open_trace(session, resumed)
+        link = self._start_link_monitor(session)
         try:
+            await session.sender.send(encode(self._role_message(session, resumed)))
+
             async for message in websocket:
-                await self.handle_message( message=message, 
-                                           camera_controller=camera_controller, 
-                                           motor_controller=motor_controller, 
-                                           audio_controller=audio_controller,
-                                           websocket=websocket
-                                        )
+                await self.handle_message(message=message, session=session)
         except websockets.exceptions.ConnectionClosed:
             logging.info("Client disconnesso")
         finally:
-            self.clients.remove(websocket)
+            self.clients.discard(websocket)
+            if trace is not None:
+                trace.close()
+                if session.trace is trace:
+                    session.trace = None
+            if link is not None:
+                await link.stop()
+                if session.link is link:
+                    session.link = None
+            await self._detach_session(session, websocket)
 
-    async def handle_message(self, message: dict, camera_controller: CameraUtils, motor_controller: MotorUtils, audio_controller: AudioUtils, websocket) -> None:
+    def _open_trace(self, session: Session, resumed: bool):
         """
-        Gestisce un messaggio ricevuto da un client.
+        Avvia la cattura dei messaggi della connessione, se attiva.
+        Se la sessione viene ripresa, la cattura della connessione precedente viene chiusa.
 
-        Questo metodo analizza il messaggio JSON ricevuto dal client e lo instrada verso
-        le funzionalità appropriate in base al tipo di messaggio. Supporta operazioni
-        relative alla telecamera, ai motori e all'audio.
+        Args:
+            session (Session): La sessione della connessione.
+            resumed (bool): True se la connessione ha ripreso una sessione esistente.
+
+        Returns:
+            ConnectionTrace | None: La cattura della connessione, oppure None se non attiva.
+        """
+        if self._traces is None:
+            return None
+        if session.trace is not None:
+            session.trace.close()
+        session.trace = self._traces.open(session.role.value, resumed)
+        return session.trace
+
+    def _start_link_monitor(self, session: Session) -> LinkMonitor | None:
+        """
+        Avvia il monitor del collegamento della connessione, se attivo.
 
         Args:
-            message (str): Il messaggio ricevuto, tipicamente in formato JSON.
-            camera_controller (CameraUtils): Istanza del controller della telecamera,
-                utilizzata per gestire operazioni relative alla videocamera e alle impostazioni visive.
-            motor_controller (MotorUtils): Istanza del controller dei motori,
-                utilizzata per gestire il movimento e le impostazioni del veicolo LEGO.
-            audio_controller (AudioUtils): Istanza del controller audio,
-                utilizzata per gestire la riproduzione e le impostazioni dei file audio.
-            websocket (websockets.WebSocketServerProtocol): L'istanza WebSocket associata
-                al client che ha inviato il messaggio.
+            session (Session): La sessione della connessione.
 
-        Raises:
-            json.JSONDecodeError: Se il messaggio ricevuto non è un JSON valido.
-            KeyError: Se il messaggio JSON non contiene chiavi obbligatorie (es. "type").
-            ValueError: Se i valori forniti nel messaggio non sono validi (es. valori numerici fuori range).
-            TypeError: Se il tipo di dati fornito non corrisponde a quello atteso.
-            FileNotFoundError: Se si verifica un errore durante l'accesso a file richiesti (es. audio).
-            PermissionError: Se si verificano problemi di permessi durante l'accesso a risorse o file.
-            websockets.exceptions.ConnectionClosed: Se la connessione WebSocket viene chiusa durante l'elaborazione.
-            asyncio.CancelledError: Se un task asincrono viene annullato durante l'esecuzione.
-            OSError: Per errori generici relativi al sistema operativo (es. accesso a risorse hardware).
+        Returns:
+            LinkMonitor | None: Il monitor della connessione, oppure None se disattivato.
+        """
+        if not self.link_ping_interval:
+            return None
+
+        link = LinkMonitor(
+            session.websocket,
+            on_change=lambda degraded, reason: self._on_link_change(session, link, degraded, reason),
+            role=session.role.value,
+            interval=self.link_ping_interval,
+            max_rtt_ms=self.link_max_rtt_ms,
+            max_missed=self.link_max_missed
+        )
+        session.link = link
+        link.start()
+        return link
+
+    def _on_link_change(self, session: Session, link: LinkMonitor, degraded: bool, reason: str | None) -> None:
+        """
+        Politica "uomo morto": se il collegamento del pilota si degrada, il veicolo viene fermato e i
+        comandi di movimento vengono ignorati finché il collegamento non torna normale.
+        Il client viene informato dalla telemetria di stato (`linkDegraded`).
+
+        Args:
+            session (Session): La sessione della connessione monitorata.
+            link (LinkMonitor): Il monitor che ha rilevato il cambio di stato.
+            degraded (bool): True se il collegamento è degradato.
+            reason (str | None): Motivo del degrado.
+        """
+        if session.link is not link or not session.is_driver:
+            return
+
+        if degraded:
+            logging.warning(f"Collegamento del pilota degradato ({reason}): arresto di sicurezza del veicolo.")
+            self._make_vehicle_safe(session)
+        else:
+            logging.info("Collegamento del pilota ripristinato: i comandi di movimento sono di nuovo accettati.")
+
+    def _create_controllers(self, session: Session) -> tuple:
+        """
+        Crea i controller hardware per la sessione del pilota.
+        Richiede che i moduli dei controller siano già stati caricati (`self._subsystems.wait()`).
+
+        Args:
+            session (Session): La sessione che diventa pilota.
+
+        Returns:
+            tuple: (CameraUtils, MotorUtils, AudioUtils)
+        """
+        client_max_hz = self._host_refresh_rate or StreamSettings.DEFAULT_FPS.value
+
+        CameraUtils = self._subsystems.get(CAMERA_MODULE, "CameraUtils")
+        MotorUtils = self._subsystems.get(MOTOR_MODULE, "MotorUtils")
+        AudioUtils = self._subsystems.get(AUDIO_MODULE, "AudioUtils")
+
+        camera_controller = CameraUtils(websocket=session.sender, monitor_max_hz=client_max_hz)
+        backend = create_motor_backend(self.motor_backend)
+
+        recorder = FlightRecorder(self.flight_recorder_dir) if self.flight_recorder_dir else None
+        motor_controller = MotorUtils(websocket=session.sender, tick_hz=self.motor_tick_hz, backend=backend, recorder=recorder)
+        self._subsystems.get(AUDIO_MODULE, "init_mixer")(self.audio_buffer)
+        audio_controller = AudioUtils(sound_cache=self._sound_cache)
+        return camera_controller, motor_controller, audio_controller
+
+    def _attach_driver(self, session: Session) -> None:
+        """
+        Assegna alla sessione il ruolo di pilota: crea i controller, avvia la telemetria di stato
+        e replica video e telemetria verso gli spettatori.
+
+        Args:
+            session (Session): La sessione da promuovere a pilota.
+        """
+        camera_controller, motor_controller, audio_controller = self._create_controllers(session)
+        sender = session.sender
+
+        # Il client può aver dichiarato le proprie capacità quando era ancora spettatore
+        if session.hello is not None:
+            camera_controller.configure_stream(negotiate(session.hello, camera_controller.camera_size, self._host_refresh_rate))
+
+        # Stato del veicolo pubblicato a frequenza fissa, inviando solo i campi cambiati
+        publisher = StatePublisher(
+            sender=sender,
+            providers=[
+                motor_controller.get_telemetry,
+                audio_controller.get_telemetry,
+                camera_controller.get_telemetry,
+                lambda: {"framesDropped": sender.get_stats()["dropped"]["media"]},
+                lambda: {"commandsSuppressed": session.intents.suppressed},
+                lambda: session.link.get_telemetry() if session.link else {}
+            ],
+            tick_hz=self.telemetry_hz
+        )
+        publisher.start()
+        motor_controller.start_control_loop()
+
+        session.attach_controllers(camera_controller, motor_controller, audio_controller, publisher)
+        session.resume_token = secrets.token_urlsafe(ResumeSettings.TOKEN_BYTES.value)
+        sender.mirror = self._spectators.publish
+        self._spectators.remove(session.websocket)
+        self._driver = session
+        if session.link is not None:
+            session.link.role = session.role.value
+        logging.info("Client registrato come pilota.")
+
+    def _role_message(self, session: Session, resumed: bool = False) -> dict:
+        """
+        Costruisce il messaggio con il ruolo assegnato; il pilota riceve anche il token di ripresa.
+
+        Args:
+            session (Session): La sessione del client.
+            resumed (bool, opzionale): True se la sessione è stata appena ripresa (default: False).
+
+        Returns:
+            dict: {"ok", "role"} più "resumeToken" e "resumed" per il pilota.
+        """
+        message = {"ok": True, "role": session.role.value}
+        if session.is_driver and self.resume_grace > 0:
+            message["resumeToken"] = session.resume_token
+            message["resumed"] = resumed
+        return message
+
+    async def _resume_session(self, websocket) -> Session | None:
+        """
+        Riprende la sessione del pilota se la connessione presenta il token di ripresa corretto.
+
+        La nuova connessione sostituisce quella precedente, anche se questa risulta ancora aperta
+        (ad esempio quando il client si accorge della caduta della rete prima del server). Il client
+        riceve subito lo stato completo del veicolo e, se lo streaming era attivo, i frame riprendono
+        senza riaprire la videocamera.
+
+        Args:
+            websocket (websockets.ServerConnection): La nuova connessione.
+
+        Returns:
+            Session | None: La sessione ripresa, oppure None se il token manca o non è valido.
+        """
+        query = parse_qs(urlsplit(websocket.request.path).query)
+        token = query.get(ResumeSettings.QUERY_PARAMETER.value, [None])[0]
+        session = self._driver
+        if not token or self.resume_grace <= 0 or session is None or session.resume_token is None:
+            return None
+        if not secrets.compare_digest(token, session.resume_token):
+            logging.warning("Token di ripresa non valido: il client entra come nuova sessione.")
+            return None
+
+        previous = session.websocket
+        if session.sender.attached:
+            await session.sender.detach()
+            asyncio.create_task(previous.close())
+
+        session.rebind(websocket)
+        session.intents.reset()
+        if session.publisher:
+            session.publisher.reset()
+
+        logging.info("Sessione del pilota ripresa con il token di ripresa.")
+        return session
+
+    def _attach_spectator(self, session: Session) -> None:
+        """
+        Registra la sessione come spettatore e le invia lo stato completo del veicolo,
+        dato che la telemetria diffusa contiene solo le variazioni.
+
+        Args:
+            session (Session): La sessione dello spettatore.
+        """
+        self._spectators.add(session.websocket, binary=session.hello is not None and session.hello.transport == "binary")
+
+        if self._driver and self._driver.publisher:
+            session.sender.enqueue(
+                encode({"ok": True, "state": self._driver.publisher.snapshot()}),
+                SendPriority.TELEMETRY
+            )
+        logging.info(f"Client registrato come spettatore ({len(self._spectators)} spettatori).")
+
+    async def _detach_session(self, session: Session, websocket) -> None:
+        """
+        Rimuove la sessione alla disconnessione del client e ne rilascia le risorse.
+        La sessione del pilota, se la ripresa è abilitata, viene invece parcheggiata.
+
+        Args:
+            session (Session): La sessione da chiudere.
+            websocket (websockets.ServerConnection): La connessione che si è chiusa.
+        """
+        if session.websocket is not websocket:
+            return  # La sessione è già stata ripresa da una nuova connessione
+
+        self._spectators.remove(session.websocket)
+        if self._driver is session:
+            if self.resume_grace > 0:
+                await self._park_driver(session)
+                return
+            self._make_vehicle_safe(session)
+            self._driver = None
+            logging.info("Il pilota si è disconnesso: il controllo del veicolo è libero.")
+
+        await session.close()
+
+    def _make_vehicle_safe(self, session: Session) -> None:
+        """
+        Ferma il veicolo del pilota: frenata controllata, sterzo al centro e intenzioni di guida
+        azzerate. Unico punto usato da tutti i percorsi in cui il pilota perde il controllo
+        (disconnessione con o senza ripresa, collegamento degradato).
+
+        Args:
+            session (Session): La sessione del pilota.
+        """
+        session.intents.reset()
+        if session.motor_controller:
+            session.motor_controller.safety_stop()
+
+    async def _park_driver(self, session: Session) -> None:
+        """
+        Ferma il veicolo e mantiene la sessione del pilota disconnesso per `resume_grace` secondi,
+        in attesa che il client la riprenda. Nel frattempo il posto di pilota resta occupato.
+
+        Args:
+            session (Session): La sessione del pilota disconnesso.
+        """
+        # Per sicurezza il veicolo non continua a muoversi senza un pilota collegato
+        self._make_vehicle_safe(session)
+
+        await session.sender.detach()
+        session.expiry = asyncio.get_running_loop().call_later(
+            self.resume_grace, lambda: asyncio.create_task(self._expire_parked_driver(session))
+        )
+        logging.info(f"Il pilota si è disconnesso: sessione riprendibile per {self.resume_grace:g} s.")
+
+    async def _expire_parked_driver(self, session: Session) -> None:
+        """
+        Chiude la sessione parcheggiata del pilota che non si è ricollegato in tempo.
+
+        Args:
+            session (Session): La sessione scaduta.
+        """
+        session.expiry = None
+        if self._driver is session and session.parked:
+            self._driver = None
+            logging.info("Sessione del pilota scaduta: il controllo del veicolo è libero.")
+            await session.close()
+
+    def _register_handlers(self) -> None:
+        """
+        Popola la tabella di instradamento con gli handler di tutti i tipi di messaggio supportati.
 
         Returns:
             None.
         """
+        routes = (
+            # SESSION
+            ("hello", self._on_hello, HelloPayload),
+            ("claim-driver", self._on_claim_driver, EmptyPayload),
+            ("get-stats", self._on_get_stats, EmptyPayload),
+            # CAMERA
+            ("start-video-streaming", self._on_start_video_streaming, EmptyPayload),
+            ("toggle-night-mode", self._on_toggle_night_mode, NightModePayload),
+            ("set-zoom", self._on_set_zoom, ZoomPayload),
+            ("start-recording", self._on_start_recording, EmptyPayload),
+            ("stop-recording", self._on_stop_recording, EmptyPayload),
+            ("take-picture", self._on_take_picture, EmptyPayload),
+            # MOVEMENT
+            ("toggle-motor-status", self._on_toggle_motor_status, EmptyPayload),
+            ("switch-gear", self._on_switch_gear, GearPayload),
+            ("set-turbo", self._on_set_turbo, TurboPayload),
+            ("set-brake-intensity", self._on_set_brake_intensity, BrakePayload),
+            ("move-forward", self._on_move_forward, EmptyPayload),
+            ("move-backward", self._on_move_backward, EmptyPayload),
+            ("stop-moving", self._on_stop_moving, EmptyPayload),
+            ("turn-left", self._on_turn_left, EmptyPayload),
+            ("turn-right", self._on_turn_right, EmptyPayload),
+            ("unturn", self._on_unturn, EmptyPayload),
+            # AUDIO
+            ("new-audio", self._on_new_audio, AudioUploadPayload),
+            ("audio-upload-begin", self._on_audio_upload_begin, UploadBeginPayload),
+            ("audio-upload-commit", self._on_audio_upload_commit, UploadCommitPayload),
+            ("pause-audio", self._on_pause_audio, EmptyPayload),
+            ("resume-audio", self._on_resume_audio, EmptyPayload),
+            ("restart-audio", self._on_restart_audio, EmptyPayload),
+            ("set-sound-volume", self._on_set_sound_volume, LevelPayload),
+            ("set-sound-pan", self._on_set_sound_pan, LevelPayload),
+            ("toggle-mute", self._on_toggle_mute, EmptyPayload),
+            ("toggle-loop", self._on_toggle_loop, EmptyPayload),
+            ("play-effect", self._on_play_effect, EffectPayload),
+        )
+
+        # Messaggi consentiti anche agli spettatori
+        readonly = {"hello", "claim-driver", "get-stats"}
+
+        for message_type, handler, payload in routes:
+            self._dispatcher.register(message_type, handler, payload, readonly=message_type in readonly)
+
+    def _register_metrics(self) -> None:
+        """
+        Registra le metriche lette dallo stato del server al momento dell'esportazione.
+        """
+        cache = self._sound_cache
+        REGISTRY.register_callback("lego_connected_clients", "Client WebSocket connessi", lambda: len(self.clients))
+        REGISTRY.register_callback("lego_spectators", "Client connessi come spettatori", lambda: len(self._spectators))
+        REGISTRY.register_callback("lego_driver_connected", "1 se un pilota è connesso", lambda: self._driver is not None and not self._driver.parked)
+        REGISTRY.register_callback("lego_audio_cache_hits_total", "Suoni trovati nella cache", lambda: cache.get_stats()["hits"], kind="counter")
+        REGISTRY.register_callback("lego_audio_cache_misses_total", "Suoni da decodificare di nuovo", lambda: cache.get_stats()["misses"], kind="counter")
+        REGISTRY.register_callback("lego_audio_cache_hit_ratio", "Frazione di riproduzioni servite dalla cache", self._audio_cache_hit_ratio)
+        REGISTRY.register_callback("lego_audio_cache_bytes", "Memoria occupata dai suoni decodificati", lambda: cache.get_stats()["bytes"])
+
+    def _audio_cache_hit_ratio(self) -> float:
+        stats = self._sound_cache.get_stats()
+        lookups = stats["hits"] + stats["misses"]
+        return stats["hits"] / lookups if lookups else 0.0
+
+    async def handle_message(self, message: str | bytes, session: Session) -> None:
+        """
+        Gestisce un messaggio ricevuto da un client.
+
+        Il messaggio viene decodificato e instradato dal dispatcher verso l'handler registrato
+        per il suo tipo, che riceve la sessione del client e il payload già validato.
+        Gli spettatori possono inviare solo i messaggi registrati in sola lettura.
+        I messaggi binari sono blocchi del protocollo di caricamento audio.
+        Se la cattura è attiva, il messaggio viene accodato così come ricevuto prima di essere elaborato.
+        Se il messaggio contiene il campo "id", al termine dell'handler il client riceve
+        la conferma `{"ok": true, "ack": id}`.
+        Tutti gli errori vengono registrati nel log senza interrompere la connessione.
+
+        Args:
+            message (str | bytes): Il messaggio ricevuto: JSON (testo) o blocco audio (binario).
+            session (Session): La sessione del client che ha inviato il messaggio.
+
+        Returns:
+            None.
+        """
+        if session.trace is not None:
+            session.trace.record(message)
+
         try:
-            data = json.loads(message)
-            content = data.get("content", {})
-
-            match data.get("type"):
-                case "start-video-streaming":
-                    asyncio.create_task(camera_controller.start_video_streaming())
-
-                # CAMERA
-                case "toggle-night-mode":
-                    if content in [0, 1]:
-                        # Attivazione o disattivazione della modalità notte
-                        asyncio.create_task(camera_controller.toggle_night_mode(value=content))  # Aggiungi await se la funzione è async
-                    else:
-                        logging.warning(f"Valore non valido per la modalità notturna: {content}")
-
-                case "set-zoom":
-                    try:
-                        # Converti il valore in float e limita il range tra 0.5 e 3 usando `min` e `max`
-                        slider_value = max(0.5, min(3.0, float(content)))
-                        # Imposta il valore di zoom
-                        camera_controller.set_zoom_value(slider_value)
-                    except ValueError:
-                        logging.warning(f"Valore non valido per il zoom: {content}")
-
-                case "start-recording":
-                    camera_controller.start_recording()
-
-                case "stop-recording":
-                    asyncio.create_task(camera_controller.stop_recording())
-
-                case "take-picture":
-                    camera_controller.set_photo_request() # scatto una foto se il client lo richiede
-
-                # MOVEMENT
-                case "toggle-motor-status":
-                    # Attivazione o disattivazione del motore
-                    asyncio.create_task(motor_controller.toggle_motor_status())
-
-                case "switch-gear":
-                    # Verifico che il valore della marcia sia valido
-                    try:
-                        if content not in {gear.value for gear in Gear}:
-                            return
-                        # Imposta la marcia
-                        motor_controller.set_gear(content)
-                    except ValueError:
-                        raise
-
-                case "set-turbo":
-                    # Attivazione del livello del turbo
-                    try:
-                        turbo_value = int(content.replace('%', ''))
-                        if not 0 <= turbo_value <= 100:
-                            raise ValueError
-                        motor_controller.set_turbo(value=turbo_value)
-                    except ValueError:
-                        logging.error("Valore non valido per il turbo")
-
-                case "set-brake-intensity":
-                    # Imposta l'intensità del freno
-                    try:
-                        brake_value = int(content.replace('%', ''))
-                        if not 1 <= brake_value <= 100:
-                            raise ValueError
-                        motor_controller.set_brake_value(value=brake_value)
-                    except ValueError:
-                        logging.error("Valore non valido per l'intensità del freno")
-                
-                case "move-forward":
-                    # Esegui il movimento in avanti senza sterzare
-                    if self._movement_task and not self._movement_task.get_name() == "stopper":
-                        self._movement_task.cancel()
-                    
-                    if motor_controller.get_motor_status():
-                        self._movement_task = asyncio.create_task(motor_controller.move_forward())
-
-                case "move-backward":
-                    # Esegui il movimento all'indietro senza sterzare
-                    if self._movement_task and not self._movement_task.get_name() == "stopper":
-                        self._movement_task.cancel()
-                    
-                    if motor_controller.get_motor_status():
-                        self._movement_task = asyncio.create_task(motor_controller.move_backward())
-                
-                case "stop-moving":
-                    # Fermare il movimento
-                    if self._movement_task:
-                        self._movement_task.cancel()
-
-                    if motor_controller.get_motor_status():
-                        self._movement_task = asyncio.create_task(motor_controller.stop())
-                        self._movement_task.set_name("stopper")
-
-                case "turn-left":
-                    # Sterza a sinistra
-                    if self._steering_task and not self._steering_task.get_name() == "steering-reset":
-                        self._steering_task.cancel()
-
-                    if motor_controller.get_motor_status():
-                        self._steering_task = asyncio.create_task(motor_controller.turn(Turn.LEFT))
-
-                case "turn-right":
-                    # Sterza a destra
-                    if self._steering_task and not self._steering_task.get_name() == "steering-reset":
-                        self._steering_task.cancel()
-
-                    if motor_controller.get_motor_status():
-                        self._steering_task = asyncio.create_task(motor_controller.turn(Turn.RIGHT))
-                
-                case "unturn":
-                    # Esegui il movimento a sinistra senza avanzare
-                    if self._steering_task:
-                        self._steering_task.cancel()
-                    
-                    if motor_controller.get_motor_status():
-                        self._steering_task = asyncio.create_task(motor_controller.unturn())
-                        self._steering_task.set_name("steering-reset")
-                
-                # AUDIO
-                case "new-audio":
-                    # Percorso cartella temporanea
-                    temp_dir = "../user/audio/temp/"
-                    os.makedirs(temp_dir, exist_ok=True)
-
-                    # Nome e percorso file
-                    file_name = data.get("name", "audio_temp.wav")[:100]  # Nome massimo 100 char per sicurezza
-                    file_path = os.path.join(temp_dir, file_name)
-
-                    # Decodifica e salvataggio file
-                    with open(file_path, "wb") as f:
-                        f.write(base64.b64decode(content))
-
-                    # Calcolo durata audio
-                    try:
-                        audio = File(file_path, easy=True)
-                        total_seconds = round(audio.info.length)
-                        duration = f"{total_seconds // 60}:{str(total_seconds % 60).zfill(2)}"
-                    except Exception:
-                        duration = "0:00"
-
-                    # Invio dati al client
-                    await websocket.send(json.dumps({
-                        "ok": True,
-                        "audioDuration": duration,
-                        "audioName": file_name[:25]
-                    }))
-
-                    # Caricamento e riproduzione audio
-                    audio_controller.load_sound(name=file_name, file_path=file_path)
-                    
-                    self._temp_sound = file_name
-
-                    asyncio.create_task(
-                        audio_controller.play_sound(
-                            name=file_name,
-                            channel=AudioSettings.CLIENT_CHANNEL.value,
-                            websocket=websocket
-                        )
-                    )
-
-                case "pause-audio":  
-                    # ferma l'audio in esecuzione
-                    if self._temp_sound:
-                        audio_controller.pause_sound(channel=AudioSettings.CLIENT_CHANNEL.value)
-                        print("canale messo in pausa")
-                
-                case "resume-audio":
-                    # riprende l'audio in pausa
-                    if self._temp_sound:
-                        audio_controller.resume_sound(channel=AudioSettings.CLIENT_CHANNEL.value)
-                
-                case "restart-audio":
-                    # ricomincia l'audio in esecuzione
-                    if self._temp_sound:
-                        audio_controller.restart_sound(name=self._temp_sound)
-
-                case "set-sound-volume":
-                    # Setta il volume del suono
-                    if self._temp_sound:
-                        audio_controller.set_volume(channel=AudioSettings.CLIENT_CHANNEL.value, new_volume=content)
-
-                case "set-sound-pan":
-                    # Setta il panning del suono
-                    if self._temp_sound:
-                        audio_controller.set_pan(channel=AudioSettings.CLIENT_CHANNEL.value, pan_value=content)
-                
-                case "toggle-mute":
-                    # muto l'audio in esecuzione
-                    if self._temp_sound:
-                        audio_controller.toggle_mute(AudioSettings.CLIENT_CHANNEL.value)
-                
-                case "toggle-loop":
-                    # imposto il loop per l'audio in esecuzione
-                    if self._temp_sound:
-                        audio_controller.toggle_loop(self._temp_sound)             
-        
-        except json.JSONDecodeError:
+            if isinstance(message, bytes):
+                await self._handle_upload_chunk(message, session)
+            else:
+                data = await self._dispatcher.dispatch(message, session, allow_control=session.is_driver)
+
+                # Conferma di esecuzione per i messaggi che indicano un identificativo
+                if data is not None and "id" in data:
+                    await session.sender.send(encode({"ok": True, "ack": data["id"]}))
+
+        except DecodeError:
             logging.error("Errore: Messaggio non è un JSON valido")
 
         except TypeError as e:
@@ -374,7 +673,348 @@ class Server:
         
         except Exception as e:
             logging.error(f"Errore: Si è verificato un errore imprevisto. Dettagli: {e}")
-            
+
+    # SESSION
+    async def _on_hello(self, session: Session, payload: HelloPayload) -> None:
+        # Il client dichiara frequenza di aggiornamento, finestra, formati video e trasporto preferito
+        session.hello = payload
+
+        if session.is_driver:
+            camera_controller = session.camera_controller
+            stream = negotiate(payload, camera_controller.camera_size, self._host_refresh_rate)
+            camera_controller.configure_stream(stream)
+            response = stream.as_dict()
+        else:
+            # Gli spettatori ricevono i frame del pilota: per loro si negozia solo il trasporto
+            self._spectators.set_binary(session.websocket, payload.transport == "binary")
+            response = {"transport": payload.transport}
+
+        await session.sender.send(encode({"ok": True, "stream": response}))
+
+    async def _on_claim_driver(self, session: Session, payload: EmptyPayload) -> None:
+        # Uno spettatore chiede il controllo del veicolo, concesso solo se il posto è libero
+        if not session.is_driver and self._driver is None:
+            await self._subsystems.wait()
+            if self._driver is None:
+                self._attach_driver(session)
+
+        await session.sender.send(encode(self._role_message(session)))
+
+    async def _on_get_stats(self, session: Session, payload: EmptyPayload) -> None:
+        # Metriche di esecuzione e statistiche degli handler, disponibili anche agli spettatori
+        await session.sender.send(encode({
+            "ok": True,
+            "stats": {
+                "metrics": REGISTRY.snapshot(),
+                "dispatcher": self._dispatcher.get_stats(),
+                "sender": session.sender.get_stats(),
+                "intents": session.intents.get_stats(),
+                "link": session.link.get_stats() if session.link else None,
+                "driverLink": self._driver.link.get_stats() if self._driver and self._driver.link else None,
+                "loop": self._loop_monitor.get_stats() if self._loop_monitor else None,
+                "motor": self._driver.motor_controller.get_stats() if self._driver else None,
+                "effects": self._effects.get_stats() if self._effects else None,
+                "subsystems": self._subsystems.get_stats()
+            }
+        }))
+
+    # CAMERA
+    def _on_start_video_streaming(self, session: Session, payload: EmptyPayload) -> None:
+        # Dopo una ripresa di sessione lo streaming può essere già attivo
+        if not session.camera_controller.is_streaming:
+            asyncio.create_task(session.camera_controller.start_video_streaming())
+
+    async def _on_toggle_night_mode(self, session: Session, payload: NightModePayload) -> None:
+        # Attivazione o disattivazione della modalità notte
+        await session.camera_controller.toggle_night_mode(value=payload.value)
+
+    def _on_set_zoom(self, session: Session, payload: ZoomPayload) -> None:
+        session.camera_controller.set_zoom_value(payload.value)
+
+    def _on_start_recording(self, session: Session, payload: EmptyPayload) -> None:
+        session.camera_controller.start_recording()
+
+    def _on_stop_recording(self, session: Session, payload: EmptyPayload) -> None:
+        asyncio.create_task(session.camera_controller.stop_recording())
+
+    def _on_take_picture(self, session: Session, payload: EmptyPayload) -> None:
+        session.camera_controller.set_photo_request() # scatto una foto se il client lo richiede
+
+    # MOVEMENT
+    def _on_toggle_motor_status(self, session: Session, payload: EmptyPayload) -> None:
+        # Attivazione o disattivazione del motore: le intenzioni di guida precedenti non sono più valide
+        session.intents.reset()
+        asyncio.create_task(session.motor_controller.toggle_motor_status())
+
+    def _on_switch_gear(self, session: Session, payload: GearPayload) -> None:
+        session.motor_controller.set_gear(payload.gear)
+
+    def _on_set_turbo(self, session: Session, payload: TurboPayload) -> None:
+        session.motor_controller.set_turbo(value=payload.value)
+
+    def _on_set_brake_intensity(self, session: Session, payload: BrakePayload) -> None:
+        session.motor_controller.set_brake_value(value=payload.value)
+
+    def _on_move_forward(self, session: Session, payload: EmptyPayload) -> None:
+        # Esegui il movimento in avanti senza sterzare
+        self._start_movement(session, Direction.FORWARD)
+
+    def _on_move_backward(self, session: Session, payload: EmptyPayload) -> None:
+        # Esegui il movimento all'indietro senza sterzare
+        self._start_movement(session, Direction.BACKWARD)
+
+    def _start_movement(self, session: Session, direction: Direction) -> None:
+        # Con il collegamento degradato il veicolo resta fermo (arresto di sicurezza)
+        if session.link is not None and session.link.degraded:
+            return
+
+        # L'obiettivo cambia solo se cambiano direzione, marcia o turbo: le ripetizioni del tasto vengono scartate
+        motor = session.motor_controller
+        intent = (direction.name.lower(), motor.get_gear(), motor.get_turbo())
+        if session.intents.is_redundant("movement", intent):
+            return
+
+        if motor.get_motor_status():
+            if direction == Direction.FORWARD:
+                motor.move_forward()
+            else:
+                motor.move_backward()
+            session.intents.set("movement", intent)
+
+    def _on_stop_moving(self, session: Session, payload: EmptyPayload) -> None:
+        # Fermare il movimento, anche a motore spento: la frenata è sempre consentita
+        if session.intents.is_redundant("movement", ("stop",)):
+            return
+
+        session.motor_controller.stop()
+        session.intents.set("movement", ("stop",))
+
+    def _on_turn_left(self, session: Session, payload: EmptyPayload) -> None:
+        self._start_steering(session, Turn.LEFT)
+
+    def _on_turn_right(self, session: Session, payload: EmptyPayload) -> None:
+        self._start_steering(session, Turn.RIGHT)
+
+    def _start_steering(self, session: Session, side: Turn) -> None:
+        # Con il collegamento degradato lo sterzo resta al centro (arresto di sicurezza)
+        if session.link is not None and session.link.degraded:
+            return
+
+        # Sterza a sinistra o a destra
+        intent = ("turn", side.name.lower())
+        if session.intents.is_redundant("steering", intent):
+            return
+
+        if session.motor_controller.get_motor_status():
+            session.motor_controller.turn(side)
+            session.intents.set("steering", intent)
+
+    def _on_unturn(self, session: Session, payload: EmptyPayload) -> None:
+        # Riporta lo sterzo al centro. Accettato anche a motore spento e con il collegamento
+        # degradato: è la stessa manovra dell'arresto di sicurezza
+        if session.intents.is_redundant("steering", ("unturn",)):
+            return
+
+        session.motor_controller.unturn()
+        session.intents.set("steering", ("unturn",))
+
+    # AUDIO
+    async def _on_new_audio(self, session: Session, payload: AudioUploadPayload) -> None:
+        # Caricamento in un solo messaggio base64, limitato da `max_size`: i file grandi usano il protocollo a blocchi
+        file_name = payload.name
+
+        # Decodifica e salvataggio nell'archivio fuori dall'event loop
+        file_path, digest = await asyncio.to_thread(self._save_audio_file, file_name, payload.data)
+        await self._register_audio(session, file_name, file_path, digest)
+
+    def _save_audio_file(self, file_name: str, data: str) -> tuple:
+        return self._audio_store.put_bytes(base64.b64decode(data), file_name)
+
+    async def _on_audio_upload_begin(self, session: Session, payload: UploadBeginPayload) -> None:
+        # Avvio o ripresa di un caricamento a blocchi: il client riceve l'offset da cui inviare
+        try:
+            state = await self._uploads.begin(payload.name, payload.size, payload.upload_id)
+        except UploadError as e:
+            await session.sender.send(encode({"ok": False, "uploadError": str(e)}))
+            raise
+
+        await session.sender.send(encode({
+            "ok": True,
+            "uploadId": state.upload_id,
+            "uploadOffset": state.offset,
+            "chunkSize": UploadSettings.CHUNK_SIZE.value
+        }))
+
+    async def _on_audio_upload_commit(self, session: Session, payload: UploadCommitPayload) -> None:
+        # Verifica e conclusione del caricamento, poi riproduzione come per "new-audio"
+        try:
+            file_name, file_path, digest = await self._uploads.commit(payload.upload_id, payload.sha256)
+        except UploadError as e:
+            await session.sender.send(encode({"ok": False, "uploadId": payload.upload_id, "uploadError": str(e)}))
+            raise
+
+        await self._register_audio(session, file_name, file_path, digest)
+
+    async def _handle_upload_chunk(self, message: bytes, session: Session) -> None:
+        """
+        Gestisce un blocco binario del protocollo di caricamento audio.
+
+        Dopo la scrittura il client riceve il nuovo offset; in caso di offset errato riceve
+        l'offset atteso, così da poter riallineare l'invio.
+
+        Args:
+            message (bytes): Il frame binario ricevuto.
+            session (Session): La sessione del client.
+        """
+        if not session.is_driver:
+            logging.warning("Blocco audio ignorato: il client non ha diritti di controllo")
+            return
+
+        upload_id, offset, data = self._uploads.parse_chunk(message)
+        try:
+            state = await self._uploads.write_chunk(upload_id, offset, data)
+        except UploadError as e:
+            reply = {"ok": False, "uploadId": upload_id, "uploadError": str(e)}
+            try:
+                reply["uploadOffset"] = self._uploads.get(upload_id).offset
+            except UploadError:
+                pass
+            await session.sender.send(encode(reply))
+            raise
+
+        await session.sender.send(encode({"ok": True, "uploadId": upload_id, "uploadOffset": state.offset}))
+
+    async def _register_audio(self, session: Session, file_name: str, file_path: str, digest: str) -> None:
+        """
+        Conferma subito al client la ricezione di un file audio e ne avvia la preparazione in background.
+
+        Args:
+            session (Session): La sessione del client.
+            file_name (str): Nome del file audio.
+            file_path (str): Percorso del file audio nell'archivio.
+            digest (str): Hash SHA-256 del contenuto, usato come chiave nelle cache.
+        """
+        await session.sender.send(encode({"ok": True, "audioAccepted": file_name[:25]}))
+
+        if session.audio_task and not session.audio_task.done():
+            session.audio_task.cancel()
+
+        session.audio_task = asyncio.create_task(self._prepare_audio(session, file_name, file_path, digest))
+
+    async def _prepare_audio(self, session: Session, file_name: str, file_path: str, digest: str) -> None:
+        """
+        Legge i metadati e decodifica il file audio fuori dall'event loop, poi comunica al client
+        durata e disponibilità e avvia la riproduzione. I brani lunghi non vengono decodificati ma
+        riprodotti in streaming. Se il contenuto è già noto le cache rendono entrambe le operazioni
+        immediate.
+
+        Args:
+            session (Session): La sessione del client.
+            file_name (str): Nome del file audio.
+            file_path (str): Percorso del file audio nell'archivio.
+            digest (str): Hash SHA-256 del contenuto.
+        """
+        try:
+            # La durata decide se il brano va decodificato in memoria o riprodotto in streaming
+            metadata = await self._audio_probe.probe(file_path, digest)
+            ready = await session.audio_controller.prepare_sound(
+                name=file_name, file_path=file_path, key=digest, duration=metadata.duration
+            )
+
+            # Invio dati al client
+            await session.sender.send(encode({
+                "ok": True,
+                "audioDuration": metadata.format_duration(),
+                "audioName": file_name[:25],
+                "audioSampleRate": metadata.sample_rate,
+                "audioChannels": metadata.channels,
+                "audioReady": ready
+            }))
+
+            if not ready:
+                return
+
+            session.temp_sound = file_name
+
+            await session.audio_controller.play_sound(
+                name=file_name,
+                channel=AudioSettings.CLIENT_CHANNEL.value
+            )
+        except asyncio.CancelledError:
+            raise
+        except (websockets.exceptions.ConnectionClosed, ConnectionError) as e:
+            logging.info(f"Preparazione audio interrotta: {e}")
+        except Exception as e:
+            logging.error(f"Errore durante la preparazione del file audio '{file_name}': {e}")
+
+    def _on_pause_audio(self, session: Session, payload: EmptyPayload) -> None:
+        # ferma l'audio in esecuzione
+        if session.temp_sound:
+            session.audio_controller.pause_sound(channel=AudioSettings.CLIENT_CHANNEL.value)
+
+    def _on_resume_audio(self, session: Session, payload: EmptyPayload) -> None:
+        # riprende l'audio in pausa
+        if session.temp_sound:
+            session.audio_controller.resume_sound(channel=AudioSettings.CLIENT_CHANNEL.value)
+
+    def _on_restart_audio(self, session: Session, payload: EmptyPayload) -> None:
+        # ricomincia l'audio in esecuzione
+        if session.temp_sound:
+            session.audio_controller.restart_sound(name=session.temp_sound)
+
+    def _on_set_sound_volume(self, session: Session, payload: LevelPayload) -> None:
+        # Setta il volume del suono
+        if session.temp_sound:
+            session.audio_controller.set_volume(channel=AudioSettings.CLIENT_CHANNEL.value, new_volume=payload.value)
+
+    async def _on_set_sound_pan(self, session: Session, payload: LevelPayload) -> None:
+        # Setta il panning del suono; il client viene avvisato se il brano non lo supporta (streaming)
+        if session.temp_sound:
+            if not session.audio_controller.set_pan(channel=AudioSettings.CLIENT_CHANNEL.value, pan_value=payload.value):
+                await session.sender.send(encode({"ok": False, "audioError": "Bilanciamento stereo non disponibile per i brani riprodotti in streaming"}))
+
+    def _on_toggle_mute(self, session: Session, payload: EmptyPayload) -> None:
+        # muto l'audio in esecuzione
+        if session.temp_sound:
+            session.audio_controller.toggle_mute(AudioSettings.CLIENT_CHANNEL.value)
+
+    def _on_toggle_loop(self, session: Session, payload: EmptyPayload) -> None:
+        # imposto il loop per l'audio in esecuzione
+        if session.temp_sound:
+            session.audio_controller.toggle_loop(session.temp_sound)
+
+    async def _on_play_effect(self, session: Session, payload: EffectPayload) -> None:
+        # Effetto sonoro del banco precaricato: nessuna risposta se l'effetto parte
+        if self._effects is None or not self._effects.play(payload.effect):
+            await session.sender.send(encode({"ok": False, "effect": payload.effect, "effectError": "Effetto sonoro non disponibile"}))
+
+    async def _load_effects(self) -> None:
+        """
+        Carica il banco degli effetti sonori dopo i moduli audio, fuori dall'event loop: il mixer
+        viene inizializzato con il buffer configurato e le clip restano decodificate in memoria.
+        """
+        try:
+            await self._subsystems.wait()
+            EffectBank = self._subsystems.get(EFFECTS_MODULE, "EffectBank")
+            bank = EffectBank(self.effects_dir, voices=self.effect_voices, buffer=self.audio_buffer)
+            await bank.preload()
+        except Exception as e:
+            logging.error(f"Banco degli effetti sonori non disponibile: {e}")
+            return
+        self._effects = bank
+
+    async def _probe_host(self) -> None:
+        """
+        Rileva una sola volta, fuori dall'event loop, la frequenza del monitor dell'host: è solo
+        un valore di riserva per i client che non dichiarano la propria con "hello".
+        """
+        try:
+            self._host_refresh_rate = await asyncio.to_thread(ServerUtils.get_monitor_refresh_rate)
+        except Exception as e:
+            logging.warning(f"Frequenza del monitor dell'host non rilevata: {e}")
+            return
+        logging.info(f"Frequenza del monitor dell'host: {self._host_refresh_rate} Hz.")
+
     async def start_server(self) -> None:
         """
         Avvia il server WebSocket e attende la chiusura.
@@ -388,7 +1028,11 @@ class Server:
         - `self.host`: Indirizzo su cui il server è in ascolto.
         - `self.port`: Porta su cui il server accetta le connessioni.
         - `ssl_context`: Contesto SSL utilizzato per abilitare connessioni sicure (WSS).
-        - `max_size=None`: Dimensione massima consentita per i messaggi WebSocket (nessun limite).
+        - `max_size`: Dimensione massima di un singolo messaggio WebSocket (1 MiB); i file audio
+          più grandi vengono caricati a blocchi.
+
+        Subito dopo l'apertura della porta vengono caricati in background i moduli dei controller
+        hardware, così che il listener accetti connessioni il prima possibile.
 
         Il metodo rimane in attesa fino alla chiusura del server, garantendo che il server continui
         a funzionare anche dopo aver avviato le connessioni client.
@@ -397,6 +1041,7 @@ class Server:
         
         Raises:
             OSError: Se si verifica un errore durante l'avvio del server (es. porta già in uso).
+            RuntimeError: Se il backend dei motori richiesto non è disponibile (es. PiStorms non installato).
             ssl.SSLError: Se si verifica un problema con il contesto SSL configurato.
             KeyboardInterrupt: Se l'utente interrompe manualmente l'esecuzione del server.
             Exception: Per eventuali errori imprevisti durante l'avvio o l'esecuzione del server.
@@ -404,12 +1049,25 @@ class Server:
         Returns:
             None.
         """
+        # Un backend dei motori mancante ferma l'avvio: il veicolo non viene mai simulato in silenzio
+        check_motor_backend(self.motor_backend)
+
         server = await websockets.serve(
             self.handle_connection,
             self.host,
             self.port,
             ssl= self.ssl_context,
-            max_size=None
+            max_size=UploadSettings.MAX_MESSAGE_SIZE.value
         )
+        self._subsystems.start()
+        asyncio.create_task(self._probe_host(), name="host-probe")
+        if self.effects_dir:
+            asyncio.create_task(self._load_effects(), name="effect-bank")
+
+        if self._metrics_exporter:
+            await self._metrics_exporter.start()
+
+        if self._loop_monitor:
+            self._loop_monitor.start()
 
         await server.wait_closed()
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Modulo: startup_bench
+
+Descrizione:
+Benchmark dei tempi di avvio del server, eseguito interamente su localhost.
+
+A ogni ripetizione il server viene avviato in un nuovo processo Python, con videocamera sintetica
+(`SyntheticCapture`) e audio pygame sul driver "dummy", e vengono misurati a partire dal lancio
+del processo:
+- time-to-listen: primo handshake WebSocket completato;
+- time-to-driver: ruolo di pilota ricevuto dal primo client (controller hardware pronti);
+- time-to-first-frame: primo frame video ricevuto dopo "start-video-streaming".
+
+Con `--eager` i moduli dei controller vengono importati prima di aprire la porta, come avveniva
+prima del caricamento in background, così da confrontare le due modalità. Con `--uvloop` il
+server usa l'event loop uvloop, se installato.
+
+Esempio di utilizzo (dalla cartella backend):
+    python startup_bench.py --runs 10
+    python startup_bench.py --runs 10 --eager --json eager.json
+
+Dipendenze:
+- asyncio, argparse, json, os, statistics, subprocess, sys, time per l'esecuzione del test (`builtin`).
+- websockets per il client WebSocket (`websockets`).
+
+I moduli del server vengono importati solo nel processo figlio, così che le misure includano
+l'intero costo di avvio.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+import websockets
+from websockets.exceptions import InvalidHandshake
+
+CONNECT_RETRY_SECONDS = 0.005
+METRICS = ("timeToListenMs", "timeToDriverMs", "timeToFirstFrameMs")
+
+
+def _serve(port: int, camera_fps: float, eager: bool, use_uvloop: bool) -> None:
+    """
+    Processo server: avvia `Server` con telecamera sintetica e audio senza dispositivo.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import logging
+    import server
+    from utils.serverutils import ServerUtils
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if eager:
+        for module_name in (server.CAMERA_MODULE, server.MOTOR_MODULE, server.AUDIO_MODULE):
+            __import__(module_name)
+
+    class StubbedServer(server.Server):
+        """
+        Server con videocamera sintetica: i controller vengono creati dai moduli caricati in background.
+        """
+
+        def _create_controllers(self, session):
+            from utils.camera.synthetic_capture import SyntheticCapture
+            from utils.motor.motor_backend import create_motor_backend
+
+            CameraUtils = self._subsystems.get(server.CAMERA_MODULE, "CameraUtils")
+            MotorUtils = self._subsystems.get(server.MOTOR_MODULE, "MotorUtils")
+            AudioUtils = self._subsystems.get(server.AUDIO_MODULE, "AudioUtils")
+
+            capture = SyntheticCapture(fps=camera_fps)
+            camera_controller = CameraUtils(websocket=session.sender, monitor_max_hz=int(camera_fps), capture=capture)
+            motor_controller = MotorUtils(websocket=session.sender, backend=create_motor_backend("simulated"))
+            return camera_controller, motor_controller, AudioUtils(sound_cache=self._sound_cache)
+
+    ServerUtils.configure_event_loop(use_uvloop)
+    asyncio.run(StubbedServer(port, "127.0.0.1", None, loop_stall_ms=None, motor_backend="simulated").start_server())
+
+
+async def measure_once(args) -> dict:
+    """
+    Avvia un processo server e misura i tempi di avvio dal lancio del processo.
+
+    Returns:
+        dict: {"timeToListenMs", "timeToDriverMs", "timeToFirstFrameMs"}
+    """
+    url = f"ws://127.0.0.1:{args.port}"
+    command = [sys.executable, str(Path(__file__).resolve()), "--serve", "--port", str(args.port),
+               "--camera-fps", str(args.camera_fps)]
+    if args.eager:
+        command.append("--eager")
+    if args.uvloop:
+        command.append("--uvloop")
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=Path(__file__).parent, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + args.timeout
+        while True:
+            try:
+                websocket = await websockets.connect(url, max_size=None)
+                break
+            except (OSError, InvalidHandshake):
+                if time.perf_counter() > deadline or process.poll() is not None:
+                    raise TimeoutError(f"Il server non risponde su {url}")
+                await asyncio.sleep(CONNECT_RETRY_SECONDS)
+        listen_ms = (time.perf_counter() - start) * 1000
+
+        async with websocket:
+            # Il primo messaggio utile è il ruolo: prima possono arrivare solo gli snapshot di stato
+            while "role" not in (message := json.loads(await asyncio.wait_for(websocket.recv(), args.timeout))):
+                pass
+            if message["role"] != "driver":
+                raise RuntimeError("Il client di test non è stato registrato come pilota")
+            driver_ms = (time.perf_counter() - start) * 1000
+
+            await websocket.send(json.dumps({"type": "start-video-streaming", "content": ""}))
+            while "frame" not in json.loads(await asyncio.wait_for(websocket.recv(), args.timeout)):
+                pass
+            frame_ms = (time.perf_counter() - start) * 1000
+
+        return {"timeToListenMs": listen_ms, "timeToDriverMs": driver_ms, "timeToFirstFrameMs": frame_ms}
+    finally:
+        process.kill()  # SDL intercetta SIGTERM
+        process.wait()
+
+
+def summarize(runs: list) -> dict:
+    """
+    Calcola mediana, minimo e massimo di ogni misura.
+    """
+    return {
+        metric: {
+            "median": round(statistics.median(run[metric] for run in runs), 1),
+            "min": round(min(run[metric] for run in runs), 1),
+            "max": round(max(run[metric] for run in runs), 1),
+        }
+        for metric in METRICS
+    }
+
+
+async def run(args) -> dict:
+    """
+    Esegue le ripetizioni del benchmark e restituisce il report.
+    """
+    runs = []
+    for index in range(args.runs):
+        runs.append(await measure_once(args))
+        print(f"Ripetizione {index + 1}/{args.runs}: " + "  ".join(f"{m} {runs[-1][m]:.0f}" for m in METRICS))
+
+    return {
+        "mode": "eager" if args.eager else "lazy",
+        "requestedEventLoop": "uvloop" if args.uvloop else "asyncio",
+        "runs": len(runs),
+        "summary": summarize(runs),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark dei tempi di avvio del server (solo localhost).")
+    parser.add_argument("--runs", type=int, default=5, help="Numero di ripetizioni (default: 5)")
+    parser.add_argument("--port", type=int, default=8898, help="Porta del server di test (default: 8898)")
+    parser.add_argument("--camera-fps", type=float, default=30.0, help="Frame al secondo della videocamera sintetica (default: 30)")
+    parser.add_argument("--eager", action="store_true", help="Importa i controller prima di aprire la porta")
+    parser.add_argument("--uvloop", action="store_true", help="Usa l'event loop uvloop, se installato")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Secondi massimi di attesa per ogni fase (default: 30)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.port, args.camera_fps, args.eager, args.uvloop)
+        return
+
+    report = asyncio.run(run(args))
+    print(f"\nAvvio {report['mode']} ({report['requestedEventLoop']}), {report['runs']} ripetizioni:")
+    for metric, values in report["summary"].items():
+        print(f"  {metric:<20} mediana {values['median']:>7} ms   min {values['min']:>7} ms   max {values['max']:>7} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Modulo: trace_replay
+
+Descrizione:
+Riproduzione deterministica delle sessioni catturate dal server (`TRACE_DIR`, vedi
+`utils.protocol.trace_capture`), per riprodurre e confrontare regressioni di prestazioni.
+
+Il server viene avviato in un processo separato con hardware simulato (videocamera sintetica,
+motori simulati, audio senza dispositivo) e ogni connessione catturata viene riaperta con un
+client WSS, nello stesso ordine e con lo stesso scostamento dall'inizio della cattura. I messaggi
+vengono inviati esattamente come erano stati ricevuti:
+- con i tempi originali, eventualmente accelerati (`--speed 2` dimezza tutte le attese);
+- oppure il più velocemente possibile (`--fast`): le connessioni vengono aperte in ordine, dopo la
+  chiusura di quelle che nella cattura erano già terminate, e ognuna invia i propri messaggi senza attese.
+Con i tempi originali ogni connessione viene chiusa nello stesso istante della cattura; in modalità
+`--fast`, o se la chiusura non è stata catturata, dopo `--settle` secondi dall'ultimo messaggio.
+
+Il server, instrumentato, misura la durata dell'elaborazione di ogni messaggio in `handle_message`
+(decodifica, handler e conferma), per tipo di messaggio; il client conta i messaggi ricevuti, per
+tipo. Il report riporta la versione del codice (commit git) e, con `--compare`, le differenze
+rispetto a un report salvato in precedenza con `--json`, ad esempio su un'altra versione:
+
+    python trace_replay.py ../user/traces/trace-20261019-101500 --fast --json prima.json
+    git checkout <altra versione>
+    python trace_replay.py ../user/traces/trace-20261019-101500 --fast --compare prima.json
+
+Le sessioni riprese con il token di ripresa vengono riprodotte come nuove connessioni: il server di
+riproduzione non mantiene le sessioni dei piloti disconnessi.
+
+Dipendenze:
+- asyncio, argparse, json, multiprocessing, ssl, subprocess, time per l'esecuzione del test (`builtin`).
+- websockets per il client WebSocket (`websockets`).
+- loadtest per certificati, attesa del server e calcolo dei percentili.
+- utils.protocol per la codifica dei messaggi e il formato delle catture.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import ssl
+import subprocess
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+import websockets
+from loadtest import CERTFILE, KEYFILE, percentiles, wait_for_server
+from utils.protocol.codec import encode, decode, DecodeError
+from utils.protocol.trace_capture import load_trace
+
+REPORT_TYPE = "replay-report"
+BINARY_TYPE = "(binario)"
+INVALID_TYPE = "(non valido)"
+
+
+def _message_type(message: str | bytes) -> str:
+    """
+    Restituisce il tipo di un messaggio in arrivo, usato per raggruppare le misure.
+    """
+    if isinstance(message, bytes):
+        return BINARY_TYPE
+    try:
+        data = decode(message)
+    except DecodeError:
+        return INVALID_TYPE
+    return str(data.get("type")) if isinstance(data, dict) else INVALID_TYPE
+
+
+def _output_type(message: str | bytes) -> str:
+    """
+    Restituisce la categoria di un messaggio inviato dal server: il campo "type" oppure la prima
+    chiave diversa da "ok" (ad esempio "role", "ack", "state", "frame").
+    """
+    if isinstance(message, bytes):
+        return BINARY_TYPE
+    data = decode(message)
+    if not isinstance(data, dict):
+        return INVALID_TYPE
+    return str(data.get("type") or next((key for key in data if key != "ok"), "ok"))
+
+
+def _serve(port: int, use_tls: bool, camera_fps: float, log_level: str) -> None:
+    """
+    Processo server: `Server` con hardware simulato, che misura l'elaborazione dei messaggi.
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from server import Server
+    from utils.camera.CameraUtils import CameraUtils
+    from utils.camera.synthetic_capture import SyntheticCapture
+    from utils.motor.MotorUtils import MotorUtils
+    from utils.motor.simulated_backend import SimulatedBackend
+    from utils.audio.AudioUtils import AudioUtils
+    from utils.protocol.payloads import EmptyPayload
+
+    logging.getLogger().setLevel(log_level)
+    handling = defaultdict(list)  # {tipo di messaggio: [durate in ms]}
+
+    class ReplayServer(Server):
+        def _create_controllers(self, session):
+            capture = SyntheticCapture(fps=camera_fps)
+            camera_controller = CameraUtils(websocket=session.sender, monitor_max_hz=int(camera_fps), capture=capture)
+            motor_controller = MotorUtils(websocket=session.sender, tick_hz=self.motor_tick_hz, backend=SimulatedBackend())
+            return camera_controller, motor_controller, AudioUtils(sound_cache=self._sound_cache)
+
+        def _register_handlers(self):
+            super()._register_handlers()
+            self._dispatcher.register(REPORT_TYPE, self._on_replay_report, EmptyPayload, readonly=True)
+
+        async def handle_message(self, message, session):
+            start = time.perf_counter()
+            await super().handle_message(message, session)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            message_type = _message_type(message)
+            if message_type != REPORT_TYPE:
+                handling[message_type].append(elapsed_ms)
+
+        async def _on_replay_report(self, session, payload):
+            report = {message_type: values for message_type, values in handling.items()}
+            handling.clear()
+            await session.sender.send(encode({"ok": True, "replayReport": report}))
+
+    ssl_context = None
+    if use_tls:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(certfile=str(CERTFILE), keyfile=str(KEYFILE))
+
+    # Senza ripresa di sessione né registratore di volo: ogni connessione riprodotta parte da zero
+    asyncio.run(ReplayServer(port, "127.0.0.1", ssl_context, resume_grace=0, loop_stall_ms=None,
+                             flight_recorder_dir=None, motor_backend="simulated").start_server())
+
+
+def load_traces(paths: list) -> list:
+    """
+    Carica le catture indicate (file `connection-<n>.jsonl` o cartelle di cattura), ordinate per
+    scostamento dall'inizio della cattura.
+
+    Returns:
+        list: [(intestazione, [(secondi dall'apertura, messaggio)])]
+    """
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("connection-*.jsonl")) if path.is_dir() else [path])
+    traces = [load_trace(file) for file in files]
+    return sorted(traces, key=lambda trace: (trace[0]["offset"], trace[0]["connection"]))
+
+
+async def replay_connection(url: str, ssl_context, header: dict, messages: list, origin: float, args, outputs: Counter) -> int:
+    """
+    Riapre una connessione catturata e invia i suoi messaggi, contando i messaggi ricevuti.
+    Con i tempi originali, la connessione viene aperta all'istante `origin + offset / speed`.
+
+    Returns:
+        int: Numero di messaggi inviati.
+    """
+    if not args.fast:
+        await asyncio.sleep(max(0.0, origin + header["offset"] / args.speed - time.perf_counter()))
+
+    async with websockets.connect(url, ssl=ssl_context, max_size=None) as ws:
+        opened = time.perf_counter()
+        # Come il client originale, i messaggi partono dopo l'assegnazione del ruolo
+        while "role" not in (message := decode(await asyncio.wait_for(ws.recv(), args.timeout))):
+            outputs[_output_type(message)] += 1
+        outputs["role"] += 1
+
+        async def receive():
+            async for message in ws:
+                outputs[_output_type(message)] += 1
+
+        receiver = asyncio.create_task(receive())
+        for offset, message in messages:
+            if not args.fast:
+                await asyncio.sleep(max(0.0, opened + offset / args.speed - time.perf_counter()))
+            await ws.send(message)
+
+        if args.fast or header["closedAt"] is None:
+            await asyncio.sleep(args.settle)
+        else:
+            await asyncio.sleep(max(0.0, opened + header["closedAt"] / args.speed - time.perf_counter()))
+        receiver.cancel()
+    return len(messages)
+
+
+async def run(args) -> dict:
+    """
+    Avvia il server, riproduce tutte le connessioni e raccoglie le misure.
+    """
+    traces = load_traces(args.traces)
+    if not traces:
+        raise ValueError("Nessuna cattura trovata")
+
+    use_tls = not args.no_tls
+    url = f"{'wss' if use_tls else 'ws'}://127.0.0.1:{args.port}"
+    client_ssl = None
+    if use_tls:
+        client_ssl = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_ssl.check_hostname = False
+        client_ssl.verify_mode = ssl.CERT_NONE
+
+    context = multiprocessing.get_context("spawn")
+    server = context.Process(target=_serve, args=(args.port, use_tls, args.camera_fps, args.log_level), daemon=True)
+    server.start()
+    outputs = Counter()
+    try:
+        await wait_for_server(url, client_ssl)
+        start = time.perf_counter()
+        origin = start - traces[0][0]["offset"] / args.speed  # La prima connessione parte subito
+        if args.fast:
+            # Connessioni aperte in ordine, così che i ruoli vengano assegnati come nella cattura: prima di
+            # aprirne una si attende la fine di quelle che nella cattura erano già state chiuse
+            tasks = []
+            for header, messages in traces:
+                await asyncio.gather(*(task for task, (previous, _) in zip(tasks, traces)
+                                       if previous["closedAt"] is not None and previous["offset"] + previous["closedAt"] <= header["offset"]))
+                tasks.append(asyncio.create_task(replay_connection(url, client_ssl, header, messages, origin, args, outputs)))
+                await asyncio.sleep(0)
+                while outputs["role"] < len(tasks) and not tasks[-1].done():
+                    await asyncio.sleep(0.001)
+            sent = sum(await asyncio.gather(*tasks))
+        else:
+            sent = sum(await asyncio.gather(*(replay_connection(url, client_ssl, header, messages, origin, args, outputs)
+                                              for header, messages in traces)))
+        duration = time.perf_counter() - start
+
+        async with websockets.connect(url, ssl=client_ssl, max_size=None) as ws:
+            await ws.send(encode({"type": REPORT_TYPE, "content": ""}))
+            while "replayReport" not in (message := decode(await asyncio.wait_for(ws.recv(), args.timeout))):
+                pass
+            handling = message["replayReport"]
+    finally:
+        server.kill()  # SDL intercetta SIGTERM
+        server.join()
+
+    return {
+        "version": _code_version(),
+        "mode": "fast" if args.fast else f"x{args.speed:g}",
+        "connections": len(traces),
+        "messagesSent": sent,
+        "durationSeconds": round(duration, 2),
+        "handlingMs": {message_type: percentiles(values) for message_type, values in sorted(handling.items())},
+        "outputs": dict(sorted(outputs.items())),
+    }
+
+
+def _code_version() -> str:
+    """
+    Restituisce il commit git corrente (con "+modifiche" se ci sono modifiche non salvate).
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sconosciuta"
+    return f"{commit}+modifiche" if dirty else commit
+
+
+def _delta(current: float, baseline: float) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline * 100:+.0f}%"
+
+
+def print_report(report: dict, baseline: dict | None = None) -> None:
+    """
+    Stampa il report e, se indicato, il confronto con un report precedente.
+    """
+    print(f"\nVersione {report['version']}, modalità {report['mode']}: {report['connections']} connessioni, "
+          f"{report['messagesSent']} messaggi in {report['durationSeconds']} s")
+    if baseline is not None:
+        print(f"Confronto con la versione {baseline['version']} (modalità {baseline['mode']})")
+
+    print(f"\n  {'messaggio':<26}{'n':>6}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}" + ("   p50 / p99 rispetto al confronto" if baseline else ""))
+    previous = baseline["handlingMs"] if baseline else {}
+    for message_type, values in report["handlingMs"].items():
+        line = f"  {message_type:<26}{values['count']:>6}{values['p50']:>9}{values['p99']:>9}{values['max']:>9}"
+        before = previous.get(message_type)
+        if before and before.get("count"):
+            line += f"   {before['p50']} -> {values['p50']} ({_delta(values['p50'], before['p50'])}), {before['p99']} -> {values['p99']} ({_delta(values['p99'], before['p99'])})"
+        print(line)
+
+    print(f"\n  {'messaggi ricevuti':<26}{'n':>8}" + (f"{'confronto':>11}" if baseline else ""))
+    previous = baseline["outputs"] if baseline else {}
+    for output_type in sorted(set(report["outputs"]) | set(previous)):
+        count = report["outputs"].get(output_type, 0)
+        line = f"  {output_type:<26}{count:>8}"
+        if baseline:
+            line += f"{previous.get(output_type, 0):>11} {_delta(count, previous.get(output_type, 0))}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Riproduzione delle sessioni catturate contro un server con hardware simulato (solo localhost).")
+    parser.add_argument("traces", nargs="+", help="Cartelle di cattura (trace-<data>-<ora>) o file connection-<n>.jsonl")
+    parser.add_argument("--fast", action="store_true", help="Invia i messaggi il più velocemente possibile, senza i tempi originali")
+    parser.add_argument("--speed", type=float, default=1.0, help="Fattore di accelerazione dei tempi originali (default: 1)")
+    parser.add_argument("--settle", type=float, default=1.0, help="Secondi di attesa prima di chiudere ogni connessione in modalità --fast (default: 1)")
+    parser.add_argument("--camera-fps", type=float, default=30.0, help="Frame al secondo della videocamera sintetica (default: 30)")
+    parser.add_argument("--port", type=int, default=8896, help="Porta del server di test (default: 8896)")
+    parser.add_argument("--no-tls", action="store_true", help="Usa ws:// invece di wss://")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Secondi massimi di attesa delle risposte del server (default: 30)")
+    parser.add_argument("--log-level", default="WARNING", help="Livello di log del server (default: WARNING)")
+    parser.add_argument("--json", help="Percorso in cui salvare il report in formato JSON")
+    parser.add_argument("--compare", help="Report JSON di una riproduzione precedente da confrontare")
+    args = parser.parse_args()
+
+    if args.speed <= 0:
+        parser.error("--speed deve essere positivo")
+    if not args.no_tls and (not CERTFILE.is_file() or not KEYFILE.is_file()):
+        parser.error(f"Certificati non trovati ({CERTFILE}, {KEYFILE}): generarli o usare --no-tls")
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+
+    try:
+        report = asyncio.run(run(args))
+    except ValueError as e:
+        parser.error(str(e))
+    print_report(report, baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,23 +12,53 @@ Funzionalità principali:
 - Cambio dinamico della velocità di riproduzione senza alterare il pitch.
 - Controllo del volume per ogni suono.
 - Prevenzione della riproduzione simultanea dello stesso suono.
+- Cache LRU dei suoni decodificati: un suono già in cache viene riprodotto senza nuova decodifica.
+- Fine della riproduzione notificata dagli eventi del mixer, senza task di polling per ogni suono.
+- Riproduzione in streaming (`pygame.mixer.music`) dei brani lunghi, senza decodificarli in memoria.
 
 Dipendenze:
 - pygame: Per interfacciarsi con i sistemi audio.
-- json: Per serializzare i dati del server e inviarli al client.
-- asyncio: Per gestire operazioni asincrone, come l'invio di aggiornamenti temporali al client.
+- asyncio: Per gestire operazioni asincrone, come la decodifica fuori dall'event loop.
+- os: Per la dimensione dei file audio.
 - time: Per ottenere il tempo corrente durante la riproduzione.
+- utils.audio.audio_cache: Per la cache dei suoni decodificati.
+- utils.audio.mixer_events: Per la notifica della fine della riproduzione.
+- utils.metrics.registry: Per le metriche di decodifica e riproduzione.
 
 Autore: Zs  
 Data: 02-04-2025
 """
 
 import pygame
-import json
 import asyncio
+import logging
+import os
 import time
 from utils.audio.audioenums.audio_loop import AudioLoop
 from utils.audio.audioenums.audio_settings import AudioSettings
+from utils.audio.audioenums.effect_settings import EffectSettings
+from utils.audio.audio_cache import SoundCache
+from utils.audio.mixer_events import MIXER_EVENTS
+from utils.metrics.registry import REGISTRY
+
+_PLAYS = REGISTRY.counter("lego_audio_plays_total", "Riproduzioni audio avviate")
+_STREAMED = REGISTRY.counter("lego_audio_streamed_plays_total", "Riproduzioni audio avviate in streaming")
+_DECODE_MS = REGISTRY.histogram("lego_audio_decode_ms", "Tempo di decodifica di un file audio (ms)",
+                                buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+
+
+def init_mixer(buffer: int = EffectSettings.MIXER_BUFFER.value) -> None:
+    """
+    Inizializza il mixer di pygame, se non è già attivo, con un buffer piccolo: la latenza tra la
+    richiesta di un suono e la sua uscita dipende soprattutto dalla durata del buffer.
+    Il mixer è unico per il processo: conta solo la prima inizializzazione.
+
+    Args:
+        buffer (int, opzionale): Campioni del buffer del mixer (default: 512).
+    """
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=EffectSettings.MIXER_FREQUENCY.value, buffer=buffer)
+
 
 class AudioUtils:
     """
@@ -53,38 +83,50 @@ class AudioUtils:
         audio.change_speed("suono1", 1.5)
     """
 
-    def __init__(self):
+    def __init__(self, sound_cache: SoundCache | None = None):
         """
         Inizializza il sistema audio e configura due canali indipendenti.
 
+        Args:
+            sound_cache (SoundCache | None, opzionale): Cache dei suoni decodificati, condivisa tra
+                le sessioni. Se None viene creata una cache privata con il limite di default.
+
         Attributes:
-            sounds (dict): Dizionario che associa i nomi dei suoni ai loro dati (pygame.mixer.Sound, file_path).
+            sounds (dict): Dizionario che associa i nomi dei suoni alla chiave in cache, al percorso del file
+                e alla modalità di riproduzione (streaming o suono decodificato).
+            cache (SoundCache): Cache LRU dei suoni decodificati.
             channels (dict): Mappa dei canali audio disponibili (0 e 1).
             is_paused (bool): Variabile che segna se la riproduzione audio è stata messa in pausa.
-            elapsed_time (float): Indica il tempo trascorso nella riproduzione audio.
+            elapsed_time (float): Posizione della riproduzione all'ultimo avvio, ripresa o pausa (secondi).
         """
-        pygame.mixer.init()
-        self.sounds = {}  # {nome: (pygame.mixer.Sound, file_path)}
+        init_mixer()
+        self.sounds = {}  # {nome: (chiave in cache, file_path, streaming)}
+        self.cache = sound_cache if sound_cache is not None else SoundCache()
         self.channels = {
             0: pygame.mixer.Channel(0),
             1: pygame.mixer.Channel(1)
         }
         self.is_paused = False
         self.elapsed_time = 0.0
-        self._start_time = None
-        self.websocket = None
-        self._update_task = None  # Task per l'aggiornamento temporale
+        self._start_time = None  # Istante (epoch) dell'ultimo avvio o ripresa, None se la riproduzione è ferma o in pausa
         self._loop_status = AudioLoop.DISACTIVATED # Variabile che tiene lo stato dell loop della riproduzione
         self._is_playing = {} # {channel, bool}
         self._current_sound = None # Variabile che contiene temporaneamente il nome del suono in esecuzione
+        self._stream_channel = None # Canale il cui suono è riprodotto in streaming da pygame.mixer.music
 
-    def load_sound(self, name: str, file_path: str) -> None:
+    def load_sound(self, name: str, file_path: str, key: str | None = None, duration: float | None = None) -> None:
         """
         Carica un file audio e lo memorizza con il suo nome di riferimento.
 
+        Il file viene decodificato solo se il suo contenuto non è già presente nella cache.
+        I brani lunghi o i file grandi non vengono decodificati: saranno riprodotti in streaming.
+
         Args:
             name (str): Nome identificativo del suono.
             file_path (str): Percorso del file audio.
+            key (str | None, opzionale): Hash del contenuto usato come chiave in cache
+                (default: il percorso del file).
+            duration (float | None, opzionale): Durata del brano in secondi, se nota (default: None).
 
         Returns:
             None
@@ -92,22 +134,120 @@ class AudioUtils:
         Esempio:
             audio.load_sound("musica", "path/to/music.mp3")
         """
+        key = key or file_path
+        try:
+            streamed = self._should_stream(file_path, duration)
+            if not streamed and key not in self.cache:
+                self.cache.put(key, pygame.mixer.Sound(file_path))
+            self.sounds[name] = (key, file_path, streamed)
+        except Exception as e:
+            print(f"Errore durante il caricamento del suono '{name}': {e}")
+
+    async def prepare_sound(self, name: str, file_path: str, key: str | None = None, duration: float | None = None) -> bool:
+        """
+        Versione asincrona di `load_sound`: la decodifica, se necessaria, viene eseguita fuori
+        dall'event loop, così che la telemetria e i comandi di guida non vengano rallentati.
+        I brani riprodotti in streaming sono pronti subito, senza decodifica.
+
+        Args:
+            name (str): Nome identificativo del suono.
+            file_path (str): Percorso del file audio.
+            key (str | None, opzionale): Hash del contenuto usato come chiave in cache
+                (default: il percorso del file).
+            duration (float | None, opzionale): Durata del brano in secondi, se nota (default: None).
+
+        Returns:
+            bool: True se il suono è pronto per la riproduzione.
+        """
+        key = key or file_path
         try:
-            self.sounds[name] = (pygame.mixer.Sound(file_path), file_path)
+            streamed = self._should_stream(file_path, duration)
+            if not streamed and key not in self.cache:
+                start = time.perf_counter()
+                self.cache.put(key, await asyncio.to_thread(pygame.mixer.Sound, file_path))
+                _DECODE_MS.observe((time.perf_counter() - start) * 1000)
+            self.sounds[name] = (key, file_path, streamed)
+            return True
         except Exception as e:
             print(f"Errore durante il caricamento del suono '{name}': {e}")
+            return False
 
-    async def play_sound(self, name: str, channel: int = 0, websocket=None) -> None:
+    @staticmethod
+    def _should_stream(file_path: str, duration: float | None) -> bool:
+        """
+        Indica se un brano va riprodotto in streaming: un brano di 10 minuti decodificato occupa
+        circa 100 MB di memoria e la sua decodifica ritarda l'inizio della riproduzione.
+
+        Args:
+            file_path (str): Percorso del file audio.
+            duration (float | None): Durata del brano in secondi, se nota.
+
+        Returns:
+            bool: True se la durata o la dimensione del file superano le soglie di `AudioSettings`.
+        """
+        if duration and duration >= AudioSettings.STREAM_MIN_SECONDS.value:
+            return True
+        try:
+            return os.path.getsize(file_path) >= AudioSettings.STREAM_MIN_BYTES.value
+        except OSError:
+            return False
+
+    def _output(self, channel: int):
+        """
+        Restituisce l'uscita del canale: `pygame.mixer.music` se il canale sta riproducendo un brano
+        in streaming, altrimenti il canale del mixer. Entrambi offrono get_busy, pause, unpause,
+        stop, get_volume e set_volume.
+
+        Args:
+            channel (int): Indice del canale audio.
+
+        Returns:
+            pygame.mixer.Channel | module | None: L'uscita del canale, None se il canale non esiste.
+        """
+        if channel == self._stream_channel:
+            return pygame.mixer.music
+        return self.channels.get(channel)
+
+    def _is_busy(self, channel: int) -> bool:
+        """
+        Indica se il canale sta riproducendo un suono, anche in pausa.
+        `pygame.mixer.music.get_busy()` restituisce False durante la pausa.
+        """
+        if channel == self._stream_channel and (pygame.mixer.music.get_busy() or self.is_paused):
+            return True
+        ch = self.channels.get(channel)
+        return bool(ch and ch.get_busy())
+
+    def _get_sound(self, name: str):
+        """
+        Restituisce il suono decodificato, decodificando di nuovo il file solo se è stato
+        rimosso dalla cache.
+
+        Args:
+            name (str): Nome del suono.
+
+        Returns:
+            pygame.mixer.Sound: Il suono decodificato.
+        """
+        key, file_path, _ = self.sounds[name]
+        sound = self.cache.get(key)
+        if sound is None:
+            sound = pygame.mixer.Sound(file_path)
+            self.cache.put(key, sound)
+        return sound
+
+    async def play_sound(self, name: str, channel: int = 0) -> None:
         """
         Riproduce un suono su uno dei due canali disponibili.
 
         Se il suono specificato non esiste o il canale è occupato, il metodo non esegue alcuna azione.
-        Durante la riproduzione, invia aggiornamenti temporali al client tramite WebSocket (se connesso).
+        I brani lunghi vengono riprodotti in streaming con `pygame.mixer.music`, che legge e decodifica
+        il file durante la riproduzione.
+        La posizione di riproduzione viene pubblicata al client dalla telemetria di stato (`get_telemetry`).
 
         Args:
             name (str): Nome del suono da riprodurre.
             channel (int): Canale su cui riprodurre il suono (0 o 1). Default: 0.
-            websocket: Oggetto WebSocket per inviare aggiornamenti temporali. Default: None.
 
         Returns:
             None
@@ -122,101 +262,80 @@ class AudioUtils:
 
         ch = self.channels.get(channel)
 
-        if not ch or ch.get_busy():
+        if not ch or self._is_busy(channel):
             print(f"Il canale {channel} e occupato.")
             return
         
         self._is_playing[channel] = (channel, True)
         self._current_sound = name
 
-        sound = self.sounds[name][0]
-        if not sound:
-            raise ValueError(f"Il suono '{name}' non è stato caricato correttamente.")
-                  
-        ch.play(sound)
-        ch.set_volume(AudioSettings.DEFAULT_VOLUME.value)
+        _, file_path, streamed = self.sounds[name]
+        if streamed:
+            # Un solo brano alla volta può essere riprodotto in streaming
+            if self._stream_channel not in (None, channel) and self._is_busy(self._stream_channel):
+                print(f"Un altro brano è già in riproduzione in streaming sul canale {self._stream_channel}.")
+                self._is_playing[channel] = (channel, False)
+                return
+            await asyncio.to_thread(pygame.mixer.music.load, file_path)
+            self._stream_channel = channel
+            pygame.mixer.music.play()
+            _STREAMED.inc()
+        else:
+            sound = self._get_sound(name)
+            if not sound:
+                raise ValueError(f"Il suono '{name}' non è stato caricato correttamente.")
+            if self._stream_channel == channel:
+                self._stream_channel = None
+            ch.play(sound)
+
+        output = self._output(channel)
+        output.set_volume(AudioSettings.DEFAULT_VOLUME.value)
+        _PLAYS.inc()
 
-        self.websocket = websocket
         self.is_paused = False
         self.elapsed_time = 0.0
         self._start_time = time.time()
 
-        if self._update_task is None or self._update_task.done():
-            self._update_task = asyncio.create_task(self._send_updates(channel, sound))
+        # In pausa `pygame.mixer.music.get_busy()` è falso: la pausa non è una fine della riproduzione
+        MIXER_EVENTS.notify_end(channel, output, lambda: self._on_playback_end(channel), paused=lambda: self.is_paused)
 
-    async def _send_updates(self, channel: int, sound: str) -> None:
+    def _on_playback_end(self, channel: int) -> None:
         """
-        Invia aggiornamenti temporali al client tramite WebSocket durante la riproduzione audio.
-
-        Questo metodo viene eseguito come un task asincrono e invia immediatamente il tempo trascorso
-        appena il suono parte, e continua ad aggiornare il client ogni secondo finché la riproduzione è attiva
-        e non è in pausa.
+        Chiamato dagli eventi del mixer alla fine della riproduzione: libera il canale e, se il
+        loop è attivo, riavvia subito il suono.
 
         Args:
-            channel (int): Canale audio (0 o 1) per il quale inviare gli aggiornamenti temporali.
-            sound (str): Nome del suono in riproduzione (non utilizzato direttamente in questa funzione ma utile per logging o estensioni future).
-
-        Comportamento:
-            - Invia subito un aggiornamento temporale appena parte il suono.
-            - Verifica se il canale è attivo e in riproduzione (`ch.get_busy()`).
-            - Se non è in pausa (`not self.is_paused`), calcola e invia il tempo trascorso.
-            - Attende 1 secondo tra gli aggiornamenti successivi.
-            - Invia un ultimo aggiornamento al termine della riproduzione.
-            - Se il loop è attivo, riavvia la riproduzione del suono.
-
-        Esempio di messaggio inviato al client:
-            {
-                "ok": True,
-                "currentAudioTime": 12.345
-            }
+            channel (int): Canale audio (0 o 1) che ha terminato la riproduzione.
         """
-
-        ch = self.channels.get(channel)
-        if not ch:
-            print(f"Canale {channel} non trovato.")
-            return
-
+        self._is_playing[channel] = (channel, False)
+        self.is_paused = False
         self.elapsed_time = 0.0
+        self._start_time = None
+        if self._stream_channel == channel:
+            self._stream_channel = None
 
-        async def send_current_time():
-            """
-            Calcola e invia il tempo corrente di riproduzione al client tramite WebSocket.
-            Ritorna False in caso di errore, True altrimenti.
-            """
-            current_time_sec = self.elapsed_time + (time.time() - self._start_time)
-            if self.websocket:
-                try:
-                    await self.websocket.send(json.dumps({
-                        "ok": True,
-                        "currentAudioTime": current_time_sec
-                    }))
-                except Exception as e:
-                    print(f"Errore nell'invio tramite WebSocket: {e}")
-                    return False
-            return True
-
-        # 🔥 Invia subito il primo aggiornamento appena parte il suono
-        if not await send_current_time():
-            return
-
-        # 🔁 Continua a inviare ogni secondo finché il canale è attivo
-        while ch.get_busy():
-            if not self.is_paused:
-                if not await send_current_time():
-                    break
-            await asyncio.sleep(1)
+        if self._loop_status == AudioLoop.ACTIVATED and self._current_sound:
+            asyncio.create_task(self.play_sound(self._current_sound, channel))
 
-        # ✅ Invia un ultimo aggiornamento al termine della riproduzione
-        await send_current_time()
+    def get_telemetry(self) -> dict:
+        """
+        Restituisce lo stato della riproduzione da pubblicare al client.
 
-        ch.stop()
-        self._is_playing[channel] = (channel, False)
+        I valori cambiano solo all'avvio, alla pausa, alla ripresa e alla fine della riproduzione,
+        quindi vengono inviati una volta sola: il client ricava la posizione corrente aggiungendo a
+        `audioPosition` il tempo trascorso dalla ricezione, finché `audioPlaying` è vero.
 
-        if self._loop_status == AudioLoop.ACTIVATED:
-            await asyncio.sleep(1)
-            asyncio.create_task(
-                self.play_sound(self._current_sound, AudioSettings.CLIENT_CHANNEL.value, self.websocket)
-            )
+        Returns:
+            dict: {"audioPlaying": riproduzione attiva e non in pausa,
+                   "audioPosition": posizione all'ultimo avvio, ripresa o pausa (secondi),
+                   "audioStartedAt": istante (epoch, ms) dell'ultimo avvio o ripresa, None se ferma}
+        """
+        playing = self._start_time is not None and not self.is_paused
+        return {
+            "audioPlaying": playing,
+            "audioPosition": round(self.elapsed_time, 3),
+            "audioStartedAt": int(self._start_time * 1000) if playing else None
+        }
 
 
     def restart_sound(self, name: str) -> None:
@@ -234,21 +353,42 @@ class AudioUtils:
             return
 
         channel = AudioSettings.CLIENT_CHANNEL.value
-        ch = self.channels.get(channel)
+        ch = self._output(channel)
 
-        if ch and ch.get_busy():
+        if ch and self._is_busy(channel):
+            MIXER_EVENTS.cancel(channel)  # La fine causata da stop() non è una fine della riproduzione
             ch.stop()
             print(f"[Info] Riproduzione precedente fermata sul canale {channel}.")
 
         self._current_sound = name
-        self._start_time = time.time()
+        self.is_paused = False
+        self._start_time = None
         self.elapsed_time = 0.0
-        self._is_playing[channel] = (channel, True)
+        self._is_playing[channel] = (channel, False)
 
-        asyncio.create_task(self.play_sound(name, channel, self.websocket))
+        asyncio.create_task(self.play_sound(name, channel))
         print(f"[Info] Suono '{name}' riavviato sul canale {channel}.")
 
 
+    def stop(self) -> None:
+        """
+        Ferma la riproduzione su tutti i canali del client e annulla le notifiche di fine
+        riproduzione, ad esempio alla chiusura della sessione del pilota.
+        """
+        self._loop_status = AudioLoop.DISACTIVATED
+        for channel in self.channels:
+            MIXER_EVENTS.cancel(channel)  # La fine causata da stop() non deve riavviare il loop
+            output = self._output(channel)
+            if output and self._is_busy(channel):
+                output.stop()
+            self._is_playing[channel] = (channel, False)
+
+        self._stream_channel = None
+        self._current_sound = None
+        self.is_paused = False
+        self.elapsed_time = 0.0
+        self._start_time = None
+
     def pause_sound(self, channel: int = 0) -> None:
         """
         Mette in pausa la riproduzione audio su un canale specificato.
@@ -256,12 +396,14 @@ class AudioUtils:
         Args:
             channel (int): Indice del canale audio da mettere in pausa. Default: 0.
         """
-        ch = self.channels.get(channel)
+        ch = self._output(channel)
 
         if ch and ch.get_busy():
             ch.pause()
+            if not self.is_paused and self._start_time is not None:
+                self.elapsed_time += time.time() - self._start_time
             self.is_paused = True
-            self.elapsed_time += time.time() - getattr(self, "_start_time", 0)
+            self._start_time = None
 
 
     def resume_sound(self, channel: int = 0) -> None:
@@ -271,12 +413,13 @@ class AudioUtils:
         Args:
             channel (int): Indice del canale audio da riprendere. Default: 0.
         """
-        ch = self.channels.get(channel)
+        ch = self._output(channel)
 
-        if ch and ch.get_busy():
+        if ch and self._is_busy(channel):
             ch.unpause()
-            self.is_paused = False
-            self._start_time = time.time()
+            if self.is_paused:
+                self.is_paused = False
+                self._start_time = time.time()
 
     def set_volume(self, channel: int, new_volume: float) -> None:
         """
@@ -299,9 +442,9 @@ class AudioUtils:
         # Normalize volume to [0.0, 1.0]
         normalized_volume = round((new_volume + 60) / 120, 2)
 
-        self.channels[channel].set_volume(normalized_volume)
+        self._output(channel).set_volume(normalized_volume)
 
-    def set_pan(self, channel: int, pan_value: float) -> None:
+    def set_pan(self, channel: int, pan_value: float) -> bool:
         """
         Imposta il bilanciamento stereo (pan) del canale specificato.
 
@@ -311,17 +454,23 @@ class AudioUtils:
                                -60 = sinistra, 0 = centro, 60 = destra.
 
         Returns:
-            None
+            bool: False se il bilanciamento non è applicabile, ad esempio per un brano riprodotto
+                  in streaming (`pygame.mixer.music` ha un solo volume per entrambi i lati).
         """
         if channel not in self.channels:
             print(f"Canale {channel} non trovato.")
-            return
+            return False
+
+        if channel == self._stream_channel:
+            logging.info("Bilanciamento stereo non disponibile per i brani riprodotti in streaming.")
+            return False
         
         # Normalizzazione del pan
         left_volume = 1.0 if pan_value <= 0 else 1.0 - pan_value
         right_volume = 1.0 if pan_value >= 0 else 1.0 + pan_value
         # Ottieni il volume corrente (predefinito a 1.0)
         self.channels[channel].set_volume(left_volume, right_volume)
+        return True
         
     def toggle_mute(self, channel: int) -> None:
         """
@@ -333,7 +482,7 @@ class AudioUtils:
         Returns:
             None
         """
-        ch = self.channels.get(channel)
+        ch = self._output(channel)
         if not ch:
             return
 
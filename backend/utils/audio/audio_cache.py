@@ -0,0 +1,222 @@
+"""
+Modulo: audio_cache
+
+Descrizione:
+Cache dei file audio su due livelli.
+
+- `AudioStore`: archivio su disco indicizzato per hash del contenuto (SHA-256). Ogni file viene
+  salvato una sola volta come `<sha256><estensione>`: ricaricare lo stesso brano, anche con un
+  nome diverso, non occupa altro spazio.
+- `SoundCache`: cache LRU in memoria dei suoni già decodificati (`pygame.mixer.Sound`), con un
+  limite configurabile di memoria. Quando il limite viene superato sono rimossi i suoni
+  riprodotti meno di recente; riprodurre di nuovo un suono presente in cache non richiede
+  alcuna decodifica.
+
+Dipendenze:
+- hashlib per il calcolo dell'hash dei file (`builtin`).
+- os e pathlib per la gestione dei file (`builtin`).
+- logging per il monitoraggio delle rimozioni (`builtin`).
+- collections per l'ordinamento LRU (`builtin`).
+- pygame per la stima della memoria occupata dai suoni (`pygame`, importato al primo utilizzo).
+- utils.audio.audioenums.cache_settings per le impostazioni di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from utils.audio.audioenums.cache_settings import CacheSettings
+
+
+class AudioStore:
+    """
+    Archivio su disco dei file audio indicizzati per hash del contenuto.
+
+    Attributes:
+        root (Path): Cartella dell'archivio.
+    """
+
+    def __init__(self, root: str = CacheSettings.STORE_DIR.value):
+        """
+        Inizializza l'archivio.
+
+        Args:
+            root (str, opzionale): Cartella dell'archivio (default: "../user/audio/cache/").
+        """
+        self.root = Path(root)
+
+    def path_for(self, digest: str, name: str) -> Path:
+        """
+        Restituisce il percorso di un file nell'archivio, mantenendo l'estensione originale
+        così che pygame e mutagen possano riconoscerne il formato.
+
+        Args:
+            digest (str): Hash SHA-256 esadecimale del contenuto.
+            name (str): Nome originale del file.
+
+        Returns:
+            Path: Il percorso `<root>/<sha256><estensione>`.
+        """
+        return self.root / f"{digest}{Path(name).suffix.lower()}"
+
+    def put_file(self, source: str | Path, digest: str, name: str) -> str:
+        """
+        Sposta un file nell'archivio. Se un file con lo stesso contenuto è già presente,
+        il nuovo file viene eliminato. Operazione bloccante: da eseguire fuori dall'event loop.
+
+        Args:
+            source (str | Path): File da archiviare.
+            digest (str): Hash SHA-256 esadecimale del contenuto.
+            name (str): Nome originale del file.
+
+        Returns:
+            str: Il percorso del file nell'archivio.
+        """
+        target = self.path_for(digest, name)
+        os.makedirs(self.root, exist_ok=True)
+
+        if target.is_file():
+            os.remove(source)
+            logging.info(f"File audio '{name}' già presente in archivio: duplicato scartato.")
+        else:
+            os.replace(source, target)
+
+        return str(target)
+
+    def put_bytes(self, data: bytes, name: str) -> tuple:
+        """
+        Salva un contenuto nell'archivio, se non è già presente.
+        Operazione bloccante: da eseguire fuori dall'event loop.
+
+        Args:
+            data (bytes): Contenuto del file audio.
+            name (str): Nome originale del file.
+
+        Returns:
+            tuple: (percorso del file nell'archivio, hash SHA-256 esadecimale)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path_for(digest, name)
+
+        if not target.is_file():
+            os.makedirs(self.root, exist_ok=True)
+            partial = target.with_suffix(target.suffix + ".tmp")
+            with open(partial, "wb") as f:
+                f.write(data)
+            os.replace(partial, target)
+
+        return str(target), digest
+
+
+class SoundCache:
+    """
+    Cache LRU dei suoni decodificati, limitata dalla memoria occupata.
+
+    Un suono rimosso dalla cache mentre è in riproduzione continua a suonare: il canale di
+    pygame ne mantiene un riferimento fino al termine.
+
+    Attributes:
+        max_bytes (int): Memoria massima occupata dai suoni (byte).
+        _entries (OrderedDict): {chiave: (pygame.mixer.Sound, byte)} dal meno al più recente.
+        _bytes (int): Memoria attualmente occupata (byte).
+    """
+
+    def __init__(self, max_mb: float = CacheSettings.DEFAULT_BUDGET_MB.value):
+        """
+        Inizializza la cache.
+
+        Args:
+            max_mb (float, opzionale): Memoria massima in MiB (default: 64).
+        """
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str):
+        """
+        Restituisce un suono e lo segna come il più recente.
+
+        Args:
+            key (str): Chiave del suono (hash del contenuto).
+
+        Returns:
+            pygame.mixer.Sound | None: Il suono, oppure None se non è in cache.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, sound) -> None:
+        """
+        Inserisce un suono decodificato, rimuovendo i meno recenti se il limite di memoria
+        viene superato. Il suono appena inserito non viene mai rimosso, anche se da solo
+        supera il limite.
+
+        Args:
+            key (str): Chiave del suono (hash del contenuto).
+            sound (pygame.mixer.Sound): Il suono decodificato.
+        """
+        self.discard(key)
+
+        size = self.sound_size(sound)
+        self._entries[key] = (sound, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, (_, old_size) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self._evictions += 1
+            logging.info(f"Suono {old_key[:12]} rimosso dalla cache ({old_size // 1024} KiB).")
+
+    def discard(self, key: str) -> None:
+        """
+        Rimuove un suono dalla cache, se presente.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    @staticmethod
+    def sound_size(sound) -> int:
+        """
+        Stima la memoria occupata da un suono decodificato dal formato del mixer,
+        senza copiarne i campioni.
+
+        Returns:
+            int: Dimensione stimata in byte.
+        """
+        import pygame  # Già caricato da chi ha decodificato il suono
+
+        frequency, size, channels = pygame.mixer.get_init() or (44100, -16, 2)
+        return int(sound.get_length() * frequency * (abs(size) // 8) * channels)
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le statistiche della cache.
+
+        Returns:
+            dict: Numero di suoni, memoria occupata e limite (byte), hit, miss e rimozioni.
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "budgetBytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+        }
@@ -0,0 +1,117 @@
+"""
+Modulo: audio_probe
+
+Descrizione:
+Lettura dei metadati dei file audio (durata, frequenza di campionamento, canali) tramite mutagen.
+L'analisi del file viene eseguita fuori dall'event loop e il risultato viene memorizzato per hash
+del contenuto: caricare di nuovo lo stesso brano non richiede una nuova lettura del file.
+
+Dipendenze:
+- asyncio per l'esecuzione dell'analisi fuori dall'event loop (`builtin`).
+- logging per il monitoraggio dei file non riconosciuti (`builtin`).
+- collections per il limite dei metadati memorizzati (`builtin`).
+- mutagen per la lettura dei metadati (`mutagen`, importato al primo utilizzo fuori dall'event loop).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class AudioMetadata:
+    """
+    Metadati di un file audio.
+
+    Attributes:
+        duration (float): Durata in secondi (0 se non disponibile).
+        sample_rate (int): Frequenza di campionamento in Hz (0 se non disponibile).
+        channels (int): Numero di canali (0 se non disponibile).
+    """
+    duration: float = 0.0
+    sample_rate: int = 0
+    channels: int = 0
+
+    def format_duration(self) -> str:
+        """
+        Restituisce la durata nel formato "m:ss" mostrato dal client.
+        """
+        total_seconds = round(self.duration)
+        return f"{total_seconds // 60}:{str(total_seconds % 60).zfill(2)}"
+
+
+class AudioProbe:
+    """
+    Analizzatore dei metadati audio con memorizzazione dei risultati per hash del contenuto.
+
+    Attributes:
+        max_entries (int): Numero massimo di metadati memorizzati.
+        _cache (OrderedDict): {hash del contenuto: AudioMetadata} dal meno al più recente.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Inizializza l'analizzatore.
+
+        Args:
+            max_entries (int, opzionale): Numero massimo di metadati memorizzati (default: 1024).
+        """
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def get(self, digest: str) -> AudioMetadata | None:
+        """
+        Restituisce i metadati già noti di un contenuto, senza leggere il file.
+
+        Args:
+            digest (str): Hash SHA-256 del contenuto.
+
+        Returns:
+            AudioMetadata | None: I metadati, oppure None se il contenuto non è mai stato analizzato.
+        """
+        metadata = self._cache.get(digest)
+        if metadata is not None:
+            self._cache.move_to_end(digest)
+        return metadata
+
+    async def probe(self, file_path: str, digest: str) -> AudioMetadata:
+        """
+        Restituisce i metadati di un file, analizzandolo fuori dall'event loop solo se il
+        contenuto non è già stato analizzato.
+
+        Args:
+            file_path (str): Percorso del file audio.
+            digest (str): Hash SHA-256 del contenuto.
+
+        Returns:
+            AudioMetadata: I metadati del file (valori a zero se il formato non è riconosciuto).
+        """
+        metadata = self.get(digest)
+        if metadata is None:
+            metadata = await asyncio.to_thread(self._read, file_path)
+            self._cache[digest] = metadata
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return metadata
+
+    @staticmethod
+    def _read(file_path: str) -> AudioMetadata:
+        """
+        Legge i metadati con mutagen. Operazione bloccante.
+        """
+        from mutagen import File
+
+        try:
+            info = File(file_path, easy=True).info
+            return AudioMetadata(
+                duration=float(info.length),
+                sample_rate=int(getattr(info, "sample_rate", 0) or 0),
+                channels=int(getattr(info, "channels", 0) or 0)
+            )
+        except Exception as e:
+            logging.warning(f"Metadati non disponibili per '{file_path}': {e}")
+            return AudioMetadata()
@@ -0,0 +1,305 @@
+"""
+Modulo: audio_upload
+
+Descrizione:
+Protocollo di caricamento dei file audio a blocchi binari, con ripresa dei trasferimenti interrotti.
+
+Il caricamento avviene in tre fasi:
+1. "audio-upload-begin" (JSON): il client dichiara nome e dimensione del file, ed eventualmente
+   l'`uploadId` di un caricamento interrotto. Il server risponde con l'`uploadId` e l'offset da
+   cui riprendere (0 per un nuovo caricamento).
+2. Blocchi binari: ogni frame binario contiene un'intestazione di 24 byte (16 byte di `uploadId`
+   e 8 byte di offset big-endian) seguita dai dati. Il server scrive il blocco su disco fuori
+   dall'event loop, aggiorna l'hash SHA-256 in modo incrementale e risponde con il nuovo offset.
+3. "audio-upload-commit" (JSON): il server verifica dimensione ed eventuale hash e sposta il
+   file nell'archivio indicizzato per hash del contenuto (`AudioStore`).
+
+Il file parziale resta su disco con nome `<uploadId>.part`, quindi un caricamento può essere
+ripreso anche dopo un riavvio del server.
+
+Dipendenze:
+- asyncio per l'esecuzione delle scritture fuori dall'event loop (`builtin`).
+- hashlib per il calcolo incrementale dello SHA-256 (`builtin`).
+- os e pathlib per la gestione dei file (`builtin`).
+- struct per la decodifica dell'intestazione dei blocchi (`builtin`).
+- time per la scadenza dei caricamenti abbandonati (`builtin`).
+- uuid per la generazione degli identificativi di caricamento (`builtin`).
+- logging per il monitoraggio delle operazioni (`builtin`).
+- utils.audio.audioenums.upload_settings per i limiti del protocollo.
+- utils.audio.audio_cache per l'archivio dei file completati.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import time
+import uuid
+from pathlib import Path
+from utils.audio.audioenums.upload_settings import UploadSettings
+from utils.audio.audio_cache import AudioStore
+
+CHUNK_HEADER = struct.Struct("!16sQ")  # uploadId (16 byte) + offset (uint64 big-endian)
+
+
+class UploadError(ValueError):
+    """
+    Errore del protocollo di caricamento (identificativo sconosciuto, offset o hash non validi).
+    """
+
+
+class UploadState:
+    """
+    Stato di un singolo caricamento in corso.
+
+    Attributes:
+        upload_id (str): Identificativo esadecimale del caricamento.
+        name (str): Nome del file dichiarato dal client.
+        size (int): Dimensione totale dichiarata (byte).
+        offset (int): Byte già scritti su disco.
+        part_path (Path): Percorso del file parziale.
+        hasher (hashlib._Hash): SHA-256 incrementale dei byte ricevuti.
+        updated_at (float): Istante dell'ultimo blocco ricevuto.
+        lock (asyncio.Lock): Serializza le scritture dei blocchi dello stesso caricamento.
+    """
+
+    def __init__(self, upload_id: str, name: str, size: int, part_path: Path):
+        self.upload_id = upload_id
+        self.name = name
+        self.size = size
+        self.offset = 0
+        self.part_path = part_path
+        self.hasher = hashlib.sha256()
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class AudioUploadManager:
+    """
+    Gestisce i caricamenti audio a blocchi di tutte le connessioni.
+
+    Attributes:
+        temp_dir (Path): Cartella dei file parziali.
+        store (AudioStore): Archivio in cui vengono spostati i file completati.
+        max_upload_size (int): Dimensione massima consentita per un file (byte).
+        _uploads (dict): Caricamenti attivi {uploadId: UploadState}.
+    """
+
+    def __init__(self, temp_dir: str = "../user/audio/temp/", store: AudioStore | None = None,
+                 max_upload_size: int = UploadSettings.MAX_UPLOAD_SIZE.value):
+        """
+        Inizializza il gestore dei caricamenti.
+
+        Args:
+            temp_dir (str, opzionale): Cartella temporanea dei caricamenti (default: "../user/audio/temp/").
+            store (AudioStore | None, opzionale): Archivio dei file completati (default: archivio di default).
+            max_upload_size (int, opzionale): Dimensione massima di un file in byte (default: 200 MiB).
+        """
+        self.temp_dir = Path(temp_dir)
+        self.store = store if store is not None else AudioStore()
+        self.max_upload_size = max_upload_size
+        self._uploads = {}
+
+    async def begin(self, name: str, size: int, upload_id: str | None = None) -> UploadState:
+        """
+        Avvia un nuovo caricamento o riprende un caricamento interrotto.
+
+        Args:
+            name (str): Nome del file.
+            size (int): Dimensione totale del file (byte).
+            upload_id (str | None, opzionale): Identificativo di un caricamento da riprendere.
+
+        Raises:
+            UploadError: Se la dimensione non è valida o il caricamento da riprendere non corrisponde.
+
+        Returns:
+            UploadState: Lo stato del caricamento, con l'offset da cui riprendere.
+        """
+        if not 0 < size <= self.max_upload_size:
+            raise UploadError(f"Dimensione del file non valida: {size} byte (massimo {self.max_upload_size})")
+
+        await self._expire_stale()
+
+        if upload_id:
+            state = self._uploads.get(upload_id) or await self._restore(upload_id, name, size)
+            if state is not None:
+                if state.name != name or state.size != size:
+                    raise UploadError(f"Il caricamento {upload_id} non corrisponde al file dichiarato")
+                state.updated_at = time.monotonic()
+                logging.info(f"Ripresa del caricamento '{name}' da {state.offset}/{size} byte.")
+                return state
+
+        await asyncio.to_thread(os.makedirs, self.temp_dir, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        state = UploadState(upload_id, name, size, self.temp_dir / f"{upload_id}.part")
+        self._uploads[upload_id] = state
+        logging.info(f"Caricamento '{name}' avviato ({size} byte).")
+        return state
+
+    async def _restore(self, upload_id: str, name: str, size: int) -> UploadState | None:
+        """
+        Ricostruisce lo stato di un caricamento dal file parziale rimasto su disco
+        (ad esempio dopo un riavvio del server), ricalcolandone l'hash fuori dall'event loop.
+
+        Un file parziale più grande della dimensione dichiarata viene troncato: i byte in eccesso
+        non possono appartenere al file e impedirebbero il completamento del caricamento.
+
+        Returns:
+            UploadState | None: Lo stato ricostruito, oppure None se il file parziale non esiste.
+        """
+        # Solo la forma esadecimale generata da `begin`: altre forme (trattini, graffe, maiuscole)
+        # indicherebbero un file parziale diverso
+        try:
+            if uuid.UUID(hex=upload_id).hex != upload_id:
+                return None
+        except ValueError:
+            return None
+
+        part_path = self.temp_dir / f"{upload_id}.part"
+        if not part_path.is_file():
+            return None
+
+        if part_path.stat().st_size > size:
+            logging.warning(f"File parziale del caricamento {upload_id} più grande della dimensione dichiarata: troncato a {size} byte.")
+            await asyncio.to_thread(os.truncate, part_path, size)
+
+        state = UploadState(upload_id, name, size, part_path)
+        state.offset = await asyncio.to_thread(self._rehash, part_path, state.hasher)
+        self._uploads[upload_id] = state
+        return state
+
+    @staticmethod
+    def _rehash(path: Path, hasher) -> int:
+        """
+        Aggiorna l'hash con il contenuto di un file esistente e ne restituisce la dimensione.
+        """
+        total = 0
+        with open(path, "rb") as f:
+            while block := f.read(UploadSettings.CHUNK_SIZE.value):
+                hasher.update(block)
+                total += len(block)
+        return total
+
+    @staticmethod
+    def parse_chunk(message: bytes) -> tuple:
+        """
+        Decodifica un frame binario del protocollo.
+
+        Args:
+            message (bytes): Il frame ricevuto.
+
+        Raises:
+            UploadError: Se il frame è più corto dell'intestazione.
+
+        Returns:
+            tuple: (uploadId esadecimale, offset, memoryview dei dati)
+        """
+        if len(message) < CHUNK_HEADER.size:
+            raise UploadError("Blocco binario troppo corto")
+
+        raw_id, offset = CHUNK_HEADER.unpack_from(message)
+        return raw_id.hex(), offset, memoryview(message)[CHUNK_HEADER.size:]
+
+    async def write_chunk(self, upload_id: str, offset: int, data) -> UploadState:
+        """
+        Scrive un blocco su disco fuori dall'event loop e aggiorna l'hash incrementale.
+
+        Args:
+            upload_id (str): Identificativo del caricamento.
+            offset (int): Posizione del blocco nel file.
+            data (bytes | memoryview): Contenuto del blocco.
+
+        Raises:
+            UploadError: Se il caricamento è sconosciuto, l'offset non è quello atteso o il
+                blocco supera la dimensione dichiarata.
+
+        Returns:
+            UploadState: Lo stato aggiornato del caricamento.
+        """
+        state = self.get(upload_id)
+
+        async with state.lock:
+            if offset != state.offset:
+                raise UploadError(f"Offset {offset} non valido, atteso {state.offset}")
+            if state.offset + len(data) > state.size:
+                raise UploadError("Il blocco supera la dimensione dichiarata del file")
+
+            await asyncio.to_thread(self._append, state.part_path, state.hasher, data)
+            state.offset += len(data)
+            state.updated_at = time.monotonic()
+
+        return state
+
+    @staticmethod
+    def _append(path: Path, hasher, data) -> None:
+        with open(path, "ab") as f:
+            f.write(data)
+        hasher.update(data)
+
+    async def commit(self, upload_id: str, sha256: str | None = None) -> tuple:
+        """
+        Conclude un caricamento verificandone dimensione e hash e sposta il file nell'archivio.
+        Se l'archivio contiene già lo stesso contenuto il file caricato viene scartato.
+
+        Args:
+            upload_id (str): Identificativo del caricamento.
+            sha256 (str | None, opzionale): Hash atteso del file, se fornito dal client.
+
+        Raises:
+            UploadError: Se il file è incompleto o l'hash non corrisponde.
+
+        Returns:
+            tuple: (nome del file, percorso finale, hash SHA-256 esadecimale)
+        """
+        state = self.get(upload_id)
+
+        async with state.lock:
+            if state.offset != state.size:
+                raise UploadError(f"Caricamento incompleto: {state.offset}/{state.size} byte")
+
+            digest = state.hasher.hexdigest()
+            if sha256 and sha256.lower() != digest:
+                await self.abort(upload_id)
+                raise UploadError("L'hash del file ricevuto non corrisponde")
+
+            final_path = await asyncio.to_thread(self.store.put_file, state.part_path, digest, state.name)
+            del self._uploads[upload_id]
+
+        logging.info(f"Caricamento '{state.name}' completato ({state.size} byte).")
+        return state.name, final_path, digest
+
+    def get(self, upload_id: str) -> UploadState:
+        """
+        Restituisce lo stato di un caricamento attivo.
+
+        Raises:
+            UploadError: Se il caricamento non esiste.
+        """
+        state = self._uploads.get(upload_id)
+        if state is None:
+            raise UploadError(f"Caricamento sconosciuto: {upload_id}")
+        return state
+
+    async def abort(self, upload_id: str) -> None:
+        """
+        Annulla un caricamento ed elimina il file parziale.
+        """
+        state = self._uploads.pop(upload_id, None)
+        if state is not None:
+            await asyncio.to_thread(state.part_path.unlink, True)
+
+    async def _expire_stale(self) -> None:
+        """
+        Elimina i caricamenti abbandonati da più di `STALE_UPLOAD_SECONDS`; i file parziali vengono
+        rimossi fuori dall'event loop.
+        """
+        deadline = time.monotonic() - UploadSettings.STALE_UPLOAD_SECONDS.value
+        for upload_id, state in list(self._uploads.items()):
+            if state.updated_at < deadline and not state.lock.locked():
+                del self._uploads[upload_id]
+                await asyncio.to_thread(state.part_path.unlink, True)
+                logging.info(f"Caricamento abbandonato eliminato: '{state.name}'.")
@@ -21,6 +21,12 @@ class AudioSettings(enum.Enum):
         MAX_VOLUME (int): Indica il volume massimo supportato dalle casse.
         MIN_VOLUME (int): Indica il volume minimo supportato dalle casse.
         CLIENT_CHANNEL (int): Indica il canale output del client.
+        EVENT_PUMP_SECONDS (float): Intervallo di lettura degli eventi di fine riproduzione del mixer.
+        STREAM_MIN_SECONDS (int): Durata oltre la quale un brano viene riprodotto in streaming.
+        STREAM_MIN_BYTES (int): Dimensione del file oltre la quale un brano viene riprodotto in streaming.
     """
     DEFAULT_VOLUME = 0.5                # Valore di default per il volume degli audio
     CLIENT_CHANNEL = 1                  # Valore del canale di output del client
+    EVENT_PUMP_SECONDS = 0.02           # Intervallo di lettura degli eventi del mixer (secondi)
+    STREAM_MIN_SECONDS = 60             # Brani più lunghi non vengono decodificati in memoria (secondi)
+    STREAM_MIN_BYTES = 16 * 1024 * 1024 # File più grandi non vengono decodificati in memoria (byte)
@@ -0,0 +1,25 @@
+"""
+Nome: cache_settings.py
+
+Descrizione: 
+Questo modulo definisce un'enumerazione con le impostazioni della cache dei file audio.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class CacheSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni della cache audio su disco e in memoria.
+    
+    Values:
+        STORE_DIR (str): Cartella dei file audio indicizzati per hash del contenuto.
+        DEFAULT_BUDGET_MB (int): Memoria massima (MiB) occupata dai suoni decodificati.
+    """
+    STORE_DIR = "../user/audio/cache/"      # File salvati come <sha256><estensione>
+    DEFAULT_BUDGET_MB = 64                  # Circa 6 minuti di audio stereo a 44.1 kHz, 16 bit
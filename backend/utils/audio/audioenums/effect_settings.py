@@ -0,0 +1,35 @@
+"""
+Nome: effect_settings.py
+
+Descrizione:
+Questo modulo definisce un'enumerazione con le impostazioni del banco degli effetti sonori.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class EffectSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del banco degli effetti sonori e del mixer.
+
+    Values:
+        DIRECTORY (str): Cartella delle clip degli effetti, identificate dal nome del file.
+        EXTENSIONS (tuple): Formati delle clip caricate.
+        VOICES (int): Canali del mixer riservati agli effetti.
+        FIRST_CHANNEL (int): Primo canale del mixer degli effetti (0 e 1 sono dei brani del client).
+        MAX_SECONDS (float): Durata massima di una clip: quelle più lunghe non vengono caricate.
+        MIXER_FREQUENCY (int): Frequenza di campionamento del mixer (Hz).
+        MIXER_BUFFER (int): Campioni del buffer del mixer: più è piccolo, minore è la latenza.
+    """
+    DIRECTORY = "../user/effects/"                   # Ad esempio horn.wav -> effetto "horn"
+    EXTENSIONS = (".wav", ".ogg", ".mp3", ".flac")
+    VOICES = 8                                       # Effetti riproducibili contemporaneamente
+    FIRST_CHANNEL = 2
+    MAX_SECONDS = 10.0
+    MIXER_FREQUENCY = 44100
+    MIXER_BUFFER = 512                               # Circa 12 ms a 44.1 kHz
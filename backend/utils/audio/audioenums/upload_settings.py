@@ -0,0 +1,29 @@
+"""
+Nome: upload_settings.py
+
+Descrizione: 
+Questo modulo definisce un'enumerazione con i limiti del protocollo di caricamento audio a blocchi.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class UploadSettings(enum.Enum):
+    """
+    Enum che contiene i limiti del caricamento dei file audio.
+    
+    Values:
+        CHUNK_SIZE (int): Dimensione consigliata di un blocco binario (byte).
+        MAX_MESSAGE_SIZE (int): Dimensione massima di un singolo messaggio WebSocket (byte).
+        MAX_UPLOAD_SIZE (int): Dimensione massima di un file audio caricato (byte).
+        STALE_UPLOAD_SECONDS (int): Secondi di inattività dopo i quali un caricamento incompleto viene eliminato.
+    """
+    CHUNK_SIZE = 256 * 1024                 # 256 KiB per blocco
+    MAX_MESSAGE_SIZE = 1024 * 1024          # 1 MiB per messaggio (blocco + intestazione, o JSON)
+    MAX_UPLOAD_SIZE = 200 * 1024 * 1024     # 200 MiB per file
+    STALE_UPLOAD_SECONDS = 60 * 60          # Un'ora senza blocchi
@@ -0,0 +1,191 @@
+"""
+Modulo: effect_bank
+
+Descrizione:
+Banco degli effetti sonori (clacson, segnali acustici, avviamento del motore, ...) a bassa latenza.
+
+All'avvio del server le clip brevi della cartella degli effetti vengono decodificate una sola volta
+e restano in memoria: ogni effetto è identificato dal nome del file senza estensione
+(`horn.wav` -> "horn"). Gli effetti vengono riprodotti su un gruppo di canali del mixer riservato
+(da `FIRST_CHANNEL`, separato dai canali 0 e 1 dei brani del client):
+- un effetto già in riproduzione viene riavviato sullo stesso canale, così che la ripetizione
+  di un tasto non occupi tutti i canali;
+- altrimenti viene usato un canale libero;
+- se tutti i canali sono occupati viene sottratto il canale dell'effetto avviato da più tempo.
+
+Far partire un effetto non richiede decodifica né accessi al disco: la latenza fino all'uscita è
+dominata dal buffer del mixer (`EffectSettings.MIXER_BUFFER`).
+
+Esempio di utilizzo:
+    bank = EffectBank("../user/effects/")
+    await bank.preload()
+    bank.play("horn")
+
+Dipendenze:
+- asyncio per la decodifica fuori dall'event loop (`builtin`).
+- logging per il monitoraggio delle clip caricate (`builtin`).
+- time per l'ordine di avvio degli effetti (`builtin`).
+- pygame per la decodifica e la riproduzione (`pygame`).
+- utils.audio.AudioUtils per l'inizializzazione del mixer.
+- utils.metrics.registry per le metriche del banco.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+import pygame
+from utils.audio.AudioUtils import init_mixer
+from utils.audio.audioenums.effect_settings import EffectSettings
+from utils.metrics.registry import REGISTRY
+
+_TRIGGERS = REGISTRY.counter("lego_effect_plays_total", "Effetti sonori avviati")
+_STOLEN = REGISTRY.counter("lego_effect_voices_stolen_total", "Effetti interrotti per liberare un canale")
+
+
+class EffectBank:
+    """
+    Clip degli effetti decodificate in memoria e gruppo di canali del mixer con cui riprodurle.
+
+    Attributes:
+        directory (Path): Cartella delle clip.
+        voices (int): Canali del mixer riservati agli effetti.
+        buffer (int): Campioni del buffer del mixer.
+        effects (dict): Clip caricate {identificativo: pygame.mixer.Sound}.
+        _channels (list): Canali del gruppo.
+        _playing (list): Per ogni canale (identificativo dell'effetto, istante di avvio), o None.
+        plays (int): Effetti avviati.
+        stolen (int): Effetti interrotti per liberare un canale.
+    """
+
+    def __init__(self, directory: str = EffectSettings.DIRECTORY.value, voices: int = EffectSettings.VOICES.value,
+                 buffer: int = EffectSettings.MIXER_BUFFER.value):
+        """
+        Prepara il banco; le clip vengono caricate con `preload()` o `load()`.
+
+        Args:
+            directory (str, opzionale): Cartella delle clip (default: "../user/effects/").
+            voices (int, opzionale): Canali del mixer riservati agli effetti (default: 8).
+            buffer (int, opzionale): Campioni del buffer del mixer, se non è già inizializzato (default: 512).
+        """
+        self.directory = Path(directory)
+        self.voices = max(1, int(voices))
+        self.buffer = buffer
+        self.effects = {}
+        self._channels = []
+        self._playing = []
+        self.plays = 0
+        self.stolen = 0
+
+    async def preload(self) -> int:
+        """
+        Versione asincrona di `load`: inizializzazione del mixer e decodifica vengono eseguite fuori
+        dall'event loop.
+
+        Returns:
+            int: Numero di effetti caricati.
+        """
+        return await asyncio.to_thread(self.load)
+
+    def load(self) -> int:
+        """
+        Inizializza il mixer e il gruppo di canali e decodifica le clip della cartella.
+        Le clip non valide o più lunghe di `EffectSettings.MAX_SECONDS` vengono ignorate.
+
+        Returns:
+            int: Numero di effetti caricati.
+        """
+        init_mixer(self.buffer)
+        first = EffectSettings.FIRST_CHANNEL.value
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), first + self.voices))
+        pygame.mixer.set_reserved(first + self.voices)  # Nessun canale del gruppo viene assegnato automaticamente
+        self._channels = [pygame.mixer.Channel(first + index) for index in range(self.voices)]
+        self._playing = [None] * self.voices
+
+        files = sorted(self.directory.iterdir()) if self.directory.is_dir() else []
+        for path in files:
+            if path.suffix.lower() not in EffectSettings.EXTENSIONS.value:
+                continue
+            try:
+                sound = pygame.mixer.Sound(str(path))
+            except pygame.error as e:
+                logging.warning(f"Effetto sonoro '{path.name}' non caricato: {e}")
+                continue
+            if sound.get_length() > EffectSettings.MAX_SECONDS.value:
+                logging.warning(f"Effetto sonoro '{path.name}' ignorato: più lungo di {EffectSettings.MAX_SECONDS.value:g} secondi.")
+                continue
+            self.effects[path.stem.lower()] = sound
+
+        logging.info(f"Banco degli effetti: {len(self.effects)} effetti su {self.voices} canali ({', '.join(self.effects) or 'nessuno'}).")
+        return len(self.effects)
+
+    def play(self, effect: str, volume: float = 1.0) -> bool:
+        """
+        Avvia un effetto, riavviandolo se è già in riproduzione.
+
+        Args:
+            effect (str): Identificativo dell'effetto.
+            volume (float, opzionale): Volume da 0 a 1 (default: 1).
+
+        Returns:
+            bool: False se l'effetto non esiste.
+        """
+        sound = self.effects.get(effect)
+        if sound is None or not self._channels:
+            return False
+
+        voice = self._allocate(effect)
+        channel = self._channels[voice]
+        channel.play(sound)
+        channel.set_volume(min(max(volume, 0.0), 1.0))
+        self._playing[voice] = (effect, time.monotonic())
+        self.plays += 1
+        _TRIGGERS.inc()
+        return True
+
+    def _allocate(self, effect: str) -> int:
+        """
+        Sceglie il canale dell'effetto: quello su cui è già in riproduzione, un canale libero oppure
+        il canale dell'effetto avviato da più tempo.
+
+        Returns:
+            int: Indice del canale nel gruppo.
+        """
+        free = None
+        oldest = None
+        for voice, channel in enumerate(self._channels):
+            playing = self._playing[voice]
+            if playing is None or not channel.get_busy():
+                if free is None:
+                    free = voice
+                continue
+            if playing[0] == effect:
+                return voice
+            if oldest is None or playing[1] < self._playing[oldest][1]:
+                oldest = voice
+
+        if free is not None:
+            return free
+        self.stolen += 1
+        _STOLEN.inc()
+        return oldest
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce gli effetti caricati e l'uso dei canali.
+
+        Returns:
+            dict: {"effects", "voices", "busy", "plays", "stolen", "bufferMs"}
+        """
+        frequency = (pygame.mixer.get_init() or (EffectSettings.MIXER_FREQUENCY.value,))[0]
+        return {
+            "effects": sorted(self.effects),
+            "voices": self.voices,
+            "busy": sum(channel.get_busy() for channel in self._channels),
+            "plays": self.plays,
+            "stolen": self.stolen,
+            "bufferMs": round(self.buffer / frequency * 1000, 1),
+        }
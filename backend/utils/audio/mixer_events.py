@@ -0,0 +1,143 @@
+"""
+Modulo: mixer_events
+
+Descrizione:
+Notifica della fine della riproduzione dei canali del mixer di pygame, tramite eventi.
+
+Ogni canale sorvegliato riceve un tipo di evento dedicato (`Channel.set_endevent`): il mixer lo
+accoda quando il canale termina la riproduzione. Un unico task dell'event loop, condiviso da tutti
+i canali, legge la coda degli eventi a intervalli brevi e chiama la funzione registrata per il
+canale; il task resta attivo solo finché c'è almeno un canale sorvegliato.
+
+La coda degli eventi di pygame richiede il sottosistema video: se non è già inizializzato viene
+avviato con il driver "dummy", che non apre finestre e non richiede un display. Se nemmeno questo
+è possibile, lo stesso task controlla lo stato dei canali sorvegliati (`get_busy`); dato che
+`pygame.mixer.music.get_busy()` è falso anche durante la pausa, chi registra il canale può indicare
+come riconoscere la pausa (`paused`), così che una pausa non venga scambiata per la fine.
+
+Esempio di utilizzo:
+    MIXER_EVENTS.notify_end(1, pygame.mixer.Channel(1), on_end)
+
+Dipendenze:
+- asyncio per il task di lettura degli eventi (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- os per la scelta del driver video (`builtin`).
+- pygame per gli eventi del mixer (`pygame`).
+- utils.audio.audioenums.audio_settings per l'intervallo di lettura.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+import os
+import pygame
+from utils.audio.audioenums.audio_settings import AudioSettings
+
+
+class MixerEventPump:
+    """
+    Task unico che consegna gli eventi di fine riproduzione dei canali del mixer.
+
+    Attributes:
+        interval (float): Secondi tra due letture della coda degli eventi.
+        _event_types (dict): Tipo di evento assegnato a ogni canale {indice del canale: tipo}.
+        _watches (dict): Canali sorvegliati {indice del canale: (canale, funzione da chiamare, funzione di pausa)}.
+        _events (bool | None): True se la coda degli eventi è disponibile, None se non ancora verificato.
+        _task (asyncio.Task | None): Task di lettura degli eventi.
+    """
+
+    def __init__(self, interval: float = AudioSettings.EVENT_PUMP_SECONDS.value):
+        """
+        Inizializza il lettore degli eventi; il task parte alla prima registrazione.
+
+        Args:
+            interval (float, opzionale): Secondi tra due letture della coda degli eventi (default: 0.02).
+        """
+        self.interval = interval
+        self._event_types = {}
+        self._watches = {}
+        self._events = None
+        self._task = None
+
+    def notify_end(self, index: int, channel, callback, paused=None) -> None:
+        """
+        Chiama `callback()` una sola volta, alla fine della riproduzione in corso sul canale.
+        Una nuova registrazione per lo stesso canale sostituisce la precedente.
+
+        Args:
+            index (int): Indice del canale del mixer.
+            channel (pygame.mixer.Channel): Il canale da sorvegliare.
+            callback (callable): Funzione senza argomenti chiamata alla fine della riproduzione.
+            paused (callable, opzionale): Funzione senza argomenti che restituisce True se la
+                riproduzione è in pausa: finché è in pausa la fine non viene rilevata.
+        """
+        if self._events is None:
+            self._events = self._init_events()
+
+        if self._events:
+            if index not in self._event_types:
+                self._event_types[index] = pygame.event.custom_type()
+            channel.set_endevent(self._event_types[index])
+
+        self._watches[index] = (channel, callback, paused)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="mixer-events")
+
+    def cancel(self, index: int) -> None:
+        """
+        Annulla la notifica di fine riproduzione del canale, se registrata.
+
+        Args:
+            index (int): Indice del canale del mixer.
+        """
+        self._watches.pop(index, None)
+
+    def _init_events(self) -> bool:
+        """
+        Inizializza la coda degli eventi di pygame, se necessario.
+
+        Returns:
+            bool: True se la coda degli eventi è disponibile.
+        """
+        if pygame.display.get_init():
+            return True
+        try:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            pygame.display.init()
+            return True
+        except pygame.error as e:
+            logging.warning(f"Coda degli eventi di pygame non disponibile ({e}): la fine della riproduzione viene rilevata dallo stato dei canali.")
+            return False
+
+    async def _run(self) -> None:
+        """
+        Legge gli eventi del mixer finché c'è almeno un canale sorvegliato.
+        """
+        while self._watches:
+            await asyncio.sleep(self.interval)
+            try:
+                if self._events:
+                    ended = {event.type for event in pygame.event.get()}
+                    finished = [index for index in self._watches if self._event_types.get(index) in ended]
+                else:
+                    finished = [index for index, (channel, _, paused) in self._watches.items()
+                                if not channel.get_busy() and not (paused and paused())]
+            except pygame.error as e:
+                logging.error(f"Errore durante la lettura degli eventi del mixer: {e}")
+                continue
+
+            for index in finished:
+                channel, callback, _ = self._watches[index]
+                # L'evento arriva anche quando il canale viene fermato e subito riavviato
+                if channel.get_busy():
+                    continue
+                del self._watches[index]
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Errore nella gestione della fine della riproduzione del canale {index}: {e}")
+
+
+MIXER_EVENTS = MixerEventPump()  # Lettore condiviso: i canali del mixer sono globali
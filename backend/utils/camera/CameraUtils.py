@@ -11,35 +11,55 @@ Dipendenze:
 - cv2 per l'elaborazione delle immagini (`opencv-python`).
 - NumPy per la manipolazione delle immagini (`numpy`).
 - asyncio per la gestione delle operazioni asincrone (`asyncio`).
-- base64 per la codifica delle immagini in stringhe trasmissibili via __websocket (`builtin`).
-- json per la gestione della comunicazione dei dati (`builtin`).
+- utils.protocol.codec per la serializzazione dei messaggi inviati al client.
+- utils.protocol.frames e stream_negotiation per il formato dei frame e i parametri negoziati con il client.
 - logging per il monitoraggio delle operazioni (`logging`).
 - os e pathlib per la gestione dei file (`builtin`) (`pathlib`).
 - datetime per la registrazione temporale delle acquisizioni (`builtin`).
+- time per la misura del frame rate effettivo (`builtin`).
 - shutil per la gestione dei file di output (`builtin`).
+- utils.metrics.registry per le metriche dello streaming.
+- websockets per la chiusura della connessione durante lo streaming (`websockets`).
 
 Autore: Zs
 Data di Creazione: 02-04-2025
 """
 
 import cv2
-import base64
 import asyncio
-import json
 import logging
 import os
+import time
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 import shutil
+from websockets.exceptions import ConnectionClosed
 from utils.camera.cameraenums.night_mode import NightMode
+from utils.protocol.codec import encode
+from utils.protocol.frames import build_frame_message
+from utils.protocol.stream_negotiation import StreamParams, default_stream
+from utils.protocol.protocolenums.frame_codec import FrameCodec
+from utils.protocol.protocolenums.stream_settings import StreamSettings
+from utils.protocol.protocolenums.send_priority import SendPriority
+from utils.metrics.registry import REGISTRY
+
+_FRAMES_SENT = REGISTRY.counter("lego_frames_sent_total", "Frame video accodati per l'invio al pilota")
+_FRAME_ENCODE_MS = REGISTRY.histogram("lego_frame_encode_ms", "Tempo di codifica di un frame: ridimensionamento, compressione e messaggio (ms)")
+
+# Estensione e parametro di qualità di OpenCV per ogni formato dei frame
+_ENCODERS = {
+    FrameCodec.JPEG: (".jpg", int(cv2.IMWRITE_JPEG_QUALITY)),
+    FrameCodec.WEBP: (".webp", int(cv2.IMWRITE_WEBP_QUALITY)),
+}
+
 
 class CameraUtils:
     """
     Classe per la gestione della videocamera e della trasmissione video tramite __websocket.
 
     Attributi:
-        __websocket (websockets): Connessione websocket con il client.
+        __websocket (SendScheduler): Scheduler di invio della connessione con il client.
         _camera_index (int): Indice della videocamera da utilizzare.
         __cap (cv2.VideoCapture): Istanza della videocamera per acquisire i frame.
         _is_streaming (bool): Indica se il server sta trasmettendo i frame al client.
@@ -47,34 +67,43 @@ class CameraUtils:
         _want_photo (bool): Indica se il client ha richiesto una foto.
         __out (cv2.VideoWriter | None): Oggetto per la registrazione del video (se attiva).
         _night_mode (NightMode): Modalità notturna attiva/disattiva.
-        _monitor_max_hz (int): Frequenza di aggiornamento del monitor del client.
+        _stream (StreamParams): Parametri dello streaming negoziati con il client (fps, dimensione, formato, trasporto).
         _zoom_factor (float): Fattore di zoom per la trasmissione delle immagini.
+        _fps (int): Frame rate effettivo dello streaming, misurato ogni secondo.
+        _stream_task (asyncio.Task | None): Task del ciclo di streaming, se avviato.
         calibration_data (dict): Dati di calibrazione della videocamera.
         map1 (numpy.ndarray): Mappa di distorsione per la correzione dell'immagine.
         map2 (numpy.ndarray): Seconda mappa di distorsione per la correzione dell'immagine.
     """
 
-    def __init__(self, websocket, camera_index:int = 0, monitor_max_hz:int = 60, camera_dimension: tuple[int, int] = (640, 480)):
+    def __init__(self, websocket, camera_index:int = 0, monitor_max_hz:int = 60, camera_dimension: tuple[int, int] = (640, 480), capture=None):
         """
         Inizializza la videocamera e configura le variabili di stato.
 
         Args:
-            websocket (websockets): Connessione websocket per la trasmissione dati.
+            websocket (SendScheduler): Scheduler di invio della connessione per la trasmissione dati.
             camera_index (int, opzionale): Indice della videocamera da utilizzare (default: 0).
-            _monitor_max_hz (int, opzionale): Frequenza di aggiornamento del client (default: 60).
+            monitor_max_hz (int, opzionale): Frame al secondo inviati finché il client non dichiara
+                le proprie capacità con "hello" (default: 60).
             camera_dimension (tuple[int, int], opzionale): Dimensioni massime supportate dalla videocamera (default: (640, 480)).
+            capture (opzionale): Sorgente dei frame con l'interfaccia di `cv2.VideoCapture`, ad esempio
+                una `SyntheticCapture` per benchmark e test di carico (default: videocamera `camera_index`).
         """
         self.__websocket = websocket  # Connessione __websocket con il client
         self._camera_index = camera_index
-        self.__cap = cv2.VideoCapture(self._camera_index)  # Istanza della videocamera
+        self.__cap = capture if capture is not None else cv2.VideoCapture(self._camera_index)  # Istanza della videocamera
         self._camera_width, self._camera_height = camera_dimension # Lunghezza e altezza massima supportata dalla videocamera del client.
         self._is_streaming = False  # Stato della trasmissione video
         self._is_recording = False  # Stato della registrazione video
         self._want_photo = False  # Stato della richiesta di una foto
         self.__out = None  # Oggetto per la registrazione video (inizialmente nullo)
         self._night_mode = NightMode.OFF  # Modalità notturna (OFF per default)
-        self._monitor_max_hz = monitor_max_hz  # Frequenza di aggiornamento del client
+        self._stream = default_stream(camera_dimension, monitor_max_hz)  # Parametri dello streaming verso il client
         self._zoom_factor = 1.0  # Valore di zoom per la trasmissione video
+        self._fps = 0  # Frame rate effettivo misurato sull'ultimo secondo di streaming
+        self._fps_frames = 0  # Frame inviati nella finestra di misura corrente
+        self._fps_window_start = time.monotonic()  # Inizio della finestra di misura corrente
+        self._stream_task = None  # Task del ciclo di streaming, per arrestarlo alla chiusura della sessione
         self.calibration_data = self._load_calibration()  # Caricamento dati di calibrazione
         self.map1, self.map2 = self._init_distortion_maps()  # Creazione delle mappe di distorsione
 
@@ -176,6 +205,7 @@ class CameraUtils:
             StreamingException: Se si verifica un errore durante la lettura, elaborazione o invio dei frame.
         """
         self._is_streaming = True
+        self._stream_task = asyncio.current_task()
 
         try:
             if not self.__cap or not self.__cap.isOpened():
@@ -196,12 +226,21 @@ class CameraUtils:
                     if self._night_mode == NightMode.ON:
                         processed_frame = self._apply_night_mode(processed_frame)
 
-                    # Conversione in RGB e codifica JPEG
-                    rgb_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-                    success, buffer = cv2.imencode(".jpg", rgb_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])
+                    # Riduzione alla finestra del client, conversione in RGB e codifica
+                    encode_start = time.perf_counter()
+                    stream = self._stream
+                    stream_frame = processed_frame
+                    if stream_frame.shape[1] > stream.width or stream_frame.shape[0] > stream.height:
+                        stream_frame = cv2.resize(stream_frame, (stream.width, stream.height), interpolation=cv2.INTER_AREA)
+                    rgb_frame = cv2.cvtColor(stream_frame, cv2.COLOR_BGR2RGB)
+                    extension, quality_flag = _ENCODERS[stream.codec]
+                    success, buffer = cv2.imencode(extension, rgb_frame, [quality_flag, StreamSettings.QUALITY.value])
 
                     if not success:
-                        raise ValueError("Impossibile codificare il frame in JPEG.")
+                        raise ValueError(f"Impossibile codificare il frame in {stream.codec.value.upper()}.")
+
+                    message = build_frame_message(buffer, stream.codec, stream.binary)
+                    _FRAME_ENCODE_MS.observe((time.perf_counter() - encode_start) * 1000)
 
                     # Scrittura su file se registrazione attiva
                     if self._is_recording and self.__out:
@@ -213,18 +252,20 @@ class CameraUtils:
                         await self._save_photo(processed_frame)
 
                     # Invio al client via websocket
-                    await self.__websocket.send(json.dumps({
-                        "ok": True,
-                        "streaming": True,
-                        "frame": base64.b64encode(buffer).decode("utf-8"),
-                    }))
+                    await self.__websocket.send(message, SendPriority.MEDIA)
+                    self._count_frame()
+                    _FRAMES_SENT.inc()
 
-                    await asyncio.sleep(1 / self._monitor_max_hz)
+                    await asyncio.sleep(1 / stream.fps)
 
                 except cv2.error as e:
                     logging.error(f"Errore OpenCV durante lo streaming: {e}")
                     break
 
+                except (ConnectionClosed, ConnectionError) as e:
+                    logging.info(f"Connessione del client chiusa: streaming interrotto ({e}).")
+                    break
+
                 except Exception as e:
                     logging.error(f"Errore imprevisto durante lo streaming: {e}")
                     break
@@ -239,8 +280,79 @@ class CameraUtils:
                 self.__out.release()
 
             self._is_streaming = False
+            self._fps = 0
             logging.info("Streaming video terminato.")
 
+    async def stop_video_streaming(self) -> None:
+        """
+        Arresta lo streaming e rilascia la videocamera e l'eventuale registrazione, così che il
+        dispositivo sia libero per il controller della sessione successiva.
+        """
+        self._is_streaming = False
+        task = self._stream_task
+        if task and not task.done() and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._stream_task = None
+
+        # Videocamera mai usata per lo streaming: il ciclo non l'ha rilasciata
+        if self.__cap and self.__cap.isOpened():
+            self.__cap.release()
+        if self.__out:
+            self.__out.release()
+            self.__out = None
+        self._is_recording = False
+
+    def _count_frame(self) -> None:
+        """
+        Conta un frame inviato e aggiorna il frame rate effettivo una volta al secondo.
+        """
+        self._fps_frames += 1
+        now = time.monotonic()
+        elapsed = now - self._fps_window_start
+
+        if elapsed >= 1.0:
+            self._fps = round(self._fps_frames / elapsed)
+            self._fps_frames = 0
+            self._fps_window_start = now
+
+    @property
+    def is_streaming(self) -> bool:
+        """
+        Indica se il ciclo di streaming è attivo.
+        """
+        return self._is_streaming
+
+    @property
+    def camera_size(self) -> tuple:
+        """
+        Dimensioni (larghezza, altezza) dei frame della videocamera.
+        """
+        return self._camera_width, self._camera_height
+
+    def configure_stream(self, stream: StreamParams) -> None:
+        """
+        Applica i parametri dello streaming negoziati con il client, anche a streaming avviato:
+        il frame successivo viene già inviato con la nuova dimensione, formato e trasporto.
+
+        Args:
+            stream (StreamParams): Parametri negoziati (`stream_negotiation.negotiate`).
+        """
+        self._stream = stream
+        logging.info(f"Streaming video: {stream.width}x{stream.height}, {stream.fps} fps, {stream.codec.value}, trasporto {stream.transport}.")
+
+    def get_telemetry(self) -> dict:
+        """
+        Restituisce lo stato dello streaming da pubblicare al client.
+
+        Returns:
+            dict: {"streaming": streaming attivo, "fps": frame rate effettivo}
+        """
+        return {"streaming": self._is_streaming, "fps": self._fps}
+
 
     def set_zoom_value(self, value: float):
         """
@@ -489,7 +601,7 @@ class CameraUtils:
             shutil.rmtree(temp_dir) # elimino la cartella temporanea
 
             relative_path = final_path.relative_to(base_dir)
-            await self.__websocket.send(json.dumps({
+            await self.__websocket.send(encode({
                 "ok": True, "videoPath": str(relative_path)
             }))
             logging.info(f"Video salvato correttamente: {final_path}")
@@ -536,7 +648,7 @@ class CameraUtils:
 
         relative_photo_path = photo_path.relative_to(base_dir)
 
-        await self.__websocket.send(json.dumps({
+        await self.__websocket.send(encode({
             "ok": True, "photoPath": str(relative_photo_path)
         }))
 
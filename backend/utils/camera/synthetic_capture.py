@@ -0,0 +1,96 @@
+"""
+Modulo: synthetic_capture
+
+Descrizione:
+Sorgente video sintetica con la stessa interfaccia di `cv2.VideoCapture` usata da `CameraUtils`
+(`isOpened`, `read`, `get`, `release`). Genera frame BGR in movimento a una frequenza fissa, così
+che streaming, benchmark e test di carico possano essere eseguiti senza una videocamera reale.
+
+Come una videocamera reale, `read()` è bloccante: attende l'istante del frame successivo.
+
+Dipendenze:
+- cv2 per le costanti delle proprietà di acquisizione (`opencv-python`).
+- NumPy per la generazione dei frame (`numpy`).
+- time per la cadenza dei frame (`builtin`).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import time
+import cv2
+import numpy as np
+
+
+class SyntheticCapture:
+    """
+    Videocamera simulata.
+
+    Attributes:
+        width (int): Larghezza dei frame (pixel).
+        height (int): Altezza dei frame (pixel).
+        fps (float): Frequenza dei frame; 0 per restituire i frame senza attesa.
+        frames_read (int): Numero di frame restituiti da `read`.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0):
+        """
+        Inizializza la sorgente sintetica.
+
+        Args:
+            width (int, opzionale): Larghezza dei frame (default: 640).
+            height (int, opzionale): Altezza dei frame (default: 480).
+            fps (float, opzionale): Frequenza dei frame (default: 30).
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames_read = 0
+        self._opened = True
+        self._next_frame_at = time.monotonic()
+
+        # Sfondo a gradiente precalcolato: per ogni frame viene solo spostata una banda verticale
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        self._background = np.dstack([
+            np.tile(gradient, (height, 1)),
+            np.tile(gradient[::-1], (height, 1)),
+            np.full((height, width), 96, dtype=np.uint8)
+        ])
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self) -> tuple:
+        """
+        Restituisce il frame successivo, attendendo la cadenza configurata.
+
+        Returns:
+            tuple: (True, frame BGR numpy.ndarray) oppure (False, None) se la sorgente è chiusa.
+        """
+        if not self._opened:
+            return False, None
+
+        if self.fps > 0:
+            now = time.monotonic()
+            if now < self._next_frame_at:
+                time.sleep(self._next_frame_at - now)
+            self._next_frame_at = max(now, self._next_frame_at) + 1 / self.fps
+
+        frame = self._background.copy()
+        band = (self.frames_read * 8) % self.width
+        frame[:, band:band + 16] = 255
+        self.frames_read += 1
+        return True, frame
+
+    def get(self, prop: int) -> float:
+        """
+        Restituisce le proprietà di acquisizione lette da `CameraUtils` (fps e dimensioni).
+        """
+        return {
+            cv2.CAP_PROP_FPS: float(self.fps),
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.height),
+        }.get(prop, 0.0)
+
+    def release(self) -> None:
+        self._opened = False
@@ -0,0 +1,32 @@
+"""
+Modulo: log_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (LogSettings) con le impostazioni di default del
+logging del server: rotazione del file di log e aggregazione dei messaggi ripetuti.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class LogSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del logging.
+
+    Values:
+        FILE_NAME (str): Nome del file di log, nella cartella di lavoro del server.
+        MAX_BYTES (int): Dimensione oltre la quale il file di log viene ruotato (byte).
+        BACKUP_COUNT (int): Numero di file di log ruotati conservati (log.txt.1, log.txt.2, ...).
+        RATE_LIMIT_SECONDS (float): Finestra in cui un messaggio ripetuto viene scritto una sola volta (s).
+        RATE_LIMIT_MAX_KEYS (int): Numero massimo di messaggi distinti tracciati dal filtro.
+    """
+    FILE_NAME = "log.txt"
+    MAX_BYTES = 5 * 1024 * 1024  # 5 MiB
+    BACKUP_COUNT = 3
+    RATE_LIMIT_SECONDS = 10.0
+    RATE_LIMIT_MAX_KEYS = 1024
@@ -0,0 +1,103 @@
+"""
+Modulo: rate_limit_filter
+
+Descrizione:
+Filtro di logging che aggrega i messaggi ripetuti.
+
+Alcuni messaggi vengono emessi a ogni frame video o a ogni comando (ad esempio "Modalità notturna
+applicata correttamente."): scriverli tutti produce decine di righe al secondo senza aggiungere
+informazioni. Il filtro lascia passare la prima occorrenza di ogni messaggio e scarta le
+successive per `RATE_LIMIT_SECONDS` secondi; la prima occorrenza dopo la finestra viene scritta
+con il numero di ripetizioni scartate, ad esempio:
+
+    Modalità notturna applicata correttamente. (ripetuto 299 volte negli ultimi 10 s)
+
+Un messaggio è identificato da logger, livello e testo (il modello, prima della sostituzione degli
+argomenti). Gli errori non vengono mai filtrati.
+
+Dipendenze:
+- logging per la classe base del filtro (`builtin`).
+- threading per l'accesso concorrente da più thread (`builtin`).
+- time per la finestra di aggregazione (`builtin`).
+- utils.logs.logsenums.log_settings per le impostazioni di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import logging
+import threading
+import time
+from utils.logs.logsenums.log_settings import LogSettings
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Filtro che scrive al massimo una volta per finestra ogni messaggio ripetuto.
+
+    Attributes:
+        window (float): Durata della finestra di aggregazione (secondi).
+        max_keys (int): Numero massimo di messaggi distinti tracciati.
+        min_passthrough_level (int): Livello da cui i messaggi non vengono mai filtrati.
+        _windows (dict): {(logger, livello, testo): [inizio finestra, ripetizioni scartate]}.
+        suppressed (int): Numero totale di messaggi scartati.
+    """
+
+    def __init__(self, window: float = LogSettings.RATE_LIMIT_SECONDS.value,
+                 max_keys: int = LogSettings.RATE_LIMIT_MAX_KEYS.value,
+                 min_passthrough_level: int = logging.ERROR):
+        """
+        Inizializza il filtro.
+
+        Args:
+            window (float, opzionale): Durata della finestra in secondi (default: 10).
+            max_keys (int, opzionale): Messaggi distinti tracciati (default: 1024).
+            min_passthrough_level (int, opzionale): Livello da cui i messaggi passano sempre (default: ERROR).
+        """
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self.min_passthrough_level = min_passthrough_level
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide se il record va scritto, aggiungendo al testo il numero di ripetizioni scartate.
+
+        Returns:
+            bool: True se il record va scritto.
+        """
+        if record.levelno >= self.min_passthrough_level:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+
+        with self._lock:
+            state = self._windows.get(key)
+            if state is not None and now - state[0] < self.window:
+                state[1] += 1
+                self.suppressed += 1
+                return False
+
+            repeated = state[1] if state is not None else 0
+            if state is None and len(self._windows) >= self.max_keys:
+                self._expire(now)
+            self._windows[key] = [now, 0]
+
+        if repeated:
+            record.msg = f"{record.msg} (ripetuto {repeated} volte negli ultimi {self.window:.0f} s)"
+        return True
+
+    def _expire(self, now: float) -> None:
+        """
+        Dimentica i messaggi la cui finestra è scaduta; se non ce ne sono, svuota la tabella.
+        Le ripetizioni scartate di questi messaggi non vengono più riportate.
+        """
+        expired = [key for key, (start, _) in self._windows.items() if now - start >= self.window]
+        for key in expired:
+            del self._windows[key]
+        if not expired:
+            self._windows.clear()
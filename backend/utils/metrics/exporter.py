@@ -0,0 +1,99 @@
+"""
+Modulo: exporter
+
+Descrizione:
+Endpoint HTTP minimo che espone il registro delle metriche nel formato testuale di Prometheus.
+Gira sullo stesso event loop del server WebSocket e, per default, ascolta solo su 127.0.0.1.
+
+Esempio:
+    curl http://127.0.0.1:9108/metrics
+
+Dipendenze:
+- asyncio per il server TCP (`builtin`).
+- logging per il monitoraggio delle richieste non valide (`builtin`).
+- utils.metrics.registry per il registro delle metriche.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+from utils.metrics.registry import REGISTRY, MetricsRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsExporter:
+    """
+    Server HTTP di sola lettura per le metriche.
+
+    Attributes:
+        registry (MetricsRegistry): Registro esportato.
+        host (str): Indirizzo di ascolto.
+        port (int): Porta di ascolto.
+        _server (asyncio.Server | None): Server TCP attivo.
+    """
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+        """
+        Inizializza l'endpoint.
+
+        Args:
+            port (int): Porta di ascolto.
+            host (str, opzionale): Indirizzo di ascolto (default: "127.0.0.1").
+            registry (MetricsRegistry, opzionale): Registro da esportare (default: registro condiviso).
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self) -> None:
+        """
+        Avvia l'ascolto delle richieste.
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logging.info(f"Metriche disponibili su http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Risponde a una singola richiesta HTTP: GET /metrics restituisce le metriche, ogni altro
+        percorso restituisce 404.
+        """
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Le intestazioni della richiesta non sono necessarie: vengono solo consumate
+            while await asyncio.wait_for(reader.readline(), timeout=5) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] in ("GET", "HEAD") and parts[1].split("?")[0] in ("/metrics", "/"):
+                body = self.registry.render_prometheus().encode("utf-8")
+                status = "200 OK"
+                if parts[0] == "HEAD":
+                    body_to_send = b""
+                else:
+                    body_to_send = body
+            else:
+                body = body_to_send = b"Not Found\n"
+                status = "404 Not Found"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body_to_send
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logging.debug(f"Richiesta di metriche non valida: {e}")
+        finally:
+            writer.close()
+
+    async def stop(self) -> None:
+        """
+        Chiude l'endpoint.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
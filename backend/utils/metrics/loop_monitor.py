@@ -0,0 +1,329 @@
+"""
+Modulo: loop_monitor
+
+Descrizione:
+Monitor della latenza dell'event loop e rilevatore dei blocchi.
+
+Molte operazioni bloccanti girano ancora sull'unico event loop del server (lettura della
+telecamera, scrittura delle foto, decodifica dei suoni, ...): quando una di queste impiega troppo
+tempo, video, telemetria e comandi si fermano tutti insieme. Il monitor è composto da due parti:
+
+- un battito asincrono che si riprogramma ogni `INTERVAL_SECONDS` e misura di quanto si è
+  svegliato in ritardo rispetto al previsto (ritardo di scheduling);
+- un thread di guardia che, quando il battito è in ritardo oltre la soglia, cattura lo stack del
+  thread dell'event loop (`sys._current_frames`) e il task in esecuzione in quel momento.
+
+Quando il battito riparte, la durata del blocco viene attribuita al punto catturato e aggregata
+per task e riga di codice; i punti peggiori sono disponibili tramite `get_stats()` (messaggio
+"get-stats") e il log. Il costo è di una ventina di risvegli al secondo per ciascuna delle due
+parti, quindi il monitor può restare attivo in produzione.
+
+Esempio di utilizzo:
+    monitor = LoopMonitor(stall_threshold_ms=100)
+    monitor.start()          # Dall'interno dell'event loop
+    ...
+    print(monitor.get_stats()["offenders"])
+
+Dipendenze:
+- asyncio per il battito e l'identificazione del task in esecuzione (`builtin`).
+- logging per la segnalazione dei blocchi (`builtin`).
+- sys per la cattura dello stack del thread dell'event loop (`builtin`).
+- threading per il thread di guardia (`builtin`).
+- time per la misura del ritardo (`builtin`).
+- traceback per l'estrazione dello stack (`builtin`).
+- utils.metrics.registry per le metriche di latenza.
+- utils.metrics.metricsenums.loop_monitor_settings per le impostazioni di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from utils.metrics.registry import REGISTRY
+from utils.metrics.metricsenums.loop_monitor_settings import LoopMonitorSettings
+
+_LAG_MS = REGISTRY.histogram("lego_loop_lag_ms", "Ritardo di scheduling dell'event loop (ms)")
+_LAG_MAX_MS = REGISTRY.gauge("lego_loop_lag_max_ms", "Ritardo massimo dell'event loop dall'avvio (ms)")
+_STALLS = REGISTRY.counter("lego_loop_stalls_total", "Blocchi dell'event loop oltre la soglia")
+
+_PROJECT_DIR = str(Path(__file__).resolve().parents[2])  # Cartella backend
+_ASYNCIO_DIR = str(Path(asyncio.__file__).parent)
+
+
+@dataclass(slots=True)
+class _Sample:
+    """
+    Stack catturato dal thread di guardia durante un blocco.
+    """
+    deadline: float
+    task: str
+    location: str
+    stack: list
+
+
+@dataclass(slots=True)
+class Offender:
+    """
+    Punto di codice che ha bloccato l'event loop, aggregato per task e riga.
+
+    Attributes:
+        task (str): Nome del task e della coroutine in esecuzione, oppure "callback".
+        location (str): Riga del progetto più interna nello stack ("file:riga in funzione").
+        count (int): Numero di blocchi attribuiti.
+        total_ms (float): Durata totale dei blocchi (millisecondi).
+        max_ms (float): Durata del blocco peggiore (millisecondi).
+        last_at (float): Istante (epoch) dell'ultimo blocco.
+        stack (list): Stack dell'ultimo blocco, dal frame più esterno al più interno.
+    """
+    task: str
+    location: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_at: float = 0.0
+    stack: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "task": self.task,
+            "location": self.location,
+            "count": self.count,
+            "totalMs": round(self.total_ms, 1),
+            "maxMs": round(self.max_ms, 1),
+            "lastAt": round(self.last_at, 3),
+            "stack": self.stack,
+        }
+
+
+class LoopMonitor:
+    """
+    Misura la latenza dell'event loop e registra i punti che lo bloccano.
+
+    Attributes:
+        interval (float): Periodo del battito (secondi).
+        stall_threshold_ms (float): Ritardo oltre il quale viene registrato un blocco (ms).
+        max_offenders (int): Numero massimo di punti di blocco distinti conservati.
+        _loop (asyncio.AbstractEventLoop | None): Event loop monitorato.
+        _loop_thread_id (int | None): Identificativo del thread dell'event loop.
+        _deadline (float): Istante (monotonic) in cui è atteso il prossimo battito.
+        _sample (_Sample | None): Stack catturato per il blocco in corso.
+        _offenders (dict): Punti di blocco {(task, riga): Offender}.
+        _lock (threading.Lock): Protegge `_deadline` e `_sample`, condivisi con il thread di guardia.
+    """
+
+    def __init__(self, stall_threshold_ms: float = LoopMonitorSettings.STALL_THRESHOLD_MS.value,
+                 interval: float = LoopMonitorSettings.INTERVAL_SECONDS.value,
+                 max_offenders: int = LoopMonitorSettings.MAX_OFFENDERS.value):
+        """
+        Inizializza il monitor.
+
+        Args:
+            stall_threshold_ms (float, opzionale): Soglia di blocco in millisecondi (default: 100).
+            interval (float, opzionale): Periodo del battito in secondi (default: 0.05).
+            max_offenders (int, opzionale): Punti di blocco distinti conservati (default: 32).
+        """
+        self.interval = interval
+        self.stall_threshold_ms = stall_threshold_ms
+        self.max_offenders = max_offenders
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._deadline = 0.0
+        self._sample = None
+        self._offenders = {}
+        self._beats = 0
+        self._stalls = 0
+        self._last_ms = 0.0
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self) -> None:
+        """
+        Avvia il battito e il thread di guardia. Va chiamato dall'interno dell'event loop da monitorare.
+        """
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._deadline = time.monotonic() + self.interval
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+        logging.info(f"Monitor dell'event loop attivo (soglia di blocco {self.stall_threshold_ms:.0f} ms).")
+
+    async def stop(self) -> None:
+        """
+        Arresta il battito e attende la fine del thread di guardia.
+        """
+        self._stopping.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        """
+        Battito dell'event loop: misura a ogni risveglio il ritardo rispetto all'istante previsto.
+        """
+        while True:
+            expected = time.monotonic() + self.interval
+            with self._lock:
+                self._deadline = expected
+            await asyncio.sleep(self.interval)
+
+            lag_ms = max(0.0, (time.monotonic() - expected) * 1000)
+            self._beats += 1
+            self._last_ms = lag_ms
+            self._total_ms += lag_ms
+            _LAG_MS.observe(lag_ms)
+            if lag_ms > self._max_ms:
+                self._max_ms = lag_ms
+                _LAG_MAX_MS.set(lag_ms)
+
+            if lag_ms >= self.stall_threshold_ms:
+                self._record_stall(expected, lag_ms)
+
+    def _watch(self) -> None:
+        """
+        Thread di guardia: se il battito è in ritardo oltre la soglia cattura lo stack dell'event
+        loop, una sola volta per ogni blocco.
+        """
+        threshold = self.stall_threshold_ms / 1000
+        period = min(self.interval, threshold / 2)
+
+        while not self._stopping.wait(period):
+            with self._lock:
+                deadline = self._deadline
+                captured = self._sample is not None and self._sample.deadline == deadline
+            if captured or time.monotonic() - deadline < threshold:
+                continue
+
+            sample = self._capture(deadline)
+            if sample is not None:
+                with self._lock:
+                    if self._deadline == deadline:  # Il battito potrebbe essere ripartito nel frattempo
+                        self._sample = sample
+
+    def _capture(self, deadline: float) -> _Sample | None:
+        """
+        Cattura lo stack del thread dell'event loop e il task in esecuzione.
+
+        Returns:
+            _Sample | None: Il campione, oppure None se il thread non è più attivo.
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+
+        stack = traceback.extract_stack(frame, limit=LoopMonitorSettings.STACK_DEPTH.value)
+        del frame
+
+        # I frame dell'event loop stesso (fino all'esecuzione della callback) non sono informativi
+        inner = [i for i, entry in enumerate(stack) if entry.filename.startswith(_ASYNCIO_DIR)]
+        if inner and inner[-1] + 1 < len(stack):
+            stack = stack[inner[-1] + 1:]
+
+        # La riga attribuita è la più interna appartenente al progetto (non alle librerie)
+        culprit = next((entry for entry in reversed(stack) if entry.filename.startswith(_PROJECT_DIR)), stack[-1])
+        location = f"{Path(culprit.filename).name}:{culprit.lineno} in {culprit.name}"
+
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            task_name = "callback"
+        else:
+            coro = task.get_coro()
+            task_name = f"{task.get_name()} ({getattr(coro, '__qualname__', '?')})"
+
+        return _Sample(
+            deadline=deadline,
+            task=task_name,
+            location=location,
+            stack=[f"{Path(entry.filename).name}:{entry.lineno} in {entry.name}" for entry in stack]
+        )
+
+    def _record_stall(self, deadline: float, lag_ms: float) -> None:
+        """
+        Attribuisce un blocco appena terminato al punto catturato dal thread di guardia.
+        """
+        with self._lock:
+            sample = self._sample if self._sample is not None and self._sample.deadline == deadline else None
+            self._sample = None
+
+        if sample is None:
+            # Blocco terminato prima che il thread di guardia potesse osservarlo
+            sample = _Sample(deadline=deadline, task="sconosciuto", location="sconosciuto", stack=[])
+
+        self._stalls += 1
+        _STALLS.inc()
+
+        key = (sample.task, sample.location)
+        offender = self._offenders.get(key)
+        if offender is None:
+            if len(self._offenders) >= self.max_offenders:
+                # Viene dimenticato il punto con il blocco peggiore più breve
+                del self._offenders[min(self._offenders, key=lambda k: self._offenders[k].max_ms)]
+            offender = self._offenders[key] = Offender(task=sample.task, location=sample.location)
+            if sample.stack:
+                logging.warning("Stack del blocco dell'event loop:\n  " + "\n  ".join(sample.stack))
+
+        offender.count += 1
+        offender.total_ms += lag_ms
+        offender.max_ms = max(offender.max_ms, lag_ms)
+        offender.last_at = time.time()
+        offender.stack = sample.stack
+
+        logging.warning(f"Event loop bloccato per {lag_ms:.0f} ms: {sample.location} (task {sample.task})")
+
+    def get_offenders(self, limit: int = 10) -> list:
+        """
+        Restituisce i punti di blocco peggiori, ordinati per durata massima.
+
+        Args:
+            limit (int, opzionale): Numero massimo di punti restituiti (default: 10).
+
+        Returns:
+            list: Lista di dizionari con task, riga, numero e durata dei blocchi e ultimo stack.
+        """
+        worst = sorted(self._offenders.values(), key=lambda o: o.max_ms, reverse=True)
+        return [offender.as_dict() for offender in worst[:limit]]
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce la latenza dell'event loop e i punti di blocco peggiori.
+
+        Returns:
+            dict: Statistiche del monitor.
+        """
+        return {
+            "running": self.running,
+            "thresholdMs": self.stall_threshold_ms,
+            "beats": self._beats,
+            "lagMs": {
+                "last": round(self._last_ms, 2),
+                "avg": round(self._total_ms / self._beats, 2) if self._beats else 0.0,
+                "max": round(self._max_ms, 2),
+            },
+            "stalls": self._stalls,
+            "offenders": self.get_offenders(),
+        }
@@ -0,0 +1,30 @@
+"""
+Modulo: loop_monitor_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (LoopMonitorSettings) con le impostazioni di default
+del monitor di latenza dell'event loop.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class LoopMonitorSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del monitor dell'event loop.
+
+    Values:
+        INTERVAL_SECONDS (float): Periodo del battito con cui viene misurato il ritardo di scheduling (s).
+        STALL_THRESHOLD_MS (int): Durata oltre la quale un blocco dell'event loop viene registrato (ms).
+        MAX_OFFENDERS (int): Numero massimo di punti di blocco distinti conservati.
+        STACK_DEPTH (int): Numero massimo di frame conservati per ogni stack catturato.
+    """
+    INTERVAL_SECONDS = 0.05   # 20 battiti al secondo
+    STALL_THRESHOLD_MS = 100  # Circa 3 frame video a 30 fps
+    MAX_OFFENDERS = 32
+    STACK_DEPTH = 12
@@ -0,0 +1,274 @@
+"""
+Modulo: registry
+
+Descrizione:
+Registro delle metriche di esecuzione del server: contatori, gauge e istogrammi, con etichette
+opzionali. I moduli che producono le misure (server, scheduler di invio, telecamera, motori,
+audio) dichiarano le proprie metriche a livello di modulo sul registro condiviso `REGISTRY` e le
+aggiornano direttamente; le grandezze già mantenute altrove (client connessi, cache audio)
+vengono lette al momento dell'esportazione tramite funzioni di callback.
+
+Il registro può essere esportato nel formato testuale di Prometheus oppure come dizionario
+(messaggio "get-stats").
+
+Esempio di utilizzo:
+    FRAMES = REGISTRY.counter("lego_frames_sent_total", "Frame video inviati")
+    FRAMES.inc()
+    QUEUE = REGISTRY.gauge("lego_send_queue_depth", "Messaggi in coda", ("priority",))
+    QUEUE.labels("media").inc()
+
+Le metriche vengono aggiornate dal thread dell'event loop e non usano lock.
+
+Dipendenze:
+- bisect per la ricerca del bucket degli istogrammi (`builtin`).
+- math per il bucket infinito (`builtin`).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import bisect
+import math
+
+DEFAULT_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self, value: float = 0.0):
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # L'ultimo bucket è +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    """
+    Metrica con etichette: ogni combinazione di valori delle etichette ha il proprio valore.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self.labels()  # Le metriche senza etichette vengono esportate anche prima del primo aggiornamento
+
+    def _new_value(self):
+        return _Value()
+
+    def labels(self, *values):
+        """
+        Restituisce il valore associato a una combinazione di etichette, creandolo se necessario.
+
+        Raises:
+            ValueError: Se il numero di valori non corrisponde alle etichette dichiarate.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"La metrica '{self.name}' richiede le etichette {self.labelnames}")
+            child = self._children[values] = self._new_value()
+        return child
+
+    def samples(self):
+        """
+        Restituisce le coppie (valori delle etichette, valore) della metrica.
+        """
+        return self._children.items()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class _CallbackMetric:
+    """
+    Metrica il cui valore viene letto da una funzione al momento dell'esportazione.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, function):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = ()
+        self.function = function
+
+    def samples(self):
+        return (((), _Value(float(self.function()))),)
+
+
+class MetricsRegistry:
+    """
+    Insieme delle metriche del processo.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metrica '{metric.name}' già registrata con un tipo diverso")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        """
+        Dichiara (o restituisce, se già dichiarato) un contatore.
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        """
+        Dichiara (o restituisce, se già dichiarato) un gauge.
+        """
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS_MS) -> Histogram:
+        """
+        Dichiara (o restituisce, se già dichiarato) un istogramma.
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_callback(self, name: str, documentation: str, function, kind: str = "gauge") -> None:
+        """
+        Registra una metrica letta da `function()` a ogni esportazione.
+        Una nuova registrazione con lo stesso nome sostituisce la precedente.
+
+        Args:
+            name (str): Nome della metrica.
+            documentation (str): Descrizione della metrica.
+            function (callable): Funzione senza argomenti che restituisce il valore numerico.
+            kind (str, opzionale): "gauge" o "counter" (default: "gauge").
+        """
+        self._metrics[name] = _CallbackMetric(name, documentation, kind, function)
+
+    @staticmethod
+    def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @staticmethod
+    def _format_number(value: float) -> str:
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(float(value)) if value != int(value) else str(int(value))
+
+    def render_prometheus(self) -> str:
+        """
+        Esporta tutte le metriche nel formato testuale di Prometheus (versione 0.0.4).
+
+        Returns:
+            str: Il documento di esportazione.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            for values, sample in metric.samples():
+                if isinstance(sample, _HistogramValue):
+                    cumulative = 0
+                    for bound, count in zip(sample.bounds + (math.inf,), sample.counts):
+                        cumulative += count
+                        labels = self._format_labels(metric.labelnames, values, f'le="{self._format_number(bound)}"')
+                        lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                    labels = self._format_labels(metric.labelnames, values)
+                    lines.append(f"{metric.name}_sum{labels} {self._format_number(sample.sum)}")
+                    lines.append(f"{metric.name}_count{labels} {sample.count}")
+                else:
+                    labels = self._format_labels(metric.labelnames, values)
+                    lines.append(f"{metric.name}{labels} {self._format_number(sample.value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """
+        Esporta tutte le metriche come dizionario serializzabile in JSON.
+
+        Le metriche con etichette diventano dizionari {"valore1,valore2": valore}; gli istogrammi
+        riportano numero di osservazioni, somma e media.
+
+        Returns:
+            dict: {nome metrica: valore}
+        """
+        result = {}
+        for metric in self._metrics.values():
+            values = {}
+            for labels, sample in metric.samples():
+                if isinstance(sample, _HistogramValue):
+                    value = {
+                        "count": sample.count,
+                        "sum": round(sample.sum, 3),
+                        "avg": round(sample.sum / sample.count, 3) if sample.count else 0.0,
+                    }
+                else:
+                    value = sample.value
+                values[",".join(map(str, labels))] = value
+
+            result[metric.name] = values if metric.labelnames else values.get("", 0.0)
+        return result
+
+
+REGISTRY = MetricsRegistry()
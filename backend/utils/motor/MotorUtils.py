@@ -9,26 +9,52 @@ avanti e indietro, la rotazione e la velocità. Supporta anche la gestione del m
 con funzionalità per la sterzata progressiva e il fermo graduale del motore. Le comunicazioni con il 
 client avvengono tramite WebSocket, consentendo il controllo remoto del motore.
 
+I comandi (avanti, indietro, stop, sterzata) impostano solo i valori obiettivo di velocità e angolo:
+un unico ciclo di controllo a frequenza fissa per veicolo porta gradualmente velocità e angolo verso
+gli obiettivi e aggiorna i motori, così che nessun comando crei o cancelli task. Velocità e angolo
+seguono profili a jerk limitato (`utils.motor.motion_profile`), calcolati dal tempo trascorso con
+accelerazioni e frenate precalcolate per marcia, turbo e intensità del freno.
+
+I motori vengono aggiornati tramite un backend (`utils.motor.motor_backend`): PiStorms sul veicolo
+oppure motori simulati; a ogni tick in cui velocità o angolo cambiano viene consegnato al backend
+un unico comando per trazione e sterzo.
+
+Se presente, il registratore di volo (`utils.telemetry.flight_recorder`) riceve un campione dello
+stato dei motori a ogni tick e un record per ogni comando ricevuto.
+
 Dipendenze:
 - asyncio per la gestione delle operazioni asincrone.
-- json per la gestione della comunicazione dei dati tramite WebSocket.
+- utils.protocol.codec per la serializzazione dei dati inviati tramite WebSocket.
 - utils.motor.motorenums per le definizioni di direzione, sterzata, velocità e controlli di sterzata.
+- utils.motor.motion_profile per i profili di movimento a jerk limitato.
+- utils.motor.motor_backend per la scrittura dei comandi sui motori.
+- utils.telemetry per il registratore di volo.
+- utils.metrics.registry per il conteggio dei passi delle rampe e dei ritardi del ciclo di controllo.
 
 Autore: Zs
 Data di Creazione: 02-04-2025
 """
 
 import asyncio
-import json
 import websockets
 import time
 import websockets
 import logging
 from utils.motor.motorenums.direction import Direction
 from utils.motor.motorenums.turn import Turn
-from utils.motor.motorenums.speed_controls import SpeedControls
 from utils.motor.motorenums.turn_controls import TurnControls
 from utils.motor.motorenums.gears import Gear
+from utils.motor.motorenums.control_loop_settings import ControlLoopSettings
+from utils.motor.motorenums.motion_profile_settings import MotionProfileSettings
+from utils.motor.motion_profile import MotionProfiles, ProfileAxis
+from utils.motor.motor_backend import MotorCommand, create_motor_backend
+from utils.protocol.codec import encode
+from utils.telemetry.telemetryenums.flight_event import FlightEvent
+from utils.metrics.registry import REGISTRY
+
+_RAMP_STEPS = REGISTRY.counter("lego_motor_ramp_steps_total", "Passi delle rampe di velocità e sterzata, per rampa", ("ramp",))
+_PROFILES = MotionProfiles()  # Tabelle condivise da tutti i veicoli
+_CONTROL_OVERRUNS = REGISTRY.counter("lego_motor_control_overruns_total", "Tick del ciclo di controllo dei motori in ritardo di oltre un periodo")
 
 
 class MotorUtils:
@@ -36,41 +62,61 @@ class MotorUtils:
     Classe per la gestione del motore LEGO tramite PiStorms.
 
     Attributes:
-        websocket (WebSocket): Connessione WebSocket per inviare aggiornamenti.
+        websocket (SendScheduler): Scheduler di invio della connessione, usato per inviare aggiornamenti.
         _is_started (bool): Indica lo stato di accensione/spegnimento del motore del LEGO
-        __motor_1 (oggetto): Rappresenta il primo motore fisico usato per far avanzare o retrocedere il LEGO.
-        __motor_2 (oggetto): Rappresenta il secondo motore fisico usato per far avanzare o retrocedere il LEGO.
-        __turn_motor (oggetto): Rappresenta il terzo motore fisico usato per far sterzare il LEGO.
-        _move_speed (int): Velocità attuale del motore.
-        _turn_angle (int): Indica l'angolo di rotazione del motore.
+        backend (MotorBackend): Backend che scrive i comandi sui motori (PiStorms o simulato).
+        recorder (FlightRecorder | None): Registratore di volo della sessione, se attivo.
+        _move_speed (float): Velocità attuale del motore.
+        _turn_angle (float): Indica l'angolo di rotazione del motore.
+        _target_speed (int): Velocità obiettivo impostata dai comandi di movimento.
+        _target_angle (int): Angolo di sterzata obiettivo impostato dai comandi di sterzata.
+        _brake_from (float): Velocità (in valore assoluto) all'inizio della frenata in corso.
+        _acceleration (float): Accelerazione massima del movimento in corso (unità/s).
+        _speed_axis (ProfileAxis): Profilo a jerk limitato della velocità.
+        _turn_axis (ProfileAxis): Profilo a jerk limitato dell'angolo di sterzata.
+        tick_hz (float): Frequenza del ciclo di controllo (Hz).
+        _control_task (asyncio.Task | None): Task del ciclo di controllo.
         _is_moving (bool): Indica se il motore è in movimento.
         _is_turning (bool): Indica se il motore è in rotazione.
-        _UPDATE_VELOCITY_TIME_OFFSET (int): Indica il tempo di attesa per ogni ciclo nei metodi _turn e _unturn.
+        _motion_state (str): Fase del movimento ("forward", "backward", "stopping", "idle").
+        _steering_state (str): Fase della sterzata ("left", "right", "straightening", "idle").
     """
 
-    def __init__(self, websocket):
+    def __init__(self, websocket, tick_hz: float = ControlLoopSettings.DEFAULT_TICK_HZ.value, backend=None, recorder=None):
         """
         Inizializza la classe MotorUtils con il WebSocket e le variabili di stato.
+        Il ciclo di controllo viene avviato da `start_control_loop()`.
 
         Args:
-            websocket (WebSocket): Connessione WebSocket per la comunicazione con il client.
+            websocket (SendScheduler): Scheduler di invio della connessione con il client.
+            tick_hz (float, opzionale): Frequenza del ciclo di controllo in Hz (default: 50).
+            backend (MotorBackend, opzionale): Backend dei motori; se assente viene creato quello
+                        predefinito (`MotorBackendSettings.DEFAULT_BACKEND`).
+            recorder (FlightRecorder, opzionale): Registratore di volo; se assente la telemetria
+                        non viene registrata.
         """
-        # from PiStorms import PiStorms
         self.websocket = websocket 
         self._is_started = False 
         self._last_activation = None 
-        # self._psm = PiStorms()   
-        # self.__motor_1 = self._psm.BAM1
-        # self.__motor_2 = self._psm.BAM2
-        # self.__turn_motor = self._psm.BBM1
-        self._motor_gear = Gear.NEUTRAL 
+        self.backend = backend if backend is not None else create_motor_backend()
+        self.recorder = recorder
+        self._motor_gear = Gear.NEUTRAL.value
         self._turbo_value = 0
-        self._brake_intensity = 1
+        self._brake_intensity = 0
         self._move_speed = 0  
         self._turn_angle = 0 
         self._is_moving = False  
         self._is_turning = False  
-        self._UPDATE_VELOCITY_TIME_OFFSET = 0.3
+        self._motion_state = "idle"  # Stato del movimento pubblicato al client (forward, backward, stopping, idle)
+        self._steering_state = "idle"  # Stato della sterzata pubblicato al client (left, right, straightening, idle)
+        self._target_speed = 0
+        self._target_angle = 0
+        self._brake_from = 0
+        self._acceleration = _PROFILES.acceleration(self._motor_gear, 0)
+        self._speed_axis = ProfileAxis(MotionProfileSettings.SPEED_JERK.value)
+        self._turn_axis = ProfileAxis(MotionProfileSettings.TURN_JERK.value, limit=TurnControls.MAXIMUM_TURN_ANGLE.value)
+        self.tick_hz = max(1.0, min(float(tick_hz), ControlLoopSettings.MAX_TICK_HZ.value))
+        self._control_task = None
 
     async def toggle_motor_status(self) -> None:
         """
@@ -78,6 +124,8 @@ class MotorUtils:
 
         Se il motore è attivo, viene spento e viene calcolato il tempo di attivazione
         dell'ultimo intervallo. Se è spento, viene attivato e il tempo viene azzerato.
+        Allo spegnimento il veicolo frena e lo sterzo torna al centro: il ciclo di controllo
+        non deve continuare a inseguire gli obiettivi impostati quando il motore era acceso.
 
         Returns:
             None
@@ -92,10 +140,14 @@ class MotorUtils:
             self._last_activation = current_time
 
         self._is_started = not self._is_started
+        self._record(FlightEvent.MOTOR_ON if self._is_started else FlightEvent.MOTOR_OFF)
+        if not self._is_started:
+            self.stop()
+            self.unturn()
 
         try:
             if self.websocket and activation_time is not None and hasattr(self, '_max_speed_reached'):
-                await self.websocket.send(json.dumps({
+                await self.websocket.send(encode({
                     "ok": True,
                     "activationTime": activation_time,
                     "maxSpeed": self._max_speed_reached
@@ -105,6 +157,21 @@ class MotorUtils:
         except Exception as e:
             logging.error(f"An error occurred while sending data via WebSocket: {e}")
 
+    def get_telemetry(self) -> dict:
+        """
+        Restituisce lo stato dei motori da pubblicare al client.
+
+        Returns:
+            dict: Velocità, angolo di sterzata, marcia e fasi di movimento e sterzata.
+        """
+        return {
+            "speed": round(self._move_speed),
+            "angle": round(self._turn_angle),
+            "gear": self._motor_gear,
+            "motion": self._motion_state,
+            "steering": self._steering_state
+        }
+
     def get_motor_status(self) -> bool:
         """
         Restituisce lo stato booleano dei motori.
@@ -113,122 +180,74 @@ class MotorUtils:
             bool: True se i motori sono attivi, False altrimenti.
         """
         return self._is_started
+
+    def get_gear(self) -> str:
+        """
+        Restituisce la marcia inserita.
+
+        Returns:
+            str: La marcia corrente ("R", "N", "1", "2", "3", "4").
+        """
+        return self._motor_gear
+
+    def get_turbo(self) -> int:
+        """
+        Restituisce il valore di turbo corrente, già convertito in incremento di velocità.
+
+        Returns:
+            int: L'incremento di velocità massima dovuto al turbo.
+        """
+        return self._turbo_value
     
-    async def turn(self, side: Turn, delay: float = 0.2, turn_increment: int = 1) -> None:
-        """ 
-        Regola progressivamente l'angolo di sterzata per girare a sinistra o a destra.  
-        - Se è già in corso una sterzata, la funzione esce immediatamente per evitare esecuzioni multiple.  
-        - Modifica l'angolo di sterzata incrementandolo/decrementandolo progressivamente fino al massimo consentito.  
-        - Interrompe l'incremento se il tasto viene rilasciato (`_stop_turning` diventa `True`).  
-        - Invia l'angolo aggiornato al client tramite WebSocket.  
-        - Si assicura di non inviare dati ridondanti se l'angolo non cambia.  
-
-        Args:  
-        - `side` (Turn): Direzione della sterzata (sinistra o destra).  
-        - `delay` (float, default 0.2): Ritardo tra gli incrementi dell'angolo.  
-        - `turn_increment` (int, default 1): Incremento dell'angolo ad ogni iterazione.  
+    def turn(self, side: Turn) -> None:
+        """
+        Imposta come obiettivo la sterzata massima a sinistra o a destra.
+        Il ciclo di controllo porta progressivamente l'angolo verso l'obiettivo; l'angolo aggiornato
+        viene pubblicato al client dalla telemetria di stato (`get_telemetry`).
+
+        Args:
+            side (Turn): Direzione della sterzata (sinistra o destra).
 
         Returns:
             None
         """
-
         if not self._is_started:
             return
 
-        self._is_turning = True
-        self._stop_turning = False
-        turn_increment = -turn_increment if side == Turn.LEFT else turn_increment
+        self._record(FlightEvent.TURN_LEFT if side == Turn.LEFT else FlightEvent.TURN_RIGHT)
         max_angle = TurnControls.MAXIMUM_TURN_ANGLE.value
+        self._target_angle = -max_angle if side == Turn.LEFT else max_angle
+        self._is_turning = True
+        self._steering_state = "left" if side == Turn.LEFT else "right"
 
-        while not self._stop_turning and self._turn_angle != max_angle:
-            new_angle = self._turn_angle + turn_increment
-            new_angle = max(-max_angle, min(new_angle, max_angle))
-
-            if new_angle == self._turn_angle:
-                break
-
-            self._turn_angle = new_angle
-
-            # Controllo del motore di sterzo (opzionale)
-            # self.__turn_motor.runDegs(degs=turn_increment, speed=TurnControls.TURN_VELOCITY.value)
-
-            try:
-                await self.websocket.send(json.dumps({
-                    "ok": True,
-                    "motorangle": self._turn_angle,
-                    "direction": "left" if side == Turn.LEFT else "right"
-                }))
-            except Exception as e:
-                print(f"Errore durante l'invio dei dati al client: {e}")
-
-            await asyncio.sleep(delay=delay)
-
-        self._is_turning = False
-
-    async def unturn(self, delay: float = 0.2) -> None:
+    def unturn(self) -> None:
         """
-        Gradualmente riporta l'angolo di rotazione (`self._turn_angle`) a 0.
-
-        Se l'angolo è già 0, la funzione termina immediatamente. Altrimenti,
-        decrementa o incrementa l'angolo di 1 unità alla volta, a seconda del
-        segno dell'angolo corrente. Dopo ogni modifica, invia l'angolo aggiornato
-        al client tramite il websocket.
-
-        La funzione utilizza `asyncio.sleep(0.1)` per introdurre una pausa tra
-        ogni aggiornamento dell'angolo, permettendo una transizione graduale.
-
-        Una volta che l'angolo raggiunge 0, invia un messaggio finale al client
-        con l'angolo impostato a 0.
-
-        Stampa messaggi di debug per indicare quando l'angolo è già 0 e quando
-        è stato riportato a 0.
+        Imposta come obiettivo lo sterzo al centro: il ciclo di controllo riporta gradualmente
+        l'angolo a 0 e, raggiunto lo 0, lo stato della sterzata torna a "idle".
+        Eseguito anche a motore spento: riportare lo sterzo al centro è sempre sicuro ed è parte
+        dello spegnimento e dell'arresto di sicurezza.
 
         Returns:
             None
         """
-        if not self._is_started:
-            return  # Evita esecuzioni se il motore non è acceso
-        
+        self._record(FlightEvent.UNTURN)
+        self._target_angle = 0
         if self._turn_angle == 0:
-            return  # Esci immediatamente se già a zero
-        
-        self._stop_turning = True
+            self._is_turning = False
+            self._steering_state = "idle"
+            return
+
         self._is_turning = True
+        self._steering_state = "straightening"
 
-        turn_increment = 1 if self._turn_angle > 0 else -1
-
-        while self._turn_angle != 0:
-            # Decremento o incremento progressivamente l'angolo
-            if abs(self._turn_angle) <= abs(turn_increment):
-                is_last_step = True
-                self._turn_angle = 0
-            else:
-                self._turn_angle -= turn_increment
-
-            """
-            self.__turn_motor.runDegs(degs=turn_increment, speed=TurnControls.TURN_VELOCITY.value, brakeOnCompletion=is_last_step)
-            """
-            # Invia l'angolo aggiornato al client
-            await self.websocket.send(json.dumps({
-                "ok": True,
-                "motorangle": self._turn_angle,
-                "straightening": True
-                }))
-            
-            await asyncio.sleep(delay=delay)
-        
-        self._is_turning = False
-    
-    async def move_forward(self) -> None:
+    def move_forward(self) -> None:
         """
-        Avvia il movimento del motore in avanti, incrementando automaticamente la velocità fino al limite massimo.
-
-        La funzione controlla se la marcia corrente consente il movimento in avanti.
-        Se sì, attiva il movimento e inizia ad aumentare gradualmente la velocità a intervalli regolari,
-        fino a raggiungere il valore massimo consentito per la marcia attuale, eventualmente maggiorato dal valore turbo.
+        Imposta come obiettivo la velocità massima in avanti consentita dalla marcia corrente,
+        eventualmente maggiorata dal valore turbo.
 
-        Durante ogni incremento, viene inviato un messaggio tramite WebSocket contenente la velocità attuale
-        e la velocità massima raggiunta fino a quel momento.
+        La funzione controlla se la marcia corrente consente il movimento in avanti; il ciclo di
+        controllo aumenta poi gradualmente la velocità fino all'obiettivo, aggiornando la velocità
+        massima raggiunta.
 
         Returns:
             None
@@ -237,108 +256,174 @@ class MotorUtils:
         if self._motor_gear not in {Gear.FIRST.value, Gear.SECOND.value, Gear.THIRD.value, Gear.FOURTH.value}:
             return
 
+        self._target_speed = _PROFILES.max_speed(self._motor_gear, self._turbo_value)
+        self._acceleration = _PROFILES.acceleration(self._motor_gear, self._turbo_value)
         self._is_moving = True
-        max_speed = SpeedControls.MAXIMUM_PER_GEAR.value * int(self._motor_gear) + self._turbo_value
-
-        while self._move_speed < max_speed and self._move_speed < SpeedControls.MAXIMUM_VALOCITY_FORWARD.value:
-            self._move_speed += 1
+        self._motion_state = "forward"
+        self._record(FlightEvent.FORWARD)
 
-            if not hasattr(self, '_max_speed_reached') or self._move_speed > self._max_speed_reached:
-                self._max_speed_reached = self._move_speed
-
-            try:
-                await self.websocket.send(json.dumps({
-                    "ok": True,
-                    "motorspeed": self._move_speed,
-                    "direction": "forward"
-                }))
-            except Exception as e:
-                print(f"[ERRORE] WebSocket non ha inviato il dato: {e}")
-
-            await asyncio.sleep(self._UPDATE_VELOCITY_TIME_OFFSET)
-
-
-    async def move_backward(self) -> None:
+    def move_backward(self) -> None:
         """
         Metodo responsabile della retromarcia del veicolo
-        Decrementa gradualmente la velocità entro il limite per la retromarcia
-        
+        Imposta come obiettivo la velocità massima in retromarcia, raggiunta gradualmente dal ciclo di controllo.
+
         Returns:
-            int: Velocità attuale dopo l'aggiornamento.
+            None
         """
 
         if self._motor_gear != Gear.RETRO.value: # controllo che la marcia sia inserita in retro sennò non eseguo niente
             return
 
+        self._target_speed = _PROFILES.max_speed(self._motor_gear, self._turbo_value)
+        self._acceleration = _PROFILES.acceleration(self._motor_gear, self._turbo_value)
         self._is_moving = True
-        
-        while self._move_speed > -SpeedControls.MAXIMUM_VALOCITY_BACKWARD.value:
-
-            self._move_speed -= 1
-
-            if self.websocket:
-                try:
-                    # Invia il nuovo valore della velocità tramite WebSocket ad ogni ciclo
-                    await self.websocket.send(json.dumps({
-                        "ok": True,
-                        "motorspeed": self._move_speed,
-                        "direction": "backward"
-                    }))
-                except Exception as e:
-                    print(f"Errore durante l'invio dei dati al client: {e}")
+        self._motion_state = "backward"
+        self._record(FlightEvent.BACKWARD)
 
-            await asyncio.sleep(self._UPDATE_VELOCITY_TIME_OFFSET)
-
-    async def stop(self) -> None:
+    def stop(self) -> None:
         """
-        Riduce gradualmente la velocità del motore fino a fermarlo completamente.
-
-        La decelerazione è dinamica: più alta è la velocità attuale, più rapido è l'arresto iniziale.
-        Man mano che la velocità diminuisce, il rallentamento diventa più dolce.
-        L'intensità della frenata è modulata da `self._brake_intensity` (0-100), dove un valore più alto
-        corrisponde a una frenata più rapida.
-
-        Durante il processo, la nuova velocità viene inviata al client ad ogni variazione.
+        Imposta come obiettivo l'arresto del motore.
 
-        Raises:
-            Exception: se la connessione websocket viene chiusa inaspettatamente.
+        La decelerazione applicata dal ciclo di controllo è dinamica: cresce man mano che la velocità
+        residua diminuisce rispetto a quella di inizio frenata. L'intensità della frenata è modulata da
+        `self._brake_intensity` (0-100), dove un valore più alto corrisponde a una frenata più rapida.
         """
-        if self._move_speed == 0:
-            return
-
+        self._target_speed = 0
         if not self._is_moving:
             return
 
+        self._record(FlightEvent.STOP)
         self._is_moving = False
+        if self._move_speed == 0:
+            self._motion_state = "idle"
+            return
 
-        max_speed = abs(self._move_speed)
-        brake_factor = min(self._brake_intensity, 100) / 100
-        brake_factor = max(brake_factor, 0.05)
+        self._motion_state = "stopping"
+        self._brake_from = abs(self._move_speed)
 
-        while self._move_speed != 0:
-            speed_ratio = abs(self._move_speed) / max_speed
-            delay = self._UPDATE_VELOCITY_TIME_OFFSET + (0.6 * speed_ratio)
-            delay *= (1 - brake_factor) ** 1.5
+    def safety_stop(self) -> None:
+        """
+        Arresto di sicurezza, quando il pilota si disconnette o il suo collegamento è degradato: avvia
+        una frenata controllata (con l'intensità del freno impostata) e riporta lo sterzo al centro.
+        """
+        self._record(FlightEvent.SAFETY_STOP)
+        self.stop()
+        self.unturn()
 
-            if self._move_speed > 0:
-                self._move_speed = max(0, self._move_speed - 1)
-            else:
-                self._move_speed = min(0, self._move_speed + 1)
+    def start_control_loop(self) -> None:
+        """
+        Avvia il ciclo di controllo dei motori, il backend e il registratore di volo, se non sono già attivi.
+        """
+        self.backend.start()
+        if self.recorder is not None:
+            self.recorder.start()
+        if self._control_task is None or self._control_task.done():
+            self._control_task = asyncio.create_task(self._control_loop(), name="motor-control")
 
-            await self.websocket.send(json.dumps({
-                "ok": True,
-                "motorspeed": self._move_speed,
-                "stopping": True
-            }))
+    async def close(self) -> None:
+        """
+        Arresta il ciclo di controllo dei motori, il backend e il registratore di volo.
+        Prima di chiudere il backend viene scritto un ultimo comando che frena la trazione e riporta
+        lo sterzo al centro: i motori non mantengono l'ultima velocità impostata.
+        """
+        if self._control_task and not self._control_task.done():
+            self._control_task.cancel()
+            try:
+                await self._control_task
+            except asyncio.CancelledError:
+                pass
+
+        # I comandi scritti finora hanno ruotato lo sterzo dell'angolo arrotondato corrente
+        self.backend.submit(MotorCommand(speed=0, turn_degrees=-round(self._turn_angle), brake=True))
+        self._move_speed = self._target_speed = 0
+        self._turn_angle = self._target_angle = 0
+        self._is_moving = self._is_turning = False
+        self._motion_state = self._steering_state = "idle"
+
+        await asyncio.to_thread(self.backend.close)
+        if self.recorder is not None:
+            await asyncio.to_thread(self.recorder.close)
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le statistiche del backend dei motori e del registratore di volo.
+
+        Returns:
+            dict: Statistiche di scrittura del backend (ed eventuale stato simulato), con quelle
+                  del registratore in "recorder" se attivo.
+        """
+        stats = self.backend.get_stats()
+        if self.recorder is not None:
+            stats["recorder"] = self.recorder.get_stats()
+        return stats
 
-            await asyncio.sleep(delay)
+    def _record(self, event: FlightEvent) -> None:
+        """
+        Registra un comando nel registratore di volo, con lo stato corrente dei motori.
+        """
+        if self.recorder is not None:
+            self.recorder.event(event, self._move_speed, self._turn_angle, self._motor_gear, self._turbo_value, self._brake_intensity)
 
+    async def _control_loop(self) -> None:
+        """
+        Ciclo di controllo a frequenza fissa: a ogni tick porta velocità e angolo verso gli obiettivi,
+        in base al tempo effettivamente trascorso, e aggiorna i motori.
+        Se un tick arriva in ritardo di oltre un periodo, la cadenza viene riallineata.
+        """
+        period = 1 / self.tick_hz
+        last = deadline = time.monotonic()
         try:
-            await self.websocket.send(json.dumps({
-                "ok": True, "motorspeed": 0
-            }))
-        except websockets.exceptions.ConnectionClosedError as e:
-            raise Exception from e
+            while True:
+                deadline += period
+                await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+                now = time.monotonic()
+                if now - deadline > period:
+                    _CONTROL_OVERRUNS.inc()
+                    deadline = now
+                self._step(now - last)
+                last = now
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Errore imprevisto nel ciclo di controllo dei motori: {e}")
+
+    def _step(self, elapsed: float) -> None:
+        """
+        Esegue un passo del ciclo di controllo.
+
+        Args:
+            elapsed (float): Secondi trascorsi dal passo precedente.
+        """
+        previous_speed, previous_angle = round(self._move_speed), round(self._turn_angle)
+
+        if self._motion_state == "stopping":
+            max_rate = _PROFILES.deceleration(self._brake_intensity, abs(self._move_speed) / max(self._brake_from, 1))
+        else:
+            max_rate = self._acceleration
+        self._move_speed = self._speed_axis.step(self._move_speed, self._target_speed, max_rate, elapsed)
+        if self._move_speed > getattr(self, "_max_speed_reached", 0):
+            self._max_speed_reached = round(self._move_speed)
+
+        self._turn_angle = self._turn_axis.step(self._turn_angle, self._target_angle, MotionProfileSettings.TURN_RATE.value, elapsed)
+
+        if self._motion_state == "stopping" and self._move_speed == 0:
+            self._motion_state = "idle"
+        if self._steering_state == "straightening" and self._turn_angle == 0:
+            self._is_turning = False
+            self._steering_state = "idle"
+        elif self._turn_angle == self._target_angle:
+            self._is_turning = False
+
+        speed, angle = round(self._move_speed), round(self._turn_angle)
+        if speed != previous_speed:
+            _RAMP_STEPS.labels("stop" if self._motion_state in ("stopping", "idle") else self._motion_state).inc(abs(speed - previous_speed))
+        if angle != previous_angle:
+            _RAMP_STEPS.labels("unturn" if self._steering_state in ("straightening", "idle") else "turn").inc(abs(angle - previous_angle))
+        if speed != previous_speed or angle != previous_angle:
+            # Un solo comando per tick: trazione (entrambi i motori) e sterzo insieme
+            self.backend.submit(MotorCommand(speed, angle - previous_angle, brake=self._turn_angle == self._target_angle))
+        if self.recorder is not None:
+            self.recorder.sample(self._move_speed, self._turn_angle, self._motor_gear, self._turbo_value, self._brake_intensity)
 
     def set_gear(self, value: str) -> None:
         """
@@ -351,6 +436,7 @@ class MotorUtils:
             None.
         """
         self._motor_gear = value
+        self._record(FlightEvent.GEAR)
 
     def set_turbo(self, value: int) -> None:
         """
@@ -364,6 +450,7 @@ class MotorUtils:
         """
         mapped_value = round(value * 0.4) 
         self._turbo_value = mapped_value
+        self._record(FlightEvent.TURBO)
 
     def set_brake_value(self, value: int) -> None:
         """
@@ -375,10 +462,5 @@ class MotorUtils:
         Returns:
             None.
         """
-        mapped_value = round(value * 0.4, 1) 
-        self._brake_intensity = mapped_value
-
-
-    
-
-
+        self._brake_intensity = min(max(value, 0), 100)
+        self._record(FlightEvent.BRAKE)
@@ -0,0 +1,165 @@
+"""
+Modulo: motion_profile
+
+Descrizione:
+Profili di movimento a jerk limitato per velocità e sterzata.
+
+Velocità e angolo non avanzano più di un'unità per passo a intervalli fissi, ma vengono calcolati
+dal tempo trascorso: ogni asse (`ProfileAxis`) ha una propria velocità di variazione, che cresce e
+cala con un jerk limitato, così che accelerazioni, frenate e sterzate partano e si fermino senza
+scatti e rallentino in prossimità dell'obiettivo.
+
+I limiti dei profili non vengono ricalcolati a ogni tick: `MotionProfiles` precalcola con NumPy
+le tabelle di velocità massima e accelerazione per ogni marcia e valore di turbo, e la tabella
+della decelerazione per ogni intensità del freno e velocità residua della frenata.
+
+Esempio di utilizzo:
+    profiles = MotionProfiles()
+    axis = ProfileAxis(max_jerk=150.0)
+    speed = axis.step(speed, profiles.max_speed("2", 0), profiles.acceleration("2", 0), elapsed)
+
+Dipendenze:
+- math per il calcolo della velocità di avvicinamento (`builtin`).
+- numpy per il calcolo vettoriale delle tabelle dei profili.
+- utils.motor.motorenums per marce, limiti di velocità e parametri dei profili.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import math
+import numpy as np
+from utils.motor.motorenums.gears import Gear
+from utils.motor.motorenums.speed_controls import SpeedControls
+from utils.motor.motorenums.motion_profile_settings import MotionProfileSettings
+
+# Righe delle tabelle per marcia: la marcia neutra non ha un profilo di movimento
+_GEAR_ROWS = {Gear.RETRO.value: 0, Gear.FIRST.value: 1, Gear.SECOND.value: 2, Gear.THIRD.value: 3, Gear.FOURTH.value: 4}
+
+
+class MotionProfiles:
+    """
+    Tabelle precalcolate dei limiti dei profili di movimento.
+
+    Attributes:
+        max_speeds (np.ndarray): Velocità obiettivo [marcia, turbo]; negativa in retromarcia.
+        accelerations (np.ndarray): Accelerazione massima [marcia, turbo] (unità/s).
+        decelerations (np.ndarray): Decelerazione massima [intensità freno 0-100, velocità residua] (unità/s).
+    """
+
+    def __init__(self):
+        """
+        Calcola le tabelle a partire da `SpeedControls` e `MotionProfileSettings`.
+        """
+        settings = MotionProfileSettings
+        turbo = np.arange(settings.MAX_TURBO.value + 1, dtype=np.float64)
+        gears = np.arange(len(_GEAR_ROWS), dtype=np.float64)[:, None]  # 0 = retromarcia, 1-4 = marce avanti
+
+        self.max_speeds = np.minimum(SpeedControls.MAXIMUM_PER_GEAR.value * gears + turbo, SpeedControls.MAXIMUM_VALOCITY_FORWARD.value)
+        self.max_speeds[0, :] = -SpeedControls.MAXIMUM_VALOCITY_BACKWARD.value  # Il turbo non agisce in retromarcia
+
+        turbo_gain = 1 + settings.TURBO_ACCELERATION_GAIN.value * turbo / settings.MAX_TURBO.value
+        self.accelerations = settings.FIRST_GEAR_ACCELERATION.value * settings.GEAR_ACCELERATION_FALLOFF.value ** (gears - 1) * turbo_gain
+        self.accelerations[0, :] = settings.REVERSE_ACCELERATION.value
+
+        brake = np.linspace(0.0, 1.0, 101)[:, None]
+        remaining = np.linspace(0.0, 1.0, settings.BRAKE_RATIO_BINS.value)  # Velocità residua / velocità a inizio frenata
+        base = settings.BRAKE_MIN_DECELERATION.value + (settings.BRAKE_MAX_DECELERATION.value - settings.BRAKE_MIN_DECELERATION.value) * brake
+        self.decelerations = base * (1 + settings.BRAKE_CURVE.value * (1 - remaining))
+
+    def max_speed(self, gear: str, turbo: int) -> float:
+        """
+        Restituisce la velocità obiettivo per la marcia e il turbo indicati (0 in folle).
+        """
+        row = _GEAR_ROWS.get(gear)
+        return 0.0 if row is None else float(self.max_speeds[row, self._turbo_column(turbo)])
+
+    def acceleration(self, gear: str, turbo: int) -> float:
+        """
+        Restituisce l'accelerazione massima per la marcia e il turbo indicati (unità/s).
+        """
+        row = _GEAR_ROWS.get(gear, 1)
+        return float(self.accelerations[row, self._turbo_column(turbo)])
+
+    def deceleration(self, brake: int, remaining: float) -> float:
+        """
+        Restituisce la decelerazione massima della frenata.
+
+        Args:
+            brake (int): Intensità del freno (0-100).
+            remaining (float): Velocità residua rispetto a quella di inizio frenata (0-1).
+
+        Returns:
+            float: Decelerazione in unità di velocità al secondo.
+        """
+        row = min(max(int(brake), 0), 100)
+        column = round(min(max(remaining, 0.0), 1.0) * (self.decelerations.shape[1] - 1))
+        return float(self.decelerations[row, column])
+
+    def _turbo_column(self, turbo: int) -> int:
+        return min(max(int(turbo), 0), self.max_speeds.shape[1] - 1)
+
+
+class ProfileAxis:
+    """
+    Asse di movimento a jerk limitato (velocità dei motori o angolo di sterzata).
+
+    Attributes:
+        max_jerk (float): Variazione massima della velocità di variazione (unità/s²).
+        limit (float | None): Valore massimo in valore assoluto (fine corsa), se presente.
+        rate (float): Velocità di variazione corrente (unità/s).
+    """
+
+    def __init__(self, max_jerk: float, limit: float | None = None):
+        """
+        Inizializza l'asse fermo.
+
+        Args:
+            max_jerk (float): Variazione massima della velocità di variazione (unità/s²).
+            limit (float | None, opzionale): Fine corsa in valore assoluto; None se l'asse non ha
+                        limiti (default: None).
+        """
+        self.max_jerk = max_jerk
+        self.limit = limit
+        self.rate = 0.0
+
+    def step(self, value: float, target: float, max_rate: float, elapsed: float) -> float:
+        """
+        Avanza il valore verso l'obiettivo per il tempo trascorso.
+
+        La velocità di variazione tende a `max_rate`, ma viene ridotta in prossimità dell'obiettivo
+        quanto basta per arrivarci con velocità nulla; in ogni caso non cambia più di
+        `max_jerk * elapsed` per passo. Se l'obiettivo si inverte mentre l'asse è in movimento, il
+        valore prosegue per un breve tratto nella direzione precedente, ma non oltre il fine corsa.
+
+        Args:
+            value (float): Valore corrente.
+            target (float): Valore obiettivo.
+            max_rate (float): Velocità di variazione massima (unità/s).
+            elapsed (float): Secondi trascorsi dal passo precedente.
+
+        Returns:
+            float: Il nuovo valore.
+        """
+        error = target - value
+        if error == 0 and self.rate == 0:
+            return value
+
+        desired = math.copysign(min(max_rate, math.sqrt(2 * self.max_jerk * abs(error))), error)
+        max_change = self.max_jerk * elapsed
+        self.rate += min(max(desired - self.rate, -max_change), max_change)
+
+        value += self.rate * elapsed
+        if (target - value) * error <= 0:  # Obiettivo raggiunto o superato
+            self.rate = 0.0
+            return target
+        if self.limit is not None and abs(value) > self.limit:  # Fine corsa
+            self.rate = 0.0
+            return math.copysign(self.limit, value)
+        return value
+
+    def reset(self) -> None:
+        """
+        Azzera la velocità di variazione (ad esempio dopo un arresto immediato).
+        """
+        self.rate = 0.0
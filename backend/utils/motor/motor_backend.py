@@ -0,0 +1,230 @@
+"""
+Modulo: motor_backend
+
+Descrizione:
+Backend hardware dei motori del veicolo.
+
+`MotorUtils` non comunica direttamente con i motori: a ogni tick del ciclo di controllo consegna
+al backend un unico `MotorCommand` con velocità dei motori di trazione e gradi di sterzata. Il
+backend scrive i comandi da un thread dedicato, così che le transazioni sul bus I2C (bloccanti)
+non fermino l'event loop, e li accorpa: se il bus è più lento del ciclo di controllo, viene scritta
+solo la velocità più recente e i gradi di sterzata vengono sommati.
+
+Backend disponibili:
+- "pistorms": motori reali tramite PiStorms (richiede la libreria `PiStorms`, presente solo sul veicolo);
+  i due motori di trazione del banco A vengono aggiornati con un solo comando sincronizzato.
+- "simulated": motori simulati con inerzia, latenza e ritardo del bus configurabili
+  (`utils.motor.simulated_backend`), per misurare il controllo senza il veicolo.
+
+Dipendenze:
+- asyncio per la consegna delle misure all'event loop (`builtin`).
+- importlib per la verifica delle librerie dei backend (`builtin`).
+- dataclasses per la definizione del comando (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- threading per il thread di scrittura (`builtin`).
+- time per la misura dei tempi di scrittura (`builtin`).
+- utils.metrics.registry per le metriche di scrittura.
+- utils.motor.motorenums per i controlli di sterzata e le impostazioni dei backend.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from utils.metrics.registry import REGISTRY
+from utils.motor.motorenums.turn_controls import TurnControls
+from utils.motor.motorenums.motor_backend_settings import MotorBackendSettings
+
+_WRITE_MS = REGISTRY.histogram("lego_motor_write_ms", "Durata delle scritture sui motori, per backend", ("backend",))
+_COALESCED = REGISTRY.counter("lego_motor_commands_coalesced_total", "Comandi dei motori accorpati prima della scrittura, per backend", ("backend",))
+
+
+@dataclass(frozen=True, slots=True)
+class MotorCommand:
+    """
+    Aggiornamento dei motori prodotto da un tick del ciclo di controllo.
+
+    Attributes:
+        speed (int): Velocità dei motori di trazione (negativa in retromarcia).
+        turn_degrees (int): Gradi di cui ruotare il motore di sterzo (negativi verso sinistra).
+        brake (bool): True se lo sterzo deve frenare al termine della rotazione.
+    """
+    speed: int
+    turn_degrees: int = 0
+    brake: bool = False
+
+    def merge(self, newer: "MotorCommand") -> "MotorCommand":
+        """
+        Accorpa un comando più recente non ancora scritto: vale l'ultima velocità, le rotazioni si sommano.
+        """
+        return MotorCommand(newer.speed, self.turn_degrees + newer.turn_degrees, newer.brake)
+
+
+class MotorBackend:
+    """
+    Base dei backend: thread di scrittura con accorpamento dei comandi in attesa.
+    Le sottoclassi implementano `_write`, eseguito solo dal thread di scrittura.
+
+    Attributes:
+        name (str): Nome del backend, usato come etichetta delle metriche.
+        writes (int): Comandi scritti.
+        coalesced (int): Comandi accorpati a uno successivo prima della scrittura.
+        _pending (MotorCommand | None): Comando in attesa di scrittura.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.writes = 0
+        self.coalesced = 0
+        self._pending = None
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._loop = None
+        self._write_ms = _WRITE_MS.labels(self.name)
+        self._coalesced = _COALESCED.labels(self.name)
+
+    def start(self) -> None:
+        """
+        Avvia il thread di scrittura, se non è già attivo. Va chiamato dall'event loop.
+        """
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread = threading.Thread(target=self._run, name=f"motor-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, command: MotorCommand) -> None:
+        """
+        Consegna un comando al thread di scrittura senza attendere il bus.
+
+        Args:
+            command (MotorCommand): Il comando del tick corrente.
+        """
+        with self._condition:
+            if self._pending is not None:
+                command = self._pending.merge(command)
+                self.coalesced += 1
+                self._coalesced.inc()
+            self._pending = command
+            self._condition.notify()
+
+    def close(self) -> None:
+        """
+        Arresta il thread di scrittura dopo aver scritto l'eventuale comando in attesa.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        """
+        Thread di scrittura: scrive il comando in attesa più recente, uno alla volta.
+        """
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                command, self._pending = self._pending, None
+                if command is None:
+                    return
+
+            start = time.perf_counter()
+            try:
+                self._write(command)
+            except Exception as e:
+                logging.error(f"Errore durante la scrittura sui motori ({self.name}): {e}")
+            self.writes += 1
+            # Le metriche vengono aggiornate solo dal thread dell'event loop
+            self._loop.call_soon_threadsafe(self._write_ms.observe, (time.perf_counter() - start) * 1000)
+
+    def _write(self, command: MotorCommand) -> None:
+        raise NotImplementedError
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce il nome del backend e i comandi scritti e accorpati.
+
+        Returns:
+            dict: {"backend", "writes", "coalesced"}
+        """
+        return {"backend": self.name, "writes": self.writes, "coalesced": self.coalesced}
+
+
+class PiStormsBackend(MotorBackend):
+    """
+    Motori reali tramite PiStorms: trazione sul banco A (BAM1, BAM2), sterzo su BBM1.
+    """
+
+    name = "pistorms"
+
+    def __init__(self):
+        """
+        Inizializza la scheda PiStorms.
+
+        Raises:
+            ImportError: Se la libreria PiStorms non è installata (fuori dal veicolo).
+        """
+        from PiStorms import PiStorms
+
+        super().__init__()
+        self._psm = PiStorms()
+        self._drive = self._psm.BAM1  # I comandi "Sync" agiscono su entrambi i motori del banco (BAM1 e BAM2)
+        self._turn_motor = self._psm.BBM1
+
+    def _write(self, command: MotorCommand) -> None:
+        if command.speed == 0:
+            self._drive.brakeSync()
+        else:
+            self._drive.setSpeedSync(command.speed)
+
+        if command.turn_degrees:
+            self._turn_motor.runDegs(degs=command.turn_degrees, speed=TurnControls.TURN_VELOCITY.value, brakeOnCompletion=command.brake)
+
+
+def create_motor_backend(name: str = MotorBackendSettings.DEFAULT_BACKEND.value) -> MotorBackend:
+    """
+    Crea il backend dei motori indicato.
+
+    Args:
+        name (str, opzionale): "pistorms" oppure "simulated" (default: "pistorms").
+
+    Raises:
+        ValueError: Se il nome del backend non è valido.
+        ImportError: Se il backend richiede una libreria non installata.
+
+    Returns:
+        MotorBackend: Il backend richiesto.
+    """
+    if name == PiStormsBackend.name:
+        return PiStormsBackend()
+    if name == "simulated":
+        from utils.motor.simulated_backend import SimulatedBackend
+        return SimulatedBackend()
+    raise ValueError(f"Backend dei motori sconosciuto: {name}")
+
+
+def check_motor_backend(name: str) -> None:
+    """
+    Verifica, senza importarla, che la libreria richiesta dal backend sia installata, così che il
+    server si rifiuti di partire invece di accorgersene alla prima connessione del pilota.
+
+    Args:
+        name (str): "pistorms" oppure "simulated".
+
+    Raises:
+        ValueError: Se il nome del backend non è valido.
+        RuntimeError: Se il backend "pistorms" è richiesto ma la libreria PiStorms non è installata.
+    """
+    if name not in (PiStormsBackend.name, "simulated"):
+        raise ValueError(f"Backend dei motori sconosciuto: {name}")
+    if name == PiStormsBackend.name and importlib.util.find_spec("PiStorms") is None:
+        raise RuntimeError("Backend dei motori 'pistorms' richiesto ma la libreria PiStorms non è installata: "
+                           "impostare MOTOR_BACKEND=simulated per usare i motori simulati.")
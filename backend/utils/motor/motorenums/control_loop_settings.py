@@ -0,0 +1,26 @@
+"""
+Modulo: control_loop_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (ControlLoopSettings) con le impostazioni del ciclo di
+controllo dei motori.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class ControlLoopSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del ciclo di controllo dei motori.
+
+    Values:
+        DEFAULT_TICK_HZ (int): Frequenza di default del ciclo di controllo (Hz).
+        MAX_TICK_HZ (int): Frequenza massima consentita del ciclo di controllo (Hz).
+    """
+    DEFAULT_TICK_HZ = 50
+    MAX_TICK_HZ = 200
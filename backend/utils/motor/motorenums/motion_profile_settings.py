@@ -0,0 +1,46 @@
+"""
+Modulo: motion_profile_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (MotionProfileSettings) con i parametri dei profili di
+movimento: accelerazioni per marcia e turbo, curva di frenata e limiti di jerk di velocità e sterzo.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class MotionProfileSettings(enum.Enum):
+    """
+    Enum che contiene i parametri dei profili di movimento.
+
+    Values:
+        FIRST_GEAR_ACCELERATION (float): Accelerazione in prima marcia (unità di velocità/s).
+        GEAR_ACCELERATION_FALLOFF (float): Fattore di riduzione dell'accelerazione per ogni marcia successiva.
+        REVERSE_ACCELERATION (float): Accelerazione in retromarcia (unità di velocità/s).
+        MAX_TURBO (int): Incremento massimo di velocità dovuto al turbo.
+        TURBO_ACCELERATION_GAIN (float): Aumento relativo dell'accelerazione con il turbo al massimo.
+        SPEED_JERK (float): Variazione massima dell'accelerazione (unità di velocità/s²).
+        BRAKE_MIN_DECELERATION (float): Decelerazione con il freno al minimo (unità di velocità/s).
+        BRAKE_MAX_DECELERATION (float): Decelerazione con il freno al massimo (unità di velocità/s).
+        BRAKE_CURVE (float): Aumento relativo della decelerazione verso la fine della frenata.
+        BRAKE_RATIO_BINS (int): Risoluzione della tabella di frenata rispetto alla velocità residua.
+        TURN_RATE (float): Velocità massima di sterzata (gradi/s).
+        TURN_JERK (float): Variazione massima della velocità di sterzata (gradi/s²).
+    """
+    FIRST_GEAR_ACCELERATION = 30.0   # Prima marcia (15 unità) raggiunta in circa mezzo secondo
+    GEAR_ACCELERATION_FALLOFF = 0.8
+    REVERSE_ACCELERATION = 20.0
+    MAX_TURBO = 40                   # set_turbo(100) -> +40 di velocità massima
+    TURBO_ACCELERATION_GAIN = 0.5
+    SPEED_JERK = 150.0
+    BRAKE_MIN_DECELERATION = 15.0
+    BRAKE_MAX_DECELERATION = 60.0
+    BRAKE_CURVE = 2.0                # A fine frenata la decelerazione è triplicata
+    BRAKE_RATIO_BINS = 64
+    TURN_RATE = 120.0                # Sterzata completa (60°) in circa mezzo secondo
+    TURN_JERK = 900.0
@@ -0,0 +1,33 @@
+"""
+Modulo: motor_backend_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (MotorBackendSettings) con le impostazioni di default dei
+backend dei motori: backend predefinito e parametri del backend simulato.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class MotorBackendSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni dei backend dei motori.
+
+    Values:
+        DEFAULT_BACKEND (str): Backend usato se non configurato: i motori reali del veicolo. Il backend
+            "simulated" va richiesto esplicitamente (test di carico, benchmark).
+        BUS_DELAY_MS (float): Durata simulata di una transazione sul bus I2C (ms).
+        LATENCY_MS (float): Ritardo simulato tra la scrittura e l'effetto sul motore (ms).
+        INERTIA_SECONDS (float): Costante di tempo simulata dei motori di trazione (s).
+        STEERING_RATE (float): Velocità simulata del motore di sterzo (gradi/s).
+    """
+    DEFAULT_BACKEND = "pistorms"
+    BUS_DELAY_MS = 2.0      # Circa 20 byte a 100 kHz
+    LATENCY_MS = 5.0
+    INERTIA_SECONDS = 0.15
+    STEERING_RATE = 240.0
@@ -0,0 +1,133 @@
+"""
+Modulo: simulated_backend
+
+Descrizione:
+Backend dei motori simulato, con la stessa interfaccia di `PiStormsBackend`, per misurare il
+controllo dei motori senza il veicolo.
+
+Il modello riproduce i tre ritardi che separano un comando dal movimento reale:
+- il bus I2C: ogni transazione occupa il thread di scrittura per `bus_delay_ms` (una per i due
+  motori di trazione, sincronizzati, e una per lo sterzo se deve ruotare);
+- la latenza dell'elettronica: il comando ha effetto `latency_ms` dopo la fine della scrittura;
+- l'inerzia: la velocità delle ruote tende alla velocità comandata con costante di tempo
+  `inertia_seconds`, mentre lo sterzo ruota a velocità costante (`steering_rate`).
+
+Lo stato fisico viene calcolato su richiesta (`get_state`) dal registro dei comandi applicati.
+
+Dipendenze:
+- collections per il registro dei comandi in attesa di effetto (`builtin`).
+- math per il modello dell'inerzia (`builtin`).
+- threading per l'accesso concorrente allo stato (`builtin`).
+- time per i ritardi simulati (`builtin`).
+- utils.motor.motor_backend per la classe base dei backend.
+- utils.motor.motorenums.motor_backend_settings per i parametri di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from utils.motor.motor_backend import MotorBackend, MotorCommand
+from utils.motor.motorenums.motor_backend_settings import MotorBackendSettings
+
+
+class SimulatedBackend(MotorBackend):
+    """
+    Motori simulati con ritardo del bus, latenza e inerzia.
+
+    Attributes:
+        bus_delay (float): Durata di una transazione sul bus (s).
+        latency (float): Ritardo tra la scrittura e l'effetto sul motore (s).
+        inertia (float): Costante di tempo dei motori di trazione (s).
+        steering_rate (float): Velocità del motore di sterzo (gradi/s).
+        _scheduled (deque): Comandi scritti in attesa di effetto [(istante di effetto, comando)].
+    """
+
+    name = "simulated"
+
+    def __init__(self, bus_delay_ms: float = MotorBackendSettings.BUS_DELAY_MS.value,
+                 latency_ms: float = MotorBackendSettings.LATENCY_MS.value,
+                 inertia_seconds: float = MotorBackendSettings.INERTIA_SECONDS.value,
+                 steering_rate: float = MotorBackendSettings.STEERING_RATE.value):
+        """
+        Inizializza i motori simulati, fermi e con lo sterzo al centro.
+
+        Args:
+            bus_delay_ms (float, opzionale): Durata di una transazione I2C in ms (default: 2).
+            latency_ms (float, opzionale): Latenza tra scrittura ed effetto in ms (default: 5).
+            inertia_seconds (float, opzionale): Costante di tempo della trazione in s (default: 0.15).
+            steering_rate (float, opzionale): Velocità dello sterzo in gradi/s (default: 240).
+        """
+        super().__init__()
+        self.bus_delay = bus_delay_ms / 1000
+        self.latency = latency_ms / 1000
+        self.inertia = inertia_seconds
+        self.steering_rate = steering_rate
+        self._scheduled = deque()
+        self._lock = threading.Lock()
+        self._updated_at = time.monotonic()
+        self._commanded_speed = 0.0
+        self._wheel_speed = 0.0
+        self._angle = 0.0
+        self._angle_target = 0.0
+        self._first_motion_at = None
+
+    def _write(self, command: MotorCommand) -> None:
+        time.sleep(self.bus_delay)  # setSpeedSync / brakeSync: un'unica transazione per i due motori
+        if command.turn_degrees:
+            time.sleep(self.bus_delay)  # runDegs sul motore di sterzo
+
+        with self._lock:
+            self._scheduled.append((time.monotonic() + self.latency, command))
+
+    def get_state(self, now: float | None = None) -> dict:
+        """
+        Restituisce lo stato fisico simulato dei motori.
+
+        Args:
+            now (float | None, opzionale): Istante `time.monotonic()` di riferimento (default: adesso).
+
+        Returns:
+            dict: {"speed": velocità delle ruote, "commandedSpeed": velocità comandata in vigore,
+                   "angle": angolo dello sterzo, "firstMotionAt": istante del primo movimento o None}
+        """
+        with self._lock:
+            self._advance(time.monotonic() if now is None else now)
+            return {
+                "speed": self._wheel_speed,
+                "commandedSpeed": self._commanded_speed,
+                "angle": self._angle,
+                "firstMotionAt": self._first_motion_at,
+            }
+
+    def _advance(self, now: float) -> None:
+        """
+        Integra il modello fino a `now`, applicando i comandi che nel frattempo hanno avuto effetto.
+        """
+        while self._scheduled and self._scheduled[0][0] <= now:
+            effective_at, command = self._scheduled.popleft()
+            self._integrate(effective_at)
+            self._commanded_speed = float(command.speed)
+            self._angle_target += command.turn_degrees
+            if self._first_motion_at is None and (command.speed or command.turn_degrees):
+                self._first_motion_at = effective_at
+        self._integrate(now)
+
+    def _integrate(self, until: float) -> None:
+        elapsed = until - self._updated_at
+        if elapsed <= 0:
+            return
+        self._updated_at = until
+
+        self._wheel_speed += (self._commanded_speed - self._wheel_speed) * (1 - math.exp(-elapsed / self.inertia))
+        step = self.steering_rate * elapsed
+        self._angle = min(self._angle + step, self._angle_target) if self._angle < self._angle_target else max(self._angle - step, self._angle_target)
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le statistiche di scrittura e lo stato fisico simulato.
+        """
+        return {**super().get_stats(), "state": self.get_state()}
@@ -0,0 +1,84 @@
+"""
+Modulo: codec
+
+Descrizione:
+Livello condiviso di codifica/decodifica JSON per tutti i messaggi scambiati via WebSocket.
+Usa il codec più veloce disponibile nell'ambiente: `orjson`, poi `msgspec`, infine il modulo
+`json` della libreria standard. Tutti i moduli del server devono passare da qui invece di
+chiamare direttamente `json.dumps`/`json.loads`.
+
+Dipendenze:
+- orjson (opzionale) per la serializzazione veloce (`orjson`).
+- msgspec (opzionale) come alternativa a orjson (`msgspec`).
+- json come fallback (`builtin`).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    msgspec = None
+
+
+if orjson is not None:
+    CODEC_NAME = "orjson"
+    DecodeError = (orjson.JSONDecodeError,)
+
+    def encode(obj) -> str:
+        """
+        Serializza un oggetto in una stringa JSON (frame testuale WebSocket).
+
+        Args:
+            obj: Oggetto serializzabile (dict, list, numeri, stringhe...).
+
+        Returns:
+            str: Il documento JSON.
+        """
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+
+    def decode(data):
+        """
+        Deserializza un documento JSON ricevuto dal client.
+
+        Args:
+            data (str | bytes): Il documento JSON.
+
+        Raises:
+            DecodeError: Se il documento non è un JSON valido.
+
+        Returns:
+            L'oggetto Python corrispondente.
+        """
+        return orjson.loads(data)
+
+elif msgspec is not None:
+    CODEC_NAME = "msgspec"
+    DecodeError = (msgspec.DecodeError,)
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def encode(obj) -> str:
+        return _encoder.encode(obj).decode("utf-8")
+
+    def decode(data):
+        return _decoder.decode(data)
+
+else:
+    CODEC_NAME = "json"
+    DecodeError = (json.JSONDecodeError,)
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def encode(obj) -> str:
+        return _encoder.encode(obj)
+
+    def decode(data):
+        return json.loads(data)
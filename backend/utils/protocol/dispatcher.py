@@ -0,0 +1,196 @@
+"""
+Modulo: dispatcher
+
+Descrizione:
+Dispatcher dei messaggi WebSocket basato su una tabella di instradamento.
+Ogni tipo di messaggio ("move-forward", "set-zoom", ...) viene registrato una sola volta con il
+proprio handler e la classe di payload che ne valida il contenuto. Il dispatcher decodifica il
+messaggio tramite il codec condiviso, costruisce il payload tipizzato e invoca l'handler,
+tenendo traccia per ogni tipo del numero di invocazioni, degli errori e della latenza.
+Gli handler che non modificano lo stato del veicolo possono essere registrati in sola lettura,
+così da essere disponibili anche ai client senza diritti di controllo (spettatori).
+
+Dipendenze:
+- inspect per distinguere gli handler sincroni da quelli asincroni (`builtin`).
+- logging per il monitoraggio dei messaggi sconosciuti (`builtin`).
+- time per la misura della latenza degli handler (`builtin`).
+- utils.protocol.codec per la decodifica dei messaggi.
+- utils.protocol.payloads per il payload di default.
+- utils.metrics.registry per le metriche dei messaggi.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from utils.protocol import codec
+from utils.protocol.payloads import EmptyPayload
+from utils.metrics.registry import REGISTRY
+
+_MESSAGES = REGISTRY.counter("lego_messages_total", "Messaggi ricevuti, per tipo ed esito", ("type", "result"))
+_HANDLER_MS = REGISTRY.histogram("lego_handler_ms", "Durata degli handler dei messaggi (ms), per tipo", ("type",))
+
+
+@dataclass(slots=True)
+class HandlerStats:
+    """
+    Statistiche di esecuzione di un singolo handler.
+
+    Attributes:
+        calls (int): Numero di invocazioni dell'handler.
+        errors (int): Numero di invocazioni terminate con un'eccezione.
+        rejected (int): Numero di messaggi scartati perché il payload non era valido.
+        denied (int): Numero di messaggi ignorati perché inviati da un client senza diritti di controllo.
+        total_ms (float): Tempo totale trascorso nell'handler (millisecondi).
+        max_ms (float): Tempo massimo di una singola invocazione (millisecondi).
+    """
+    calls: int = 0
+    errors: int = 0
+    rejected: int = 0
+    denied: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "denied": self.denied,
+            "avgMs": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "maxMs": round(self.max_ms, 3),
+        }
+
+
+@dataclass(slots=True)
+class _Route:
+    handler: object
+    payload: type
+    is_async: bool
+    readonly: bool
+    stats: HandlerStats = field(default_factory=HandlerStats)
+
+
+class MessageDispatcher:
+    """
+    Tabella di instradamento dei messaggi in arrivo dal client.
+
+    Gli handler hanno la firma `handler(context, payload)` e possono essere sia funzioni
+    sincrone sia coroutine. `context` è l'oggetto passato a `dispatch` (tipicamente la sessione
+    del client), `payload` è l'istanza validata della classe registrata per il tipo di messaggio.
+
+    Esempio di utilizzo:
+        dispatcher = MessageDispatcher()
+        dispatcher.register("set-zoom", on_set_zoom, ZoomPayload)
+        await dispatcher.dispatch('{"type": "set-zoom", "content": 2}', session)
+    """
+
+    def __init__(self):
+        self._routes = {}  # {tipo messaggio: _Route}
+        self._unknown = 0  # Messaggi con tipo non registrato
+
+    def register(self, message_type: str, handler, payload: type = EmptyPayload, readonly: bool = False) -> None:
+        """
+        Registra l'handler per un tipo di messaggio.
+
+        Args:
+            message_type (str): Valore del campo "type" del messaggio.
+            handler (callable): Funzione o coroutine con firma `handler(context, payload)`.
+            payload (type): Classe con metodo `parse(data)` usata per validare il messaggio.
+            readonly (bool, opzionale): True se l'handler è consentito anche ai client senza
+                diritti di controllo (default: False).
+
+        Raises:
+            ValueError: Se il tipo di messaggio è già registrato.
+        """
+        if message_type in self._routes:
+            raise ValueError(f"Handler già registrato per il messaggio '{message_type}'")
+
+        self._routes[message_type] = _Route(
+            handler=handler,
+            payload=payload,
+            is_async=inspect.iscoroutinefunction(handler),
+            readonly=readonly
+        )
+
+    async def dispatch(self, message, context, allow_control: bool = True) -> dict | None:
+        """
+        Decodifica un messaggio e lo instrada verso l'handler registrato.
+
+        Args:
+            message (str | bytes): Il messaggio JSON ricevuto dal client.
+            context: Oggetto passato come primo argomento all'handler.
+            allow_control (bool, opzionale): False per consentire solo gli handler in sola lettura.
+
+        Raises:
+            codec.DecodeError: Se il messaggio non è un JSON valido.
+            TypeError: Se il messaggio non è un oggetto JSON.
+            ValueError: Se il payload non supera la validazione.
+            Exception: Qualsiasi eccezione sollevata dall'handler viene propagata.
+
+        Returns:
+            dict | None: Il messaggio decodificato, oppure None se il tipo non è registrato
+                o non è consentito al client.
+        """
+        data = codec.decode(message)
+        if not isinstance(data, dict):
+            raise TypeError("Il messaggio deve essere un oggetto JSON")
+
+        route = self._routes.get(data.get("type"))
+        if route is None:
+            self._unknown += 1
+            _MESSAGES.labels("unknown", "unknown").inc()
+            logging.warning(f"Tipo di messaggio sconosciuto: {data.get('type')}")
+            return None
+
+        stats = route.stats
+        if not allow_control and not route.readonly:
+            stats.denied += 1
+            _MESSAGES.labels(data["type"], "denied").inc()
+            logging.warning(f"Comando '{data.get('type')}' ignorato: il client non ha diritti di controllo")
+            return None
+
+        try:
+            payload = route.payload.parse(data)
+        except (ValueError, TypeError):
+            stats.rejected += 1
+            _MESSAGES.labels(data["type"], "rejected").inc()
+            raise
+
+        start = time.perf_counter()
+        try:
+            if route.is_async:
+                await route.handler(context, payload)
+            else:
+                route.handler(context, payload)
+        except BaseException:
+            stats.errors += 1
+            _MESSAGES.labels(data["type"], "error").inc()
+            raise
+        else:
+            _MESSAGES.labels(data["type"], "ok").inc()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _HANDLER_MS.labels(data["type"]).observe(elapsed_ms)
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+
+        return data
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le statistiche di invocazione di tutti gli handler.
+
+        Returns:
+            dict: {"handlers": {tipo: statistiche}, "unknown": messaggi sconosciuti, "codec": codec in uso}.
+        """
+        return {
+            "handlers": {name: route.stats.as_dict() for name, route in self._routes.items()},
+            "unknown": self._unknown,
+            "codec": codec.CODEC_NAME,
+        }
@@ -0,0 +1,66 @@
+"""
+Modulo: frames
+
+Descrizione:
+Formato dei messaggi video inviati al client, nei due trasporti negoziati con "hello":
+
+- JSON: `{"ok": true, "streaming": true, "codec": "jpeg", "frame": "<base64>"}`;
+- binario: 1 byte `BINARY_FRAME_TAG`, 1 byte con l'indice del formato in `FrameCodec`
+  (0 = jpeg, 1 = webp), seguiti dall'immagine compressa. Evita la codifica base64 (+33% di
+  dimensione) e la sua decodifica nel browser.
+
+Gli spettatori che non accettano messaggi binari ricevono la versione JSON dello stesso frame,
+convertita una sola volta per tutti (`binary_to_json`).
+
+Dipendenze:
+- base64 per il trasporto JSON (`builtin`).
+- utils.protocol.codec per la serializzazione JSON.
+- utils.protocol.protocolenums per formati e intestazione dei frame.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import base64
+from utils.protocol.codec import encode
+from utils.protocol.protocolenums.frame_codec import FrameCodec
+from utils.protocol.protocolenums.stream_settings import StreamSettings
+
+_CODECS = tuple(FrameCodec)
+_TAG = StreamSettings.BINARY_FRAME_TAG.value
+
+
+def build_frame_message(image, codec: FrameCodec, binary: bool) -> str | bytes:
+    """
+    Costruisce il messaggio di un frame già compresso.
+
+    Args:
+        image (bytes | numpy.ndarray): Immagine compressa (output di `cv2.imencode`).
+        codec (FrameCodec): Formato dell'immagine.
+        binary (bool): True per il trasporto binario, False per JSON.
+
+    Returns:
+        str | bytes: Il messaggio pronto per lo scheduler di invio.
+    """
+    if binary:
+        return bytes((_TAG, _CODECS.index(codec))) + memoryview(image).cast("B")
+    return encode({
+        "ok": True,
+        "streaming": True,
+        "codec": codec.value,
+        "frame": base64.b64encode(image).decode("utf-8"),
+    })
+
+
+def is_binary_frame(message) -> bool:
+    """
+    Indica se un messaggio in uscita è un frame binario.
+    """
+    return isinstance(message, (bytes, bytearray)) and len(message) > 2 and message[0] == _TAG
+
+
+def binary_to_json(message: bytes) -> str:
+    """
+    Converte un frame binario nel messaggio JSON equivalente.
+    """
+    return build_frame_message(memoryview(message)[2:], _CODECS[message[1]], binary=False)
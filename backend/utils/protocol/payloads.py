@@ -0,0 +1,268 @@
+"""
+Modulo: payloads
+
+Descrizione:
+Definisce i payload tipizzati dei messaggi in arrivo dal client. Ogni payload espone il metodo
+di classe `parse`, che riceve il messaggio già decodificato, valida il campo `content` (ed
+eventuali campi accessori) e restituisce un'istanza immutabile pronta per l'handler.
+Un payload non valido solleva `ValueError`, così l'handler non viene nemmeno invocato.
+
+Dipendenze:
+- dataclasses per la definizione dei payload (`builtin`).
+- math per la validazione dei valori numerici (`builtin`).
+- os per la normalizzazione dei nomi dei file (`builtin`).
+- utils.motor.motorenums.gears per la validazione delle marce.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from utils.motor.motorenums.gears import Gear
+
+
+def _parse_percent(content, minimum: int, maximum: int) -> int:
+    """
+    Converte un valore percentuale (es. "50%" o 50) in intero verificandone i limiti.
+
+    Raises:
+        ValueError: Se il valore non è numerico o è fuori dall'intervallo [minimum, maximum].
+    """
+    value = int(str(content).replace('%', ''))
+    if not minimum <= value <= maximum:
+        raise ValueError(f"Valore {value} fuori dall'intervallo [{minimum}, {maximum}]")
+    return value
+
+
+def _parse_finite(content) -> float:
+    """
+    Converte un valore numerico in float, rifiutando valori mancanti, booleani, NaN e infiniti
+    (i decoder JSON convertono ad esempio `1e999` in `inf`).
+
+    Raises:
+        ValueError: Se il valore non è un numero finito.
+    """
+    if content is None or isinstance(content, bool):
+        raise ValueError(f"Valore numerico non valido: {content}")
+    value = float(content)
+    if not math.isfinite(value):
+        raise ValueError(f"Valore numerico non valido: {content}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class EmptyPayload:
+    """
+    Payload per i comandi che non trasportano dati (es. "take-picture").
+    """
+
+    @classmethod
+    def parse(cls, data: dict) -> "EmptyPayload":
+        return _EMPTY
+
+
+_EMPTY = EmptyPayload()
+
+
+@dataclass(frozen=True, slots=True)
+class NightModePayload:
+    """
+    Payload di "toggle-night-mode": 0 per disattivare, 1 per attivare.
+    """
+    value: int
+
+    @classmethod
+    def parse(cls, data: dict) -> "NightModePayload":
+        content = data.get("content")
+        if content not in (0, 1) or isinstance(content, bool):
+            raise ValueError(f"Valore non valido per la modalità notturna: {content}")
+        return cls(value=content)
+
+
+@dataclass(frozen=True, slots=True)
+class ZoomPayload:
+    """
+    Payload di "set-zoom": fattore di zoom già limitato tra 0.5x e 3.0x.
+    """
+    value: float
+
+    @classmethod
+    def parse(cls, data: dict) -> "ZoomPayload":
+        return cls(value=max(0.5, min(3.0, _parse_finite(data.get("content")))))
+
+
+@dataclass(frozen=True, slots=True)
+class GearPayload:
+    """
+    Payload di "switch-gear": una delle marce definite in `Gear`.
+    """
+    gear: str
+
+    @classmethod
+    def parse(cls, data: dict) -> "GearPayload":
+        content = data.get("content")
+        if content not in {gear.value for gear in Gear}:
+            raise ValueError(f"Marcia non valida: {content}")
+        return cls(gear=content)
+
+
+@dataclass(frozen=True, slots=True)
+class TurboPayload:
+    """
+    Payload di "set-turbo": percentuale tra 0 e 100.
+    """
+    value: int
+
+    @classmethod
+    def parse(cls, data: dict) -> "TurboPayload":
+        return cls(value=_parse_percent(data.get("content"), 0, 100))
+
+
+@dataclass(frozen=True, slots=True)
+class BrakePayload:
+    """
+    Payload di "set-brake-intensity": percentuale tra 1 e 100.
+    """
+    value: int
+
+    @classmethod
+    def parse(cls, data: dict) -> "BrakePayload":
+        return cls(value=_parse_percent(data.get("content"), 1, 100))
+
+
+@dataclass(frozen=True, slots=True)
+class LevelPayload:
+    """
+    Payload di "set-sound-volume" e "set-sound-pan": valore numerico già limitato tra -60 e 60.
+    """
+    value: float
+
+    @classmethod
+    def parse(cls, data: dict) -> "LevelPayload":
+        return cls(value=max(-60.0, min(60.0, _parse_finite(data.get("content")))))
+
+
+@dataclass(frozen=True, slots=True)
+class EffectPayload:
+    """
+    Payload di "play-effect": identificativo dell'effetto sonoro (es. "horn").
+    """
+    effect: str
+
+    @classmethod
+    def parse(cls, data: dict) -> "EffectPayload":
+        content = str(data.get("content") or "").strip().lower()
+        if not content or len(content) > 64:
+            raise ValueError(f"Effetto sonoro non valido: {content}")
+        return cls(effect=content)
+
+
+@dataclass(frozen=True, slots=True)
+class AudioUploadPayload:
+    """
+    Payload di "new-audio": nome del file (massimo 100 caratteri) e contenuto in base64.
+    """
+    name: str
+    data: str
+
+    @classmethod
+    def parse(cls, data: dict) -> "AudioUploadPayload":
+        content = data.get("content")
+        if not isinstance(content, str) or not content:
+            raise ValueError("Contenuto audio mancante o non valido")
+        name = os.path.basename(str(data.get("name") or ""))[:100] or "audio_temp.wav"  # Nome massimo 100 char per sicurezza
+        return cls(name=name, data=content)
+
+
+@dataclass(frozen=True, slots=True)
+class UploadBeginPayload:
+    """
+    Payload di "audio-upload-begin": nome e dimensione del file, più l'eventuale
+    identificativo del caricamento da riprendere.
+    """
+    name: str
+    size: int
+    upload_id: str | None
+
+    @classmethod
+    def parse(cls, data: dict) -> "UploadBeginPayload":
+        content = data.get("content")
+        if not isinstance(content, dict):
+            raise ValueError("Contenuto di 'audio-upload-begin' mancante o non valido")
+
+        name = os.path.basename(str(content.get("name") or ""))[:100] or "audio_temp.wav"
+        size = int(content.get("size"))
+        upload_id = content.get("uploadId")
+        return cls(name=name, size=size, upload_id=str(upload_id) if upload_id else None)
+
+
+@dataclass(frozen=True, slots=True)
+class UploadCommitPayload:
+    """
+    Payload di "audio-upload-commit": identificativo del caricamento e hash SHA-256 opzionale.
+    """
+    upload_id: str
+    sha256: str | None
+
+    @classmethod
+    def parse(cls, data: dict) -> "UploadCommitPayload":
+        content = data.get("content")
+        if not isinstance(content, dict) or not content.get("uploadId"):
+            raise ValueError("Identificativo del caricamento mancante")
+
+        sha256 = content.get("sha256")
+        return cls(upload_id=str(content["uploadId"]), sha256=str(sha256) if sha256 else None)
+
+
+@dataclass(frozen=True, slots=True)
+class HelloPayload:
+    """
+    Payload di "hello": capacità dichiarate dal client all'apertura della connessione.
+    Tutti i campi sono opzionali; i valori non riconosciuti vengono ignorati.
+
+    Esempio:
+        {"type": "hello", "content": {"refreshRate": 144, "viewport": {"width": 1280, "height": 720},
+                                      "codecs": ["jpeg", "webp"], "transport": "binary"}}
+    """
+    refresh_rate: int | None
+    viewport: tuple | None
+    codecs: tuple
+    transport: str
+
+    @classmethod
+    def parse(cls, data: dict) -> "HelloPayload":
+        content = data.get("content")
+        if not isinstance(content, dict):
+            raise ValueError("Contenuto di 'hello' mancante o non valido")
+
+        refresh_rate = content.get("refreshRate")
+        if refresh_rate is not None:
+            refresh_rate = round(_parse_finite(refresh_rate))
+            if not 1 <= refresh_rate <= 1000:
+                raise ValueError(f"Frequenza di aggiornamento non valida: {refresh_rate}")
+
+        viewport = content.get("viewport")
+        if viewport is not None:
+            if not isinstance(viewport, dict):
+                raise ValueError("Dimensioni della finestra non valide")
+            width, height = int(_parse_finite(viewport.get("width"))), int(_parse_finite(viewport.get("height")))
+            if width <= 0 or height <= 0:
+                raise ValueError(f"Dimensioni della finestra non valide: {width}x{height}")
+            viewport = (width, height)
+
+        codecs = content.get("codecs") or ()
+        if not isinstance(codecs, (list, tuple)):
+            raise ValueError("L'elenco dei formati video deve essere una lista")
+
+        transport = str(content.get("transport") or "json").lower()
+        if transport not in ("json", "binary"):
+            raise ValueError(f"Trasporto non supportato: {transport}")
+
+        return cls(
+            refresh_rate=refresh_rate,
+            viewport=viewport,
+            codecs=tuple(str(codec).lower() for codec in codecs[:8]),
+            transport=transport
+        )
@@ -0,0 +1,23 @@
+"""
+Modulo: frame_codec
+
+Descrizione:
+Questo modulo definisce un'enumerazione (FrameCodec) per i formati di compressione dei frame
+video supportati dal server. L'ordine di definizione corrisponde all'ordine di preferenza usato
+nella negoziazione con il client.
+
+Dipendenze:
+- enum per la gestione dei formati tramite enumerazione.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class FrameCodec(enum.Enum):
+    """
+    Enumerazione dei formati dei frame video.
+    """
+    JPEG = "jpeg"  # Codifica più rapida, supportata da tutti i browser
+    WEBP = "webp"  # Frame più piccoli a parità di qualità, codifica più lenta
@@ -0,0 +1,23 @@
+"""
+Modulo: send_priority
+
+Descrizione:
+Questo modulo definisce un'enumerazione (SendPriority) per le classi di priorità dei messaggi
+inviati al client. L'ordine di definizione corrisponde all'ordine di servizio dello scheduler.
+
+Dipendenze:
+- enum per la gestione delle priorità tramite enumerazione.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class SendPriority(enum.Enum):
+    """
+    Enumerazione delle classi di priorità dei messaggi in uscita.
+    """
+    CONTROL = 0    # Risposte ai comandi e messaggi di sicurezza (freno, stato motore)
+    TELEMETRY = 1  # Aggiornamenti di stato (velocità, angolo, tempo audio)
+    MEDIA = 2      # Frame video
@@ -0,0 +1,32 @@
+"""
+Modulo: stream_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (StreamSettings) con i limiti e i valori di default dei
+parametri dello streaming video negoziati con il client (messaggio "hello").
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class StreamSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni dello streaming video.
+
+    Values:
+        DEFAULT_FPS (int): Frame al secondo se il client non dichiara la propria frequenza di aggiornamento.
+        MIN_FPS (int): Frame al secondo minimi inviati al client.
+        MAX_FPS (int): Frame al secondo massimi inviati al client.
+        QUALITY (int): Qualità di compressione dei frame (0-100).
+        BINARY_FRAME_TAG (int): Primo byte dei frame inviati come messaggi binari.
+    """
+    DEFAULT_FPS = 30
+    MIN_FPS = 5
+    MAX_FPS = 60
+    QUALITY = 85
+    BINARY_FRAME_TAG = 0x01
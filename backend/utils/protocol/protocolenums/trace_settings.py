@@ -0,0 +1,26 @@
+"""
+Modulo: trace_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (TraceSettings) con le impostazioni della cattura dei
+messaggi in arrivo dai client, usata per riprodurre sessioni reali (`trace_replay.py`).
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class TraceSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni della cattura dei messaggi.
+
+    Values:
+        DIRECTORY (str): Cartella di default delle catture, una sottocartella per avvio del server.
+        VERSION (int): Versione del formato dei file di cattura.
+    """
+    DIRECTORY = "../user/traces/"   # Catture salvate come trace-<data>-<ora>/connection-<n>.jsonl
+    VERSION = 1
@@ -0,0 +1,283 @@
+"""
+Modulo: send_scheduler
+
+Descrizione:
+Scheduler dei messaggi in uscita per una singola connessione WebSocket.
+Tutti i moduli (telecamera, motori, audio, server) accodano i propri messaggi nello scheduler
+indicando una classe di priorità; un unico task di scrittura li invia al client servendo sempre
+prima i messaggi di controllo, poi la telemetria e infine i frame video. In questo modo un frame
+di grandi dimensioni già in coda non ritarda la conferma di una frenata.
+
+La coda dei frame è limitata: quando il client non riesce a stare al passo, i frame più vecchi
+vengono scartati a favore di quelli più recenti.
+
+I messaggi di controllo non vengono mai scartati, perché trasportano le conferme dei comandi: la
+loro coda ha però un limite massimo (`control_queue_size`). Se viene raggiunto, il client non legge
+più i messaggi e continua a inviare comandi: la connessione viene chiusa (codice 1008) invece di
+lasciar crescere la coda senza limiti.
+
+Quando la connessione del pilota cade ma la sessione resta riprendibile, lo scheduler viene
+sospeso (`detach`): i messaggi prodotti nel frattempo vengono scartati senza errori (ma ancora
+replicati verso il `mirror`), così che telecamera e telemetria non si interrompano, e `attach` lo
+ricollega alla nuova connessione.
+
+Telemetria e frame possono inoltre essere replicati verso un `mirror` (ad esempio l'hub degli
+spettatori), che riceve lo stesso messaggio già serializzato.
+
+Dipendenze:
+- asyncio per il task di scrittura (`builtin`).
+- collections per le code FIFO (`builtin`).
+- logging per il monitoraggio degli errori di invio (`builtin`).
+- websockets per la gestione della chiusura della connessione (`websockets`).
+- utils.protocol.protocolenums.send_priority per le classi di priorità.
+- utils.metrics.registry per le metriche di invio.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+from collections import deque
+from websockets.exceptions import ConnectionClosed
+from utils.protocol.protocolenums.send_priority import SendPriority
+from utils.metrics.registry import REGISTRY
+
+_SENT = REGISTRY.counter("lego_send_messages_total", "Messaggi scritti sulle connessioni, per priorità", ("priority",))
+_DROPPED = REGISTRY.counter("lego_send_dropped_total", "Messaggi scartati per coda piena, per priorità", ("priority",))
+_QUEUE_DEPTH = REGISTRY.gauge("lego_send_queue_depth", "Messaggi in coda su tutte le connessioni, per priorità", ("priority",))
+
+
+class SendScheduler:
+    """
+    Scheduler a priorità dei messaggi in uscita verso un client.
+
+    Politica delle code:
+    - CONTROL: nessun messaggio scartato; oltre `control_queue_size` messaggi in coda la connessione
+      viene chiusa e `send` solleva `ConnectionError`.
+    - TELEMETRY: limite opzionale, scarta i messaggi più vecchi.
+    - MEDIA: limite di `media_queue_size` frame, scarta i frame più vecchi.
+
+    Attributes:
+        websocket (websockets.ServerConnection): Connessione su cui vengono scritti i messaggi.
+        _queues (dict): Coda FIFO per ogni classe di priorità.
+        _sent (dict): Numero di messaggi inviati per classe.
+        _dropped (dict): Numero di messaggi scartati per classe (coda piena).
+        _wakeup (asyncio.Event): Evento che risveglia il task di scrittura.
+        _writer_task (asyncio.Task): Unico task che scrive sulla connessione.
+        _error (Exception | None): Errore che ha interrotto la connessione, se presente.
+        mirror (callable | None): Funzione che riceve una copia dei messaggi di telemetria e media.
+        _detached (bool): True se lo scheduler è sospeso in attesa di una nuova connessione.
+    """
+
+    def __init__(self, websocket, media_queue_size: int = 2, telemetry_queue_size: int | None = None,
+                 control_queue_size: int = 256):
+        """
+        Inizializza lo scheduler per una connessione.
+
+        Args:
+            websocket (websockets.ServerConnection): Connessione WebSocket del client.
+            media_queue_size (int, opzionale): Numero massimo di frame in coda (default: 2).
+            telemetry_queue_size (int | None, opzionale): Limite della coda di telemetria (default: illimitata).
+            control_queue_size (int, opzionale): Messaggi di controllo in coda oltre i quali la connessione viene chiusa (default: 256).
+        """
+        self.websocket = websocket
+        self.control_queue_size = control_queue_size
+        self._queues = {
+            SendPriority.CONTROL: deque(),
+            SendPriority.TELEMETRY: deque(maxlen=telemetry_queue_size),
+            SendPriority.MEDIA: deque(maxlen=media_queue_size),
+        }
+        self._sent = {priority: 0 for priority in SendPriority}
+        self._dropped = {priority: 0 for priority in SendPriority}
+        self._wakeup = asyncio.Event()
+        self._writer_task = None
+        self._error = None
+        self.mirror = None
+        self._detached = False
+        self._metrics = {
+            priority: (_SENT.labels(priority.name.lower()), _DROPPED.labels(priority.name.lower()), _QUEUE_DEPTH.labels(priority.name.lower()))
+            for priority in SendPriority
+        }
+
+    def start(self) -> None:
+        """
+        Avvia il task di scrittura, se non è già attivo.
+        """
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer(), name="send-scheduler")
+
+    async def send(self, message, priority: SendPriority = SendPriority.CONTROL) -> None:
+        """
+        Accoda un messaggio per l'invio, con la stessa firma asincrona di `websocket.send`.
+
+        Args:
+            message (str | bytes): Il messaggio già serializzato.
+            priority (SendPriority, opzionale): Classe di priorità (default: CONTROL).
+
+        Raises:
+            ConnectionClosed: Se la connessione è stata chiusa.
+            ConnectionError: Se lo scheduler è stato chiuso.
+        """
+        self.enqueue(message, priority)
+
+    def enqueue(self, message, priority: SendPriority = SendPriority.CONTROL) -> None:
+        """
+        Versione sincrona di `send`, utilizzabile anche da codice non asincrono.
+
+        Args:
+            message (str | bytes): Il messaggio già serializzato.
+            priority (SendPriority, opzionale): Classe di priorità (default: CONTROL).
+
+        Raises:
+            ConnectionClosed: Se la connessione è stata chiusa.
+            ConnectionError: Se lo scheduler è stato chiuso.
+        """
+        if self._detached:
+            # Connessione sospesa: il messaggio è scartato, ma chi lo produce non viene interrotto
+            self._dropped[priority] += 1
+            self._metrics[priority][1].inc()
+            if self.mirror is not None and priority != SendPriority.CONTROL:
+                self.mirror(message)
+            return
+        if self._error is not None:
+            raise self._error
+        if self._writer_task is None or self._writer_task.done():
+            raise ConnectionError("Lo scheduler di invio non è attivo.")
+
+        queue = self._queues[priority]
+        _, dropped, depth = self._metrics[priority]
+        if priority == SendPriority.CONTROL and len(queue) >= self.control_queue_size:
+            self._dropped[priority] += 1
+            dropped.inc()
+            self._overflow()
+            raise self._error
+        if queue.maxlen is not None and len(queue) == queue.maxlen:
+            self._dropped[priority] += 1  # Il messaggio più vecchio viene scartato dalla deque
+            dropped.inc()
+        else:
+            depth.inc()
+
+        queue.append(message)
+        self._wakeup.set()
+
+        if self.mirror is not None and priority != SendPriority.CONTROL:
+            self.mirror(message)
+
+    def _overflow(self) -> None:
+        """
+        Chiude la connessione di un client che non legge più i messaggi di controllo.
+        """
+        logging.warning(f"Coda dei messaggi di controllo piena ({self.control_queue_size}): il client non riceve i messaggi, connessione chiusa.")
+        self._error = ConnectionError("Coda dei messaggi di controllo piena: connessione chiusa.")
+        self._writer_task.cancel()  # Scarta i messaggi ancora in coda
+        asyncio.create_task(self.websocket.close(1008, "Coda dei messaggi di controllo piena"), name="send-overflow-close")
+
+    def _next_message(self):
+        """
+        Estrae il prossimo messaggio rispettando l'ordine delle priorità.
+
+        Returns:
+            tuple | None: (messaggio, priorità) oppure None se tutte le code sono vuote.
+        """
+        for priority, queue in self._queues.items():
+            if queue:
+                self._metrics[priority][2].dec()
+                return queue.popleft(), priority
+        return None
+
+    async def _writer(self) -> None:
+        """
+        Task di scrittura: svuota le code in ordine di priorità finché la connessione è aperta.
+        """
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+
+                while (item := self._next_message()) is not None:
+                    message, priority = item
+                    await self.websocket.send(message)
+                    self._sent[priority] += 1
+                    self._metrics[priority][0].inc()
+
+        except ConnectionClosed as e:
+            self._error = e
+            logging.info("Connessione chiusa: scheduler di invio terminato.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+            logging.error(f"Errore imprevisto nello scheduler di invio: {e}")
+        finally:
+            self._clear_queues()
+
+    def get_queue_depths(self) -> dict:
+        """
+        Restituisce il numero di messaggi in coda per ogni classe di priorità.
+
+        Returns:
+            dict: {"control": int, "telemetry": int, "media": int}
+        """
+        return {priority.name.lower(): len(queue) for priority, queue in self._queues.items()}
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce profondità delle code, messaggi inviati e scartati per classe.
+
+        Returns:
+            dict: Statistiche dello scheduler.
+        """
+        return {
+            "queueDepth": self.get_queue_depths(),
+            "sent": {priority.name.lower(): count for priority, count in self._sent.items()},
+            "dropped": {priority.name.lower(): count for priority, count in self._dropped.items()},
+        }
+
+    @property
+    def attached(self) -> bool:
+        """
+        True se lo scheduler è collegato a una connessione.
+        """
+        return not self._detached
+
+    async def detach(self) -> None:
+        """
+        Sospende lo scheduler dopo la caduta della connessione, per una sessione riprendibile:
+        il task di scrittura viene arrestato, le code svuotate e i messaggi successivi scartati.
+        """
+        self._detached = True
+        await self.close()
+        self._error = None
+
+    def attach(self, websocket) -> None:
+        """
+        Ricollega lo scheduler a una nuova connessione e riavvia il task di scrittura.
+
+        Args:
+            websocket (websockets.ServerConnection): La nuova connessione del client.
+        """
+        self.websocket = websocket
+        self._error = None
+        self._detached = False
+        self.start()
+
+    async def close(self) -> None:
+        """
+        Arresta il task di scrittura e scarta i messaggi ancora in coda.
+        """
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        self._clear_queues()
+
+    def _clear_queues(self) -> None:
+        """
+        Scarta i messaggi ancora in coda.
+        """
+        for priority, queue in self._queues.items():
+            self._metrics[priority][2].dec(len(queue))
+            queue.clear()
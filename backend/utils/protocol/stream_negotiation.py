@@ -0,0 +1,115 @@
+"""
+Modulo: stream_negotiation
+
+Descrizione:
+Negoziazione dei parametri dello streaming video a partire dalle capacità dichiarate dal client
+nel messaggio "hello": frequenza dei frame, dimensione, formato di compressione e trasporto.
+
+- Frame al secondo: la frequenza di aggiornamento del client, limitata a [MIN_FPS, MAX_FPS].
+  Senza "hello" viene usata la frequenza rilevata sull'host all'avvio, oppure DEFAULT_FPS.
+- Dimensione: il frame della videocamera viene ridotto, mantenendo le proporzioni, per stare nella
+  finestra del client; non viene mai ingrandito.
+- Formato: il primo formato di `FrameCodec`, in ordine di preferenza, supportato dal client.
+- Trasporto: "binary" invia i frame come messaggi binari (intestazione di 2 byte seguita
+  dall'immagine), "json" come stringa base64 all'interno di un messaggio JSON.
+
+Il formato dei messaggi video è definito in `frames`.
+
+Dipendenze:
+- dataclasses per la definizione dei parametri (`builtin`).
+- utils.protocol.payloads per le capacità dichiarate dal client.
+- utils.protocol.protocolenums per formati e limiti dello streaming.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+from dataclasses import dataclass
+from utils.protocol.payloads import HelloPayload
+from utils.protocol.protocolenums.frame_codec import FrameCodec
+from utils.protocol.protocolenums.stream_settings import StreamSettings
+
+
+@dataclass(frozen=True, slots=True)
+class StreamParams:
+    """
+    Parametri dello streaming video verso un client.
+
+    Attributes:
+        fps (int): Frame al secondo massimi.
+        width (int): Larghezza dei frame inviati (pixel).
+        height (int): Altezza dei frame inviati (pixel).
+        codec (FrameCodec): Formato di compressione dei frame.
+        transport (str): "json" oppure "binary".
+    """
+    fps: int
+    width: int
+    height: int
+    codec: FrameCodec = FrameCodec.JPEG
+    transport: str = "json"
+
+    @property
+    def binary(self) -> bool:
+        return self.transport == "binary"
+
+    def as_dict(self) -> dict:
+        return {
+            "fps": self.fps,
+            "width": self.width,
+            "height": self.height,
+            "codec": self.codec.value,
+            "transport": self.transport,
+        }
+
+
+def _clamp_fps(fps: int) -> int:
+    return max(StreamSettings.MIN_FPS.value, min(StreamSettings.MAX_FPS.value, int(fps)))
+
+
+def default_stream(camera_size: tuple, fps: int | None = None) -> StreamParams:
+    """
+    Parametri usati finché il client non invia "hello".
+
+    Args:
+        camera_size (tuple): (larghezza, altezza) dei frame della videocamera.
+        fps (int | None, opzionale): Frequenza di riferimento, ad esempio quella rilevata sull'host.
+
+    Returns:
+        StreamParams: Frame a piena risoluzione, JPEG su JSON.
+    """
+    width, height = camera_size
+    return StreamParams(fps=_clamp_fps(fps or StreamSettings.DEFAULT_FPS.value), width=width, height=height)
+
+
+def negotiate(hello: HelloPayload | None, camera_size: tuple, fallback_fps: int | None = None) -> StreamParams:
+    """
+    Calcola i parametri dello streaming dalle capacità del client.
+
+    Args:
+        hello (HelloPayload | None): Capacità dichiarate dal client, None se non ha inviato "hello".
+        camera_size (tuple): (larghezza, altezza) dei frame della videocamera.
+        fallback_fps (int | None, opzionale): Frequenza da usare se il client non la dichiara.
+
+    Returns:
+        StreamParams: I parametri negoziati.
+    """
+    if hello is None:
+        return default_stream(camera_size, fallback_fps)
+
+    width, height = camera_size
+    if hello.viewport is not None:
+        scale = min(1.0, hello.viewport[0] / width, hello.viewport[1] / height)
+        # Dimensioni pari, richieste da alcuni codificatori
+        width, height = max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+    # Un client che non dichiara i formati supporta almeno JPEG
+    offered = hello.codecs or (FrameCodec.JPEG.value,)
+    codec = next((codec for codec in FrameCodec if codec.value in offered), FrameCodec.JPEG)
+
+    return StreamParams(
+        fps=_clamp_fps(hello.refresh_rate or fallback_fps or StreamSettings.DEFAULT_FPS.value),
+        width=width,
+        height=height,
+        codec=codec,
+        transport=hello.transport
+    )
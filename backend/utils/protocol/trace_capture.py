@@ -0,0 +1,218 @@
+"""
+Modulo: trace_capture
+
+Descrizione:
+Cattura dei messaggi in arrivo dai client, con i loro istanti di arrivo, per riprodurre sessioni
+reali contro un server con hardware simulato (`trace_replay.py`).
+
+Ogni avvio del server con la cattura attiva crea una cartella `trace-<data>-<ora>`; ogni connessione
+scrive un file JSON Lines `connection-<n>.jsonl`:
+- la prima riga è l'intestazione: {"trace": versione, "connection": n, "role": ruolo iniziale,
+  "resumed": ripresa di una sessione, "offset": secondi dall'avvio della cattura, "startedAt": epoch};
+- ogni riga successiva è un messaggio: [secondi dall'apertura della connessione, "t", testo] oppure
+  [secondi dall'apertura della connessione, "b", contenuto binario in base64];
+- l'ultima riga, [secondi dall'apertura della connessione, "x", ""], indica la chiusura.
+
+I messaggi vengono salvati esattamente come ricevuti. Il token di ripresa non viene salvato.
+L'event loop si limita ad accodare il messaggio: conversione e scrittura su disco avvengono in un
+thread dedicato, condiviso da tutte le connessioni.
+
+Esempio di utilizzo:
+    capture = TraceCapture("../user/traces/")
+    trace = capture.open(role="driver", resumed=False)
+    trace.record(message)
+    trace.close()
+
+Dipendenze:
+- base64, json per la codifica delle righe (`builtin`).
+- datetime per il nome della cartella di cattura (`builtin`).
+- itertools per la numerazione delle connessioni (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- queue, threading per il thread di scrittura (`builtin`).
+- time per gli istanti dei messaggi (`builtin`).
+- utils.protocol.protocolenums.trace_settings per il formato e la cartella di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import base64
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from utils.protocol.protocolenums.trace_settings import TraceSettings
+
+_CLOSE = object()  # Segnale di chiusura del file di una connessione
+
+
+class ConnectionTrace:
+    """
+    Cattura dei messaggi di una singola connessione.
+
+    Attributes:
+        connection (int): Numero progressivo della connessione.
+        messages (int): Messaggi catturati.
+    """
+
+    def __init__(self, capture: "TraceCapture", connection: int, header: dict):
+        self.connection = connection
+        self.messages = 0
+        self._capture = capture
+        self._opened = time.monotonic()
+        self._closed = False
+        capture._queue.put((self, None, header))
+
+    def record(self, message: str | bytes) -> None:
+        """
+        Accoda un messaggio ricevuto, con l'istante di arrivo.
+
+        Args:
+            message (str | bytes): Il messaggio così come ricevuto dal WebSocket.
+        """
+        if not self._closed:
+            self.messages += 1
+            self._capture._queue.put((self, time.monotonic() - self._opened, message))
+
+    def close(self) -> None:
+        """
+        Chiude la cattura della connessione; può essere chiamato più volte.
+        """
+        if not self._closed:
+            self._closed = True
+            self._capture._queue.put((self, time.monotonic() - self._opened, _CLOSE))
+
+
+class TraceCapture:
+    """
+    Cartella di cattura di un avvio del server e thread che scrive i file delle connessioni.
+
+    Attributes:
+        directory (Path): Cartella della cattura.
+    """
+
+    def __init__(self, directory: str = TraceSettings.DIRECTORY.value):
+        """
+        Prepara la cattura; cartella e thread di scrittura vengono creati alla prima connessione.
+
+        Args:
+            directory (str, opzionale): Cartella che contiene le catture (default: "../user/traces/").
+        """
+        self.directory = Path(directory) / f"trace-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        self._origin = time.monotonic()
+        self._numbers = itertools.count(1)
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def open(self, role: str, resumed: bool) -> ConnectionTrace:
+        """
+        Avvia la cattura di una nuova connessione.
+
+        Args:
+            role (str): Ruolo assegnato alla connessione ("driver" o "spectator").
+            resumed (bool): True se la connessione ha ripreso una sessione esistente.
+
+        Returns:
+            ConnectionTrace: La cattura della connessione.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-capture", daemon=True)
+            self._thread.start()
+
+        connection = next(self._numbers)
+        header = {
+            "trace": TraceSettings.VERSION.value,
+            "connection": connection,
+            "role": role,
+            "resumed": resumed,
+            "offset": round(time.monotonic() - self._origin, 6),
+            "startedAt": time.time(),
+        }
+        return ConnectionTrace(self, connection, header)
+
+    def _run(self) -> None:
+        """
+        Thread di scrittura: converte i messaggi accodati in righe JSON e li aggiunge ai file.
+        """
+        files = {}
+        while True:
+            batch = [self._queue.get()]
+            while True:  # Scrive in un colpo solo tutti i messaggi già in coda
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            touched = set()
+            for trace, offset, message in batch:
+                try:
+                    if message is _CLOSE:
+                        file = files.pop(trace.connection, None)
+                        touched.discard(trace.connection)
+                        if file is not None:
+                            file.write(json.dumps([round(offset, 6), "x", ""]) + "\n")
+                            file.close()
+                        continue
+
+                    if offset is None:  # Intestazione: apre il file della connessione
+                        self.directory.mkdir(parents=True, exist_ok=True)
+                        files[trace.connection] = open(self.directory / f"connection-{trace.connection}.jsonl", "w", encoding="utf-8")
+                        line = message
+                    elif isinstance(message, bytes):
+                        line = [round(offset, 6), "b", base64.b64encode(message).decode("ascii")]
+                    else:
+                        line = [round(offset, 6), "t", message]
+
+                    file = files.get(trace.connection)
+                    if file is not None:
+                        file.write(json.dumps(line, ensure_ascii=False) + "\n")
+                        touched.add(trace.connection)
+                except OSError as e:
+                    logging.error(f"Errore durante la scrittura della cattura dei messaggi ({self.directory}): {e}")
+
+            for connection in touched:
+                try:
+                    files[connection].flush()
+                except OSError as e:
+                    logging.error(f"Errore durante la scrittura della cattura dei messaggi ({self.directory}): {e}")
+
+
+def load_trace(path) -> tuple[dict, list]:
+    """
+    Carica il file di cattura di una connessione.
+
+    Args:
+        path (str | Path): Il file `connection-<n>.jsonl`.
+
+    Raises:
+        ValueError: Se il file non è una cattura valida o ha una versione non supportata.
+
+    Returns:
+        tuple[dict, list]: (intestazione, [(secondi dall'apertura, messaggio str | bytes)]).
+                           L'intestazione contiene anche "closedAt", i secondi dall'apertura alla
+                           chiusura della connessione, oppure None se la chiusura non è stata catturata.
+    """
+    with open(path, encoding="utf-8") as file:
+        try:
+            header = json.loads(file.readline())
+        except json.JSONDecodeError:
+            raise ValueError(f"Non è un file di cattura dei messaggi: {path}")
+        if not isinstance(header, dict) or header.get("trace") != TraceSettings.VERSION.value:
+            raise ValueError(f"Versione della cattura non supportata: {path}")
+
+        messages = []
+        header["closedAt"] = None
+        for line in file:
+            try:
+                offset, kind, content = json.loads(line)
+            except ValueError:
+                break  # Ultima riga incompleta (server arrestato durante la scrittura)
+            if kind == "x":
+                header["closedAt"] = offset
+                break
+            messages.append((offset, base64.b64decode(content) if kind == "b" else content))
+    return header, messages
@@ -9,20 +9,30 @@ Dipendenze:
 - sys per accedere alla piattaforma del client.
 - ctypes per creare un'istanza dell'api windows di gestione dello schermo.
 - subprocess per aprire un cmd ed eseguire un comando senza doverlo far fare all'utente.
-- cv2 per ottenere la lunghezza e l'altezza supportate dalla videocamera del client.
-- logging per configurare le impostazioni di logging del server.
+- cv2 per ottenere la lunghezza e l'altezza supportate dalla videocamera del client (importato solo
+  quando serve, per non rallentare l'avvio del server).
+- logging per configurare le impostazioni di logging del server (scrittura in un thread separato
+  tramite `QueueHandler`/`QueueListener` e rotazione del file con `RotatingFileHandler`).
+- atexit e queue per la coda dei messaggi di log e il suo svuotamento alla chiusura (`builtin`).
+- utils.logs per l'aggregazione dei messaggi ripetuti.
 - os per utils di directory.
+- asyncio per la scelta dell'event loop (`builtin`); uvloop è opzionale.
 
 Autore: ZS
 Data: 2025-04-02
 """
 
 import sys
+import asyncio
+import atexit
 import ctypes
 import subprocess
-import cv2
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from utils.logs.rate_limit_filter import RateLimitFilter
+from utils.logs.logsenums.log_settings import LogSettings
 
 class ServerUtils:
     """
@@ -75,6 +85,8 @@ class ServerUtils:
         Returns:
             tuple: (larghezza, altezza) della videocamera.
         """
+        import cv2
+
         cap = cv2.VideoCapture(camera_index)  # Apri la videocamera
         if not cap.isOpened():
             print("Errore: impossibile aprire la videocamera")
@@ -91,26 +103,74 @@ class ServerUtils:
         """
         Configura il sistema di logging dell'applicazione.
 
-        Imposta un formato standard per i messaggi di log, salva i log in un file "log.txt"
-        e li visualizza anche sul terminale. Riduce al minimo i messaggi di default di Pygame
-        impostando il livello di logging del modulo "pygame" a CRITICAL.
+        Imposta un formato standard per i messaggi di log, salva i log nel file "log.txt" (ruotato
+        oltre i 5 MiB, con 3 file precedenti conservati) e li visualizza anche sul terminale.
+        La scrittura su file e terminale avviene in un thread separato (`QueueListener`): il codice
+        che emette un messaggio, incluso l'event loop, si limita ad accodarlo. I messaggi ripetuti
+        vengono aggregati da `RateLimitFilter` prima di essere accodati.
+        Riduce al minimo i messaggi di default di Pygame impostando il livello di logging del
+        modulo "pygame" a CRITICAL.
 
         Returns:
-            None
+            QueueListener: Il listener che scrive i messaggi, già avviato e arrestato all'uscita.
         """
-        # Configurazione del sistema di logging
-        logging.basicConfig(
-            level=logging.INFO,  # Livello di logging: INFO
-            format="%(asctime)s [%(levelname)s] %(message)s",  # Formato del messaggio di log
-            datefmt="%Y-%m-%d %H:%M:%S",  # Formato della data/ora
-            handlers=[
-                logging.FileHandler(os.path.join(os.getcwd(), "log.txt")),  # Salva i log in un file
-                logging.StreamHandler()  # Visualizza i log sul terminale
-            ]
+        formatter = logging.Formatter(
+            fmt="%(asctime)s [%(levelname)s] %(message)s",  # Formato del messaggio di log
+            datefmt="%Y-%m-%d %H:%M:%S"  # Formato della data/ora
+        )
+        file_handler = RotatingFileHandler(  # Salva i log in un file, con rotazione per dimensione
+            os.path.join(os.getcwd(), LogSettings.FILE_NAME.value),
+            maxBytes=LogSettings.MAX_BYTES.value,
+            backupCount=LogSettings.BACKUP_COUNT.value,
+            encoding="utf-8"
         )
+        stream_handler = logging.StreamHandler()  # Visualizza i log sul terminale
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        # Il logger accoda soltanto i messaggi; file e terminale vengono scritti dal listener
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))  # Il formato completo è applicato dal listener
+        queue_handler.addFilter(RateLimitFilter())
+        listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)  # Scrive i messaggi ancora in coda alla chiusura
+
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])  # Livello di logging: INFO
 
         # Riduci al minimo i messaggi di default di Pygame
         logging.getLogger("pygame").setLevel(logging.CRITICAL)
 
         # Messaggio di conferma
-        logging.info("Logging configurato correttamente. I log verranno salvati in 'log.txt'.")
\ No newline at end of file
+        logging.info(f"Logging configurato correttamente. I log verranno salvati in '{LogSettings.FILE_NAME.value}'.")
+        return listener
+
+    @staticmethod
+    def configure_event_loop(use_uvloop: bool = False) -> str:
+        """
+        Imposta la politica dell'event loop di asyncio prima dell'avvio del server.
+
+        Su Windows viene usato il selettore compatibile con i socket; altrove, se richiesto e
+        installato, viene usato uvloop. Se uvloop non è disponibile resta l'event loop standard.
+
+        Args:
+            use_uvloop (bool, opzionale): True per usare uvloop quando disponibile (default: False).
+
+        Returns:
+            str: Nome dell'event loop in uso ("asyncio", "asyncio-selector" o "uvloop").
+        """
+        if os.name == "nt":
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+            return "asyncio-selector"
+
+        if use_uvloop:
+            try:
+                import uvloop
+            except ImportError:
+                logging.warning("uvloop non è installato: viene usato l'event loop standard di asyncio.")
+            else:
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+                return "uvloop"
+
+        return "asyncio"
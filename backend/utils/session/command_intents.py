@@ -0,0 +1,111 @@
+"""
+Modulo: command_intents
+
+Descrizione:
+Livello di intenzione dei comandi di guida.
+Tenendo premuto un tasto il client reinvia continuamente lo stesso comando ("move-forward",
+"turn-left", ...). Senza filtro ogni ripetizione cancellerebbe la rampa di velocità o di sterzata
+in corso e ne creerebbe una nuova, ripartendo da capo e generando un task per ogni messaggio.
+
+Per ogni asse di controllo (movimento, sterzo) viene memorizzata l'ultima intenzione messa in
+atto, insieme ai parametri che ne determinano l'effetto (ad esempio marcia e turbo). Un comando
+identico all'intenzione già in vigore viene soltanto registrato come "rinfrescato" e scartato:
+solo un vero cambio di stato produce nuovo lavoro.
+
+Dipendenze:
+- time per l'istante dell'ultimo rinfresco (`builtin`).
+- collections per il conteggio dei comandi scartati (`builtin`).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import time
+from collections import Counter
+
+
+class CommandIntents:
+    """
+    Intenzioni in vigore per ogni asse di controllo di una sessione.
+
+    Esempio di utilizzo:
+        intent = ("forward", gear, turbo)
+        if intents.is_redundant("movement", intent):
+            return
+        ...avvio del task...
+        intents.set("movement", intent)
+
+    Attributes:
+        _current (dict): {asse: intenzione in vigore}.
+        _refreshed_at (dict): {asse: istante dell'ultimo comando ricevuto per l'intenzione in vigore}.
+        _suppressed (Counter): Comandi ridondanti scartati, per intenzione.
+        transitions (int): Numero di cambi di intenzione effettivi.
+    """
+
+    def __init__(self):
+        self._current = {}
+        self._refreshed_at = {}
+        self._suppressed = Counter()
+        self.transitions = 0
+
+    def is_redundant(self, axis: str, intent: tuple) -> bool:
+        """
+        Verifica se un comando coincide con l'intenzione già in vigore sull'asse.
+        In tal caso l'intenzione viene rinfrescata e il comando conteggiato come scartato.
+
+        Args:
+            axis (str): Asse di controllo ("movement", "steering").
+            intent (tuple): Intenzione del comando, con i parametri che ne determinano l'effetto.
+
+        Returns:
+            bool: True se il comando non deve produrre alcun lavoro.
+        """
+        if self._current.get(axis) != intent:
+            return False
+
+        self._refreshed_at[axis] = time.monotonic()
+        self._suppressed[intent[0]] += 1
+        return True
+
+    def set(self, axis: str, intent: tuple) -> None:
+        """
+        Registra l'intenzione appena messa in atto sull'asse.
+
+        Args:
+            axis (str): Asse di controllo.
+            intent (tuple): Intenzione messa in atto.
+        """
+        self._current[axis] = intent
+        self._refreshed_at[axis] = time.monotonic()
+        self.transitions += 1
+
+    def reset(self) -> None:
+        """
+        Dimentica le intenzioni in vigore, ad esempio quando il motore viene spento:
+        il comando successivo produrrà di nuovo lavoro.
+        """
+        self._current.clear()
+        self._refreshed_at.clear()
+
+    def refreshed_at(self, axis: str) -> float | None:
+        """
+        Restituisce l'istante (time.monotonic) dell'ultimo comando ricevuto per l'intenzione
+        in vigore sull'asse, oppure None se l'asse non ha intenzioni.
+        """
+        return self._refreshed_at.get(axis)
+
+    @property
+    def suppressed(self) -> int:
+        """
+        Numero totale di comandi ridondanti scartati.
+        """
+        return sum(self._suppressed.values())
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le statistiche del livello di intenzione.
+
+        Returns:
+            dict: {"suppressed": {comando: scartati}, "transitions": cambi effettivi}
+        """
+        return {"suppressed": dict(self._suppressed), "transitions": self.transitions}
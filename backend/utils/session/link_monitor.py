@@ -0,0 +1,220 @@
+"""
+Modulo: link_monitor
+
+Descrizione:
+Monitor della qualità del collegamento con un client, tramite i ping del protocollo WebSocket.
+
+A intervalli regolari il monitor invia un ping e attende il pong corrispondente, misurando:
+- l'RTT dell'ultimo ping e la sua media mobile esponenziale (SRTT);
+- il jitter, come variazione media tra RTT consecutivi (stimatore di RFC 3550);
+- gli intervalli consecutivi trascorsi senza pong (ping persi).
+
+Il collegamento è "degradato" quando l'ultimo RTT, o l'attesa del pong in corso, supera la soglia
+`max_rtt_ms`, oppure dopo `max_missed` intervalli consecutivi senza pong; torna normale al primo
+pong arrivato entro la soglia. A ogni cambio di stato viene chiamato `on_change(degraded, reason)`:
+per il pilota il server ferma il veicolo (politica "uomo morto"), così che un collegamento
+rallentato, ad esempio dallo streaming video, non lasci il veicolo in movimento con l'ultimo comando.
+
+Dipendenze:
+- asyncio per il task dei ping (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- time per la misura dell'attesa dei pong (`builtin`).
+- websockets per le eccezioni di connessione chiusa (`websockets`).
+- utils.metrics.registry per le metriche del collegamento.
+- utils.session.sessionenums.link_settings per le impostazioni di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+import time
+import websockets
+from utils.metrics.registry import REGISTRY
+from utils.session.sessionenums.link_settings import LinkSettings
+
+_RTT_MS = REGISTRY.histogram("lego_link_rtt_ms", "RTT dei ping WebSocket (ms), per ruolo del client", ("role",))
+_MISSED = REGISTRY.counter("lego_link_missed_pings_total", "Intervalli di ping trascorsi senza pong, per ruolo del client", ("role",))
+_DEGRADED = REGISTRY.counter("lego_link_degraded_total", "Passaggi del collegamento allo stato degradato, per ruolo del client", ("role",))
+
+
+class LinkMonitor:
+    """
+    Misura RTT e jitter di una connessione e segnala i cambi di qualità del collegamento.
+
+    Attributes:
+        interval (float): Secondi tra due ping.
+        max_rtt_ms (float): RTT oltre il quale il collegamento è degradato (0 per ignorare l'RTT).
+        max_missed (int): Intervalli consecutivi senza pong dopo i quali il collegamento è degradato.
+        rtt_ms (float | None): RTT dell'ultimo ping (ms).
+        srtt_ms (float | None): Media mobile esponenziale dell'RTT (ms).
+        min_rtt_ms (float | None): RTT minimo misurato (ms).
+        max_rtt_seen_ms (float | None): RTT massimo misurato (ms).
+        jitter_ms (float): Variazione media tra RTT consecutivi (ms).
+        missed (int): Intervalli consecutivi senza pong.
+        missed_total (int): Intervalli senza pong dall'apertura della connessione.
+        pongs (int): Pong ricevuti.
+        degraded (bool): True se il collegamento è degradato.
+        reason (str | None): Motivo dell'ultimo passaggio allo stato degradato.
+        degraded_count (int): Passaggi allo stato degradato.
+    """
+
+    def __init__(self, websocket, on_change=None, role: str = "spectator",
+                 interval: float = LinkSettings.PING_INTERVAL_SECONDS.value,
+                 max_rtt_ms: float = LinkSettings.MAX_RTT_MS.value,
+                 max_missed: int = LinkSettings.MAX_MISSED_PINGS.value):
+        """
+        Inizializza il monitor; i ping partono con `start()`.
+
+        Args:
+            websocket (websockets.ServerConnection): Connessione da monitorare.
+            on_change (callable, opzionale): Funzione `on_change(degraded, reason)` chiamata a ogni
+                        cambio di stato del collegamento (default: None).
+            role (str, opzionale): Ruolo del client, usato come etichetta delle metriche (default: "spectator").
+            interval (float, opzionale): Secondi tra due ping (default: 0.5).
+            max_rtt_ms (float, opzionale): Soglia dell'RTT in ms, 0 per ignorarla (default: 500).
+            max_missed (int, opzionale): Intervalli consecutivi senza pong tollerati (default: 3).
+        """
+        self.websocket = websocket
+        self.on_change = on_change
+        self.role = role
+        self.interval = interval
+        self.max_rtt_ms = max_rtt_ms
+        self.max_missed = max(1, int(max_missed))
+        self.rtt_ms = None
+        self.srtt_ms = None
+        self.jitter_ms = 0.0
+        self.min_rtt_ms = None
+        self.max_rtt_seen_ms = None
+        self.missed = 0
+        self.missed_total = 0
+        self.pongs = 0
+        self.degraded = False
+        self.reason = None
+        self.degraded_count = 0
+        self._task = None
+
+    def start(self) -> None:
+        """
+        Avvia il task dei ping, se non è già attivo.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="link-monitor")
+
+    async def stop(self) -> None:
+        """
+        Arresta il task dei ping.
+        """
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        """
+        Invia un ping per intervallo e attende il pong; ogni intervallo trascorso senza pong
+        conta come ping perso e, se l'attesa supera la soglia, il collegamento diventa degradato.
+        """
+        try:
+            while True:
+                sent = time.perf_counter()
+                pong = await self.websocket.ping()
+                while True:
+                    try:
+                        latency = await asyncio.wait_for(asyncio.shield(pong), self.interval)
+                        break
+                    except asyncio.TimeoutError:
+                        self.missed += 1
+                        self.missed_total += 1
+                        _MISSED.labels(self.role).inc()
+                        self._evaluate(pending_ms=(time.perf_counter() - sent) * 1000)
+
+                self._on_pong(latency * 1000)
+                self._evaluate()
+                await asyncio.sleep(max(0.0, sent + self.interval - time.perf_counter()))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Errore imprevisto nel monitor del collegamento: {e}")
+
+    def _on_pong(self, rtt_ms: float) -> None:
+        """
+        Aggiorna RTT, media mobile e jitter con un nuovo campione.
+        """
+        if self.rtt_ms is not None:
+            self.jitter_ms += (abs(rtt_ms - self.rtt_ms) - self.jitter_ms) * LinkSettings.JITTER_SMOOTHING.value
+        self.srtt_ms = rtt_ms if self.srtt_ms is None else self.srtt_ms + (rtt_ms - self.srtt_ms) * LinkSettings.SMOOTHING.value
+        self.rtt_ms = rtt_ms
+        self.min_rtt_ms = rtt_ms if self.min_rtt_ms is None else min(self.min_rtt_ms, rtt_ms)
+        self.max_rtt_seen_ms = rtt_ms if self.max_rtt_seen_ms is None else max(self.max_rtt_seen_ms, rtt_ms)
+        self.missed = 0
+        self.pongs += 1
+        _RTT_MS.labels(self.role).observe(rtt_ms)
+
+    def _evaluate(self, pending_ms: float | None = None) -> None:
+        """
+        Aggiorna lo stato del collegamento e chiama `on_change` se è cambiato.
+
+        Args:
+            pending_ms (float | None, opzionale): Attesa del pong in corso, se non ancora arrivato.
+        """
+        reason = None
+        if self.missed >= self.max_missed:
+            reason = f"{self.missed} ping senza risposta"
+        elif self.max_rtt_ms and pending_ms is not None and pending_ms > self.max_rtt_ms:
+            reason = f"pong in attesa da {pending_ms:.0f} ms"
+        elif self.max_rtt_ms and pending_ms is None and self.rtt_ms > self.max_rtt_ms:
+            reason = f"RTT di {self.rtt_ms:.0f} ms"
+
+        if pending_ms is not None and reason is None:
+            return  # In attesa del pong lo stato può solo peggiorare: torna normale all'arrivo del pong
+
+        degraded = reason is not None
+        if degraded == self.degraded:
+            return
+
+        self.degraded = degraded
+        if degraded:
+            self.reason = reason
+            self.degraded_count += 1
+            _DEGRADED.labels(self.role).inc()
+        if self.on_change is not None:
+            self.on_change(degraded, reason)
+
+    def get_telemetry(self) -> dict:
+        """
+        Restituisce lo stato del collegamento da pubblicare al client.
+
+        Returns:
+            dict: RTT medio in ms (arrotondato) e stato di degrado del collegamento.
+        """
+        return {"rttMs": None if self.srtt_ms is None else round(self.srtt_ms), "linkDegraded": self.degraded}
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce le misure del collegamento.
+
+        Returns:
+            dict: RTT (ultimo, medio, minimo, massimo), jitter, ping persi, stato e motivo del degrado.
+        """
+        def rounded(value):
+            return None if value is None else round(value, 2)
+
+        return {
+            "rttMs": rounded(self.rtt_ms),
+            "srttMs": rounded(self.srtt_ms),
+            "minRttMs": rounded(self.min_rtt_ms),
+            "maxRttMs": rounded(self.max_rtt_seen_ms),
+            "jitterMs": round(self.jitter_ms, 2),
+            "pongs": self.pongs,
+            "missed": self.missed,
+            "missedTotal": self.missed_total,
+            "degraded": self.degraded,
+            "degradedCount": self.degraded_count,
+            "reason": self.reason,
+        }
@@ -0,0 +1,146 @@
+"""
+Modulo: session
+
+Descrizione:
+Definisce la classe `Session`, lo stato associato a ogni connessione WebSocket.
+La sessione raggruppa la connessione, lo scheduler di invio, il ruolo del client e, per il
+pilota, i controller hardware (telecamera, motori, audio) e il publisher della telemetria;
+movimento e sterzata sono eseguiti dal ciclo di controllo del controller dei motori.
+È l'oggetto che il dispatcher passa a ogni handler dei messaggi: nessuno stato di un client è
+quindi condiviso con le altre connessioni.
+
+La sessione del pilota è identificata da un token di ripresa: se la connessione cade, la sessione
+resta "parcheggiata" con i controller hardware attivi e un client che si ricollega presentando
+il token la riprende (`rebind`) senza reinizializzare telecamera, motori e audio.
+
+Dipendenze:
+- utils.session.sessionenums.session_role per il ruolo del client.
+- utils.session.command_intents per il filtro dei comandi ripetuti.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+from utils.session.sessionenums.session_role import SessionRole
+from utils.session.command_intents import CommandIntents
+
+
+class Session:
+    """
+    Stato di una singola connessione client.
+
+    Attributes:
+        websocket (websockets.ServerConnection): Connessione WebSocket del client.
+        sender (SendScheduler): Scheduler a priorità dei messaggi in uscita verso il client.
+        role (SessionRole): Ruolo del client (pilota o spettatore).
+        publisher (StatePublisher | None): Publisher della telemetria di stato (solo pilota).
+        camera_controller (CameraUtils | None): Controller della telecamera (solo pilota).
+        motor_controller (MotorUtils | None): Controller dei motori (solo pilota).
+        audio_controller (AudioUtils | None): Controller audio (solo pilota).
+        audio_task (asyncio.Task | None): Task di preparazione dell'ultimo file audio caricato.
+        temp_sound (str | None): Nome del file audio temporaneo in riproduzione.
+        intents (CommandIntents): Intenzioni di guida in vigore, per scartare i comandi ripetuti.
+        hello (HelloPayload | None): Capacità dichiarate dal client con "hello", se inviate.
+        resume_token (str | None): Token con cui il pilota può riprendere la sessione dopo una disconnessione.
+        expiry (asyncio.TimerHandle | None): Scadenza della sessione parcheggiata, se il pilota è disconnesso.
+        trace (ConnectionTrace | None): Cattura dei messaggi della connessione corrente, se attiva.
+        link (LinkMonitor | None): Monitor del collegamento della connessione corrente, se attivo.
+    """
+
+    def __init__(self, websocket, sender, role: SessionRole = SessionRole.SPECTATOR):
+        """
+        Inizializza la sessione di un client appena connesso.
+
+        Args:
+            websocket (websockets.ServerConnection): Connessione WebSocket del client.
+            sender (SendScheduler): Scheduler di invio della connessione.
+            role (SessionRole, opzionale): Ruolo iniziale del client (default: spettatore).
+        """
+        self.websocket = websocket
+        self.sender = sender
+        self.role = role
+        self.publisher = None
+        self.camera_controller = None
+        self.motor_controller = None
+        self.audio_controller = None
+        self.audio_task = None
+        self.temp_sound = None
+        self.intents = CommandIntents()
+        self.hello = None
+        self.resume_token = None
+        self.expiry = None
+        self.trace = None
+        self.link = None
+
+    @property
+    def is_driver(self) -> bool:
+        """
+        Indica se la sessione comanda il veicolo.
+
+        Returns:
+            bool: True se il ruolo è DRIVER.
+        """
+        return self.role == SessionRole.DRIVER
+
+    @property
+    def parked(self) -> bool:
+        """
+        Indica se la sessione è in attesa di essere ripresa dopo la caduta della connessione.
+        """
+        return not self.sender.attached
+
+    def rebind(self, websocket) -> None:
+        """
+        Collega la sessione a una nuova connessione, mantenendo controller e stato.
+
+        Args:
+            websocket (websockets.ServerConnection): La connessione del client che riprende la sessione.
+        """
+        if self.expiry is not None:
+            self.expiry.cancel()
+            self.expiry = None
+        self.websocket = websocket
+        self.sender.attach(websocket)
+
+    def attach_controllers(self, camera_controller, motor_controller, audio_controller, publisher) -> None:
+        """
+        Promuove la sessione a pilota assegnandole i controller hardware.
+
+        Args:
+            camera_controller (CameraUtils): Controller della telecamera.
+            motor_controller (MotorUtils): Controller dei motori.
+            audio_controller (AudioUtils): Controller audio.
+            publisher (StatePublisher): Publisher della telemetria di stato.
+        """
+        self.role = SessionRole.DRIVER
+        self.camera_controller = camera_controller
+        self.motor_controller = motor_controller
+        self.audio_controller = audio_controller
+        self.publisher = publisher
+
+    async def close(self) -> None:
+        """
+        Rilascia le risorse della sessione: ciclo di controllo dei motori, streaming della telecamera,
+        riproduzione audio, telemetria e scheduler di invio.
+        """
+        if self.expiry is not None:
+            self.expiry.cancel()
+            self.expiry = None
+
+        if self.audio_task and not self.audio_task.done():
+            self.audio_task.cancel()
+
+        if self.motor_controller:
+            await self.motor_controller.close()
+
+        # Prima dello scheduler: lo streaming non deve inviare su una connessione chiusa
+        if self.camera_controller:
+            await self.camera_controller.stop_video_streaming()
+
+        if self.audio_controller:
+            self.audio_controller.stop()
+
+        if self.publisher:
+            await self.publisher.stop()
+
+        await self.sender.close()
@@ -0,0 +1,32 @@
+"""
+Modulo: link_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (LinkSettings) con le impostazioni di default del
+monitor della qualità del collegamento con il client (RTT, jitter e arresto di sicurezza).
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class LinkSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del monitor del collegamento.
+
+    Values:
+        PING_INTERVAL_SECONDS (float): Intervallo tra due ping WebSocket.
+        MAX_RTT_MS (float): RTT oltre il quale il collegamento è considerato degradato.
+        MAX_MISSED_PINGS (int): Intervalli consecutivi senza pong dopo i quali il collegamento è degradato.
+        SMOOTHING (float): Peso dell'ultimo campione nella media mobile esponenziale dell'RTT.
+        JITTER_SMOOTHING (float): Peso dell'ultimo campione nella stima del jitter (RFC 3550).
+    """
+    PING_INTERVAL_SECONDS = 0.5
+    MAX_RTT_MS = 500
+    MAX_MISSED_PINGS = 3          # 1,5 s senza risposta con l'intervallo di default
+    SMOOTHING = 0.125             # Come lo SRTT di TCP (RFC 6298)
+    JITTER_SMOOTHING = 0.0625     # 1/16, come il jitter di RTP
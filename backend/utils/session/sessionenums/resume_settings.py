@@ -0,0 +1,28 @@
+"""
+Modulo: resume_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (ResumeSettings) con le impostazioni di default della
+ripresa della sessione del pilota dopo una disconnessione.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class ResumeSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni della ripresa di sessione.
+
+    Values:
+        GRACE_SECONDS (int): Secondi per cui la sessione del pilota disconnesso resta riprendibile.
+        TOKEN_BYTES (int): Byte casuali del token di ripresa.
+        QUERY_PARAMETER (str): Parametro dell'URL con cui il client presenta il token alla riconnessione.
+    """
+    GRACE_SECONDS = 30
+    TOKEN_BYTES = 16
+    QUERY_PARAMETER = "resume"
@@ -0,0 +1,21 @@
+"""
+Modulo: session_role
+
+Descrizione:
+Questo modulo definisce un'enumerazione (SessionRole) per il ruolo di un client connesso.
+
+Dipendenze:
+- enum per la gestione dei ruoli tramite enumerazione.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class SessionRole(enum.Enum):
+    """
+    Enumerazione dei ruoli di una sessione client.
+    """
+    DRIVER = "driver"        # Unico client che comanda il veicolo
+    SPECTATOR = "spectator"  # Client in sola lettura che riceve video e telemetria
@@ -0,0 +1,126 @@
+"""
+Modulo: spectator_hub
+
+Descrizione:
+Diffusione di video e telemetria del pilota verso tutti i client spettatori.
+Ogni messaggio viene serializzato una sola volta dal modulo che lo produce e inoltrato a tutti gli
+spettatori con `websockets.broadcast`, che scrive direttamente sulle connessioni senza creare un
+task né una copia del messaggio per ogni client. Gli spettatori troppo lenti, il cui buffer di
+scrittura supera la soglia, vengono saltati per quel messaggio invece di accumulare memoria.
+
+I frame binari vengono inoltrati così come sono solo agli spettatori che hanno dichiarato il
+trasporto binario nel messaggio "hello"; gli altri ricevono la versione JSON dello stesso frame,
+convertita una sola volta per tutti.
+
+Dipendenze:
+- websockets per l'invio in broadcast (`websockets`).
+- utils.protocol.frames per la conversione dei frame binari.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import websockets
+from utils.protocol.frames import is_binary_frame, binary_to_json
+
+
+class SpectatorHub:
+    """
+    Insieme delle connessioni spettatore e punto unico di broadcast.
+
+    Attributes:
+        _connections (set): Connessioni WebSocket degli spettatori.
+        _binary (set): Connessioni che accettano i frame binari.
+        max_write_buffer (int): Byte in attesa oltre i quali uno spettatore viene saltato.
+        _published (int): Messaggi inoltrati.
+        _skipped (int): Invii saltati per spettatori lenti.
+        _converted (int): Frame binari convertiti in JSON per gli spettatori che non li accettano.
+    """
+
+    def __init__(self, max_write_buffer: int = 1024 * 1024):
+        """
+        Inizializza l'hub senza spettatori.
+
+        Args:
+            max_write_buffer (int, opzionale): Soglia del buffer di scrittura in byte (default: 1 MiB).
+        """
+        self._connections = set()
+        self._binary = set()
+        self.max_write_buffer = max_write_buffer
+        self._published = 0
+        self._skipped = 0
+        self._converted = 0
+
+    def add(self, websocket, binary: bool = False) -> None:
+        """
+        Registra la connessione di un nuovo spettatore.
+
+        Args:
+            websocket (websockets.ServerConnection): Connessione dello spettatore.
+            binary (bool, opzionale): True se lo spettatore accetta i frame binari (default: False).
+        """
+        self._connections.add(websocket)
+        self.set_binary(websocket, binary)
+
+    def set_binary(self, websocket, binary: bool) -> None:
+        """
+        Aggiorna il trasporto dei frame di uno spettatore, dichiarato con "hello".
+        """
+        if binary:
+            self._binary.add(websocket)
+        else:
+            self._binary.discard(websocket)
+
+    def remove(self, websocket) -> None:
+        """
+        Rimuove la connessione di uno spettatore, se presente.
+        """
+        self._connections.discard(websocket)
+        self._binary.discard(websocket)
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def publish(self, message) -> None:
+        """
+        Inoltra un messaggio già serializzato a tutti gli spettatori.
+
+        Args:
+            message (str | bytes): Il messaggio da diffondere.
+        """
+        if not self._connections:
+            return
+
+        targets = []
+        for connection in self._connections:
+            transport = getattr(connection, "transport", None)
+            if transport is not None and transport.get_write_buffer_size() > self.max_write_buffer:
+                self._skipped += 1
+                continue
+            targets.append(connection)
+
+        if is_binary_frame(message):
+            binary_targets = [connection for connection in targets if connection in self._binary]
+            json_targets = [connection for connection in targets if connection not in self._binary]
+            if binary_targets:
+                websockets.broadcast(binary_targets, message)
+            if json_targets:
+                websockets.broadcast(json_targets, binary_to_json(message))
+                self._converted += 1
+        else:
+            websockets.broadcast(targets, message)
+        self._published += 1
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce il numero di spettatori e i contatori di broadcast.
+
+        Returns:
+            dict: {"spectators": int, "published": int, "skipped": int, "converted": int}
+        """
+        return {
+            "spectators": len(self._connections),
+            "published": self._published,
+            "skipped": self._skipped,
+            "converted": self._converted,
+        }
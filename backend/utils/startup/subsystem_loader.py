@@ -0,0 +1,129 @@
+"""
+Modulo: subsystem_loader
+
+Descrizione:
+Caricamento in background dei sottosistemi pesanti del server.
+
+I controller hardware dipendono da librerie con tempi di importazione elevati (OpenCV, NumPy,
+pygame): importarli prima di aprire la porta ritarda l'avvio del listener WebSocket di alcune
+centinaia di millisecondi. Il server apre prima la porta e poi avvia il caricamento dei moduli in
+un thread separato; solo l'assegnazione del ruolo di pilota, che crea i controller, attende che
+il caricamento sia completato. Gli spettatori e i messaggi in sola lettura non attendono.
+
+Esempio di utilizzo:
+    loader = SubsystemLoader(("utils.camera.CameraUtils",))
+    loader.start()                      # Dall'interno dell'event loop
+    await loader.wait()
+    CameraUtils = loader.get("utils.camera.CameraUtils", "CameraUtils")
+
+Dipendenze:
+- asyncio per l'esecuzione del caricamento fuori dall'event loop (`builtin`).
+- importlib per l'importazione dei moduli per nome (`builtin`).
+- logging per il monitoraggio del caricamento (`builtin`).
+- time per la misura dei tempi di importazione (`builtin`).
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+
+
+class SubsystemLoader:
+    """
+    Importa un insieme di moduli in un thread separato, una sola volta.
+
+    Attributes:
+        module_names (tuple): Moduli da importare, nell'ordine.
+        _modules (dict): Moduli già importati {nome: modulo}.
+        _import_ms (dict): Tempo di importazione di ogni modulo {nome: millisecondi}.
+        _task (asyncio.Task | None): Task del caricamento, creato al primo `start()`.
+    """
+
+    def __init__(self, module_names: tuple):
+        """
+        Inizializza il caricatore.
+
+        Args:
+            module_names (tuple): Nomi completi dei moduli da importare (es. "utils.camera.CameraUtils").
+        """
+        self.module_names = tuple(module_names)
+        self._modules = {}
+        self._import_ms = {}
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        True se tutti i moduli sono stati importati.
+        """
+        return len(self._modules) == len(self.module_names)
+
+    def start(self) -> None:
+        """
+        Avvia il caricamento in background, se non è già stato avviato.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(asyncio.to_thread(self._import_all), name="subsystem-loader")
+
+    async def wait(self) -> None:
+        """
+        Attende la fine del caricamento, avviandolo se necessario.
+
+        Raises:
+            ImportError: Se uno dei moduli non può essere importato.
+        """
+        if self.ready:
+            return
+        self.start()
+        await asyncio.shield(self._task)
+
+    def _import_all(self) -> None:
+        """
+        Importa i moduli uno dopo l'altro (eseguito in un thread separato).
+        """
+        start = time.perf_counter()
+        for name in self.module_names:
+            module_start = time.perf_counter()
+            try:
+                self._modules[name] = importlib.import_module(name)
+            except ImportError as e:
+                logging.error(f"Impossibile caricare il sottosistema '{name}': {e}")
+                raise
+            self._import_ms[name] = (time.perf_counter() - module_start) * 1000
+
+        logging.info(f"Sottosistemi caricati in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    def get(self, module_name: str, attribute: str):
+        """
+        Restituisce un attributo (tipicamente una classe) di un modulo già caricato.
+
+        Args:
+            module_name (str): Nome completo del modulo.
+            attribute (str): Nome dell'attributo.
+
+        Raises:
+            RuntimeError: Se il modulo non è ancora stato caricato.
+
+        Returns:
+            object: L'attributo richiesto.
+        """
+        module = self._modules.get(module_name)
+        if module is None:
+            raise RuntimeError(f"Il sottosistema '{module_name}' non è ancora stato caricato.")
+        return getattr(module, attribute)
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce lo stato del caricamento e i tempi di importazione dei moduli.
+
+        Returns:
+            dict: {"ready": bool, "importMs": {modulo: millisecondi}}
+        """
+        return {
+            "ready": self.ready,
+            "importMs": {name: round(ms, 1) for name, ms in self._import_ms.items()},
+        }
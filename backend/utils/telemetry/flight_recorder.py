@@ -0,0 +1,266 @@
+"""
+Modulo: flight_recorder
+
+Descrizione:
+Registratore di volo: telemetria dei motori sempre attiva, in formato binario compatto.
+
+Ogni record occupa 20 byte (`RECORD`): istante in secondi dall'inizio della sessione,
+velocità e angolo di sterzata, marcia, turbo, intensità del freno e tipo di record (`FlightEvent`:
+campione del ciclo di controllo oppure comando ricevuto). I record vengono scritti con
+`struct.pack_into` in un `bytearray` preallocato usato come buffer circolare, senza creare oggetti
+né acquisire lock: il costo per campione è di pochi microsecondi sul thread dell'event loop.
+
+Un thread dedicato copia a intervalli regolari i record nuovi in un file per sessione
+(`flight-<data>-<ora>.lfr`): un'intestazione di 16 byte (`HEADER`) seguita dai record, così che
+il file si possa caricare direttamente in un array NumPy (`load_recording`, `record_dtype`). Se il disco non tiene
+il passo e il buffer si riempie, i record più vecchi vengono sovrascritti e contati come persi.
+
+Esempio di utilizzo:
+    recorder = FlightRecorder()
+    recorder.start()
+    recorder.sample(speed, angle, gear, turbo, brake)
+    recorder.event(FlightEvent.FORWARD, speed, angle, gear, turbo, brake)
+    recorder.close()
+
+Dipendenze:
+- asyncio per la consegna delle metriche all'event loop (`builtin`).
+- datetime per il nome dei file di sessione (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- struct per la codifica dei record (`builtin`).
+- threading per il thread di scrittura (`builtin`).
+- time per gli istanti dei record (`builtin`).
+- numpy per il caricamento dei file di registrazione, importato solo da `load_recording`: il
+  registratore è importato all'avvio del server e non deve caricare NumPy prima dell'apertura del listener.
+- utils.metrics.registry per le metriche di scrittura.
+- utils.motor.motorenums.gears per la codifica delle marce.
+- utils.telemetry.telemetryenums per i tipi di record e le impostazioni del registratore.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from utils.metrics.registry import REGISTRY
+from utils.motor.motorenums.gears import Gear
+from utils.telemetry.telemetryenums.flight_event import FlightEvent
+from utils.telemetry.telemetryenums.flight_recorder_settings import FlightRecorderSettings
+
+MAGIC = b"LFR\x00"
+VERSION = 1
+HEADER = struct.Struct("<4sHHd")  # magic, versione, dimensione del record, inizio della sessione (epoch)
+RECORD = struct.Struct("<dffBBBB")  # istante, velocità, angolo, marcia, turbo, freno, tipo di record
+
+# Codici delle marce nei record: 0 per valori sconosciuti
+GEAR_CODES = {gear.value: code for code, gear in enumerate(Gear, start=1)}
+GEAR_NAMES = {code: value for value, code in GEAR_CODES.items()}
+
+_RECORDS_LOST = REGISTRY.counter("lego_flight_records_lost_total", "Record del registratore di volo sovrascritti prima della scrittura su disco")
+_BYTES_WRITTEN = REGISTRY.counter("lego_flight_bytes_written_total", "Byte scritti dal registratore di volo")
+
+
+class FlightRecorder:
+    """
+    Buffer circolare dei record di telemetria, scritto su disco da un thread dedicato.
+
+    I record vengono aggiunti solo dal thread dell'event loop; il thread di scrittura legge il
+    buffer senza lock e scarta i record che il ciclo di controllo ha sovrascritto durante la copia.
+
+    Attributes:
+        path (Path): File della sessione, creato alla prima scrittura.
+        capacity (int): Record contenuti nel buffer.
+        flush_interval (float): Secondi tra due scritture su disco.
+        heartbeat (float): Secondi massimi tra due campioni se lo stato non cambia.
+        recorded (int): Record aggiunti al buffer dall'inizio della sessione.
+        flushed (int): Record scritti su disco (o persi) dall'inizio della sessione.
+        lost (int): Record sovrascritti prima della scrittura su disco.
+    """
+
+    def __init__(self, directory: str = FlightRecorderSettings.DIRECTORY.value,
+                 capacity: int = FlightRecorderSettings.CAPACITY.value,
+                 flush_interval: float = FlightRecorderSettings.FLUSH_INTERVAL_SECONDS.value,
+                 heartbeat: float = FlightRecorderSettings.HEARTBEAT_SECONDS.value):
+        """
+        Prepara il buffer della sessione; il file viene creato alla prima scrittura.
+
+        Args:
+            directory (str, opzionale): Cartella dei file di registrazione (default: "../user/recordings/").
+            capacity (int, opzionale): Record contenuti nel buffer (default: 16384).
+            flush_interval (float, opzionale): Secondi tra due scritture su disco (default: 1).
+            heartbeat (float, opzionale): Secondi massimi tra due campioni (default: 1).
+        """
+        self.path = Path(directory) / f"flight-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}.lfr"
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.heartbeat = heartbeat
+        self.recorded = 0
+        self.flushed = 0
+        self.lost = 0
+        self._buffer = bytearray(capacity * RECORD.size)
+        self._started_at = time.time()
+        self._origin = time.monotonic()
+        self._last_sample = None
+        self._last_sample_at = float("-inf")
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = None
+
+    def start(self) -> None:
+        """
+        Avvia il thread di scrittura, se non è già attivo. Va chiamato dall'event loop.
+        """
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread = threading.Thread(target=self._run, name="flight-recorder", daemon=True)
+            self._thread.start()
+
+    def sample(self, speed: float, angle: float, gear: str, turbo: int, brake: int) -> None:
+        """
+        Registra un campione del ciclo di controllo, se lo stato è cambiato dall'ultimo campione
+        o se è trascorso l'intervallo di `heartbeat`.
+        """
+        now = time.monotonic()
+        state = (speed, angle, gear, turbo, brake)
+        if state == self._last_sample and now - self._last_sample_at < self.heartbeat:
+            return
+        self._last_sample = state
+        self._last_sample_at = now
+        self._append(now, FlightEvent.SAMPLE.value, speed, angle, gear, turbo, brake)
+
+    def event(self, event: FlightEvent, speed: float, angle: float, gear: str, turbo: int, brake: int) -> None:
+        """
+        Registra un comando ricevuto, con lo stato corrente dei motori.
+        """
+        self._append(time.monotonic(), event.value, speed, angle, gear, turbo, brake)
+
+    def _append(self, now: float, event: int, speed: float, angle: float, gear: str, turbo: int, brake: int) -> None:
+        RECORD.pack_into(self._buffer, (self.recorded % self.capacity) * RECORD.size, now - self._origin,
+                         speed, angle, GEAR_CODES.get(gear, 0), min(max(turbo, 0), 255), min(max(brake, 0), 255), event)
+        self.recorded += 1  # Incrementato dopo la scrittura: il thread di scrittura legge solo record completi
+
+    def close(self) -> None:
+        """
+        Arresta il thread di scrittura dopo aver scritto i record rimasti nel buffer.
+        Può essere chiamato da qualsiasi thread; dopo la chiusura non vanno aggiunti record.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        else:
+            self._flush(final=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        """
+        Thread di scrittura: scrive i record nuovi ogni `flush_interval` secondi e alla chiusura.
+        """
+        while not self._stop.wait(self.flush_interval):
+            self._flush()
+        self._flush(final=True)
+
+    def _flush(self, final: bool = False) -> None:
+        """
+        Copia i record non ancora scritti e li aggiunge al file della sessione.
+
+        Args:
+            final (bool, opzionale): True alla chiusura, quando non vengono più aggiunti record (default: False).
+        """
+        end = self.recorded
+        start = max(self.flushed, end - self.capacity)
+        if start == end:
+            return
+
+        first, last = start % self.capacity, end % self.capacity
+        if first < last:
+            data = bytes(self._buffer[first * RECORD.size:last * RECORD.size])
+        else:
+            data = bytes(self._buffer[first * RECORD.size:]) + bytes(self._buffer[:last * RECORD.size])
+
+        # Record sovrascritti durante la copia: valido solo ciò che il ciclo non ha raggiunto,
+        # contando anche il record eventualmente in scrittura (non ancora in `recorded`)
+        valid_from = max(start, self.recorded + (0 if final else 1) - self.capacity)
+        data = data[(valid_from - start) * RECORD.size:]
+        lost = valid_from - self.flushed
+        self.flushed = end
+
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "wb")
+                self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self._started_at))
+            self._file.write(data)
+            self._file.flush()
+        except OSError as e:
+            logging.error(f"Errore durante la scrittura del registratore di volo ({self.path}): {e}")
+            return
+
+        if lost:
+            self.lost += lost
+        # Le metriche vengono aggiornate solo dal thread dell'event loop
+        if self._loop is not None and not self._loop.is_closed():
+            if lost:
+                self._loop.call_soon_threadsafe(_RECORDS_LOST.inc, lost)
+            self._loop.call_soon_threadsafe(_BYTES_WRITTEN.inc, len(data))
+
+    def get_stats(self) -> dict:
+        """
+        Restituisce il file della sessione e i record registrati, scritti e persi.
+
+        Returns:
+            dict: {"path", "recorded", "flushed", "lost"}
+        """
+        return {"path": str(self.path), "recorded": self.recorded, "flushed": self.flushed, "lost": self.lost}
+
+
+def record_dtype():
+    """
+    Restituisce il tipo strutturato NumPy equivalente a `RECORD`.
+
+    Returns:
+        numpy.dtype: Campi "t", "speed", "angle", "gear", "turbo", "brake", "event".
+    """
+    import numpy as np
+
+    return np.dtype([
+        ("t", "<f8"), ("speed", "<f4"), ("angle", "<f4"),
+        ("gear", "u1"), ("turbo", "u1"), ("brake", "u1"), ("event", "u1"),
+    ])
+
+
+def load_recording(path) -> tuple:
+    """
+    Carica un file del registratore di volo.
+
+    Args:
+        path (str | Path): Il file da caricare.
+
+    Raises:
+        ValueError: Se il file non è una registrazione valida o ha una versione non supportata.
+
+    Returns:
+        tuple[dict, numpy.ndarray]: ({"startedAt": inizio della sessione (epoch), "version"},
+                                     record strutturati secondo `record_dtype()`).
+    """
+    import numpy as np
+
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"File di registrazione troppo corto: {path}")
+
+    magic, version, record_size, started_at = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"Non è un file del registratore di volo: {path}")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"Versione del registratore di volo non supportata ({version}, record di {record_size} byte): {path}")
+
+    records = np.fromfile(path, dtype=record_dtype(), offset=HEADER.size)
+    return {"startedAt": started_at, "version": version}, records
@@ -0,0 +1,142 @@
+"""
+Modulo: state_publisher
+
+Descrizione:
+Pubblicazione a frequenza fissa dello stato del veicolo verso il client.
+Invece di un messaggio per ogni variazione unitaria di velocità o angolo, lo stato completo
+(velocità, angolo, marcia, posizione audio, statistiche dello streaming) viene campionato a ogni
+tick e al client viene inviato solo il sottoinsieme di campi cambiati rispetto all'ultimo invio.
+I valori intermedi tra due tick vengono quindi naturalmente accorpati.
+
+Esempio di messaggio inviato al client:
+    {
+        "ok": True,
+        "state": {"speed": 12, "motion": "forward"}
+    }
+
+Dipendenze:
+- asyncio per il task di pubblicazione (`builtin`).
+- logging per il monitoraggio degli errori (`builtin`).
+- websockets per la gestione della chiusura della connessione (`websockets`).
+- utils.protocol.codec per la serializzazione dei messaggi.
+- utils.protocol.protocolenums.send_priority per la classe di priorità della telemetria.
+- utils.telemetry.telemetryenums.telemetry_settings per la frequenza di default.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import asyncio
+import logging
+from websockets.exceptions import ConnectionClosed
+from utils.protocol.codec import encode
+from utils.protocol.protocolenums.send_priority import SendPriority
+from utils.telemetry.telemetryenums.telemetry_settings import TelemetrySettings
+
+
+class StatePublisher:
+    """
+    Task che pubblica periodicamente le variazioni dello stato del veicolo.
+
+    Attributes:
+        sender (SendScheduler): Scheduler di invio della connessione.
+        providers (list): Funzioni senza argomenti che restituiscono un dizionario di campi di stato.
+        tick_hz (float): Frequenza di pubblicazione (Hz).
+        _last_sent (dict): Ultimo valore inviato per ogni campo.
+        _task (asyncio.Task): Task di pubblicazione.
+    """
+
+    def __init__(self, sender, providers: list, tick_hz: float = TelemetrySettings.DEFAULT_TICK_HZ.value):
+        """
+        Inizializza il publisher.
+
+        Args:
+            sender (SendScheduler): Scheduler di invio della connessione.
+            providers (list): Funzioni che restituiscono i campi di stato da pubblicare.
+            tick_hz (float, opzionale): Frequenza di pubblicazione in Hz (default: 10).
+        """
+        self.sender = sender
+        self.providers = list(providers)
+        self.tick_hz = max(1.0, min(float(tick_hz), TelemetrySettings.MAX_TICK_HZ.value))
+        self._last_sent = {}
+        self._task = None
+
+    def start(self) -> None:
+        """
+        Avvia il task di pubblicazione, se non è già attivo.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="state-publisher")
+
+    def snapshot(self) -> dict:
+        """
+        Campiona lo stato completo interrogando tutti i provider.
+
+        Returns:
+            dict: Lo stato corrente del veicolo.
+        """
+        state = {}
+        for provider in self.providers:
+            state.update(provider())
+        return state
+
+    def delta(self) -> dict:
+        """
+        Calcola i campi di stato cambiati rispetto all'ultimo invio.
+
+        Returns:
+            dict: I soli campi il cui valore è diverso da quello già noto al client.
+        """
+        last = self._last_sent
+        return {key: value for key, value in self.snapshot().items() if key not in last or last[key] != value}
+
+    def reset(self) -> None:
+        """
+        Dimentica lo stato già inviato: il tick successivo pubblica lo stato completo.
+        Usato quando il client si ricollega e non conosce più lo stato corrente.
+        """
+        self._last_sent = {}
+
+    async def publish(self) -> None:
+        """
+        Invia al client le variazioni di stato, se presenti.
+
+        Se la coda di telemetria dello scheduler non è ancora stata svuotata il tick viene
+        saltato: le variazioni verranno accorpate nel messaggio successivo.
+        """
+        if self.sender.get_queue_depths()["telemetry"]:
+            return
+
+        changes = self.delta()
+        if not changes:
+            return
+
+        await self.sender.send(encode({"ok": True, "state": changes}), SendPriority.TELEMETRY)
+        self._last_sent.update(changes)
+
+    async def _run(self) -> None:
+        """
+        Ciclo di pubblicazione a frequenza fissa.
+        """
+        period = 1 / self.tick_hz
+        try:
+            while True:
+                await self.publish()
+                await asyncio.sleep(period)
+        except asyncio.CancelledError:
+            raise
+        except (ConnectionClosed, ConnectionError) as e:
+            logging.info(f"Pubblicazione dello stato terminata: {e}")
+        except Exception as e:
+            logging.error(f"Errore imprevisto nella pubblicazione dello stato: {e}")
+
+    async def stop(self) -> None:
+        """
+        Arresta il task di pubblicazione.
+        """
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,33 @@
+"""
+Modulo: flight_event
+
+Descrizione:
+Questo modulo definisce un'enumerazione (FlightEvent) con i tipi di record del registratore di volo:
+i campioni periodici dello stato dei motori e i comandi ricevuti dal client.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class FlightEvent(enum.Enum):
+    """
+    Enum dei codici dei record, salvati su un byte nei file di registrazione.
+    """
+    SAMPLE = 0          # Campione del ciclo di controllo
+    MOTOR_ON = 1        # Accensione dei motori
+    MOTOR_OFF = 2       # Spegnimento dei motori
+    FORWARD = 3         # Comando di marcia avanti
+    BACKWARD = 4        # Comando di retromarcia
+    STOP = 5            # Comando di arresto
+    TURN_LEFT = 6       # Sterzata a sinistra
+    TURN_RIGHT = 7      # Sterzata a destra
+    UNTURN = 8          # Ritorno dello sterzo al centro
+    GEAR = 9            # Cambio di marcia
+    TURBO = 10          # Variazione del turbo
+    BRAKE = 11          # Variazione dell'intensità del freno
+    SAFETY_STOP = 12    # Arresto di sicurezza per collegamento degradato
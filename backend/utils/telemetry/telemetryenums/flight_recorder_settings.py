@@ -0,0 +1,30 @@
+"""
+Modulo: flight_recorder_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (FlightRecorderSettings) con le impostazioni di default
+del registratore di volo dei motori.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class FlightRecorderSettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni del registratore di volo.
+
+    Values:
+        DIRECTORY (str): Cartella dei file di registrazione, uno per sessione di guida.
+        CAPACITY (int): Record contenuti nel buffer circolare in memoria.
+        FLUSH_INTERVAL_SECONDS (float): Intervallo di scrittura su disco del buffer.
+        HEARTBEAT_SECONDS (float): Intervallo massimo tra due campioni quando lo stato non cambia.
+    """
+    DIRECTORY = "../user/recordings/"   # File salvati come flight-<data>-<ora>.lfr
+    CAPACITY = 16384                    # Circa 5 minuti a 50 Hz, 320 KiB
+    FLUSH_INTERVAL_SECONDS = 1.0        # Record persi al massimo in caso di arresto improvviso
+    HEARTBEAT_SECONDS = 1.0             # Un campione al secondo anche a veicolo fermo
@@ -0,0 +1,26 @@
+"""
+Modulo: telemetry_settings
+
+Descrizione:
+Questo modulo definisce un'enumerazione (TelemetrySettings) con le impostazioni di default
+della pubblicazione dello stato del veicolo verso il client.
+
+Dipendenze:
+- enum per la definizione della classe.
+
+Autore: Zs
+Data: 19-10-2026
+"""
+
+import enum
+
+class TelemetrySettings(enum.Enum):
+    """
+    Enum che contiene le impostazioni della telemetria di stato.
+
+    Values:
+        DEFAULT_TICK_HZ (int): Frequenza di default di pubblicazione dello stato (Hz).
+        MAX_TICK_HZ (int): Frequenza massima consentita per la pubblicazione dello stato (Hz).
+    """
+    DEFAULT_TICK_HZ = 10     # Snapshot di stato inviati al secondo
+    MAX_TICK_HZ = 60         # Limite superiore configurabile
@@ -38,25 +38,72 @@ document.addEventListener("DOMContentLoaded", () => {
     closeWindowButton.addEventListener("click", windowControls.close);
 
     // ===================== CONFIGURAZIONE CLIENT SOCKET =====================
-    const socket = new WebSocket("wss://localhost:8765");
+    const SERVER_URL = "wss://localhost:8765";
+    const RECONNECT_MIN_DELAY_MS = 250;
+    const RECONNECT_MAX_DELAY_MS = 5000;
 
-    socket.onopen = () => {
-        socket.send('{"type":"start-video-streaming", "content": ""}');
-    };
+    let socket = null;
+    let resumeToken = null; // Token con cui il server restituisce la sessione di guida dopo una disconnessione
+    let reconnectDelay = RECONNECT_MIN_DELAY_MS;
+
+    /**
+     * Opens the WebSocket connection. When a resume token is known, the server hands back
+     * the previous driver session (controllers, state and video stream) instead of a new one.
+     *
+     * @returns {void}
+     */
+
+    const connect = () => {
+        socket = new WebSocket(resumeToken ? `${SERVER_URL}/?resume=${encodeURIComponent(resumeToken)}` : SERVER_URL);
+        socket.binaryType = "arraybuffer";
+
+        socket.onopen = async () => {
+            reconnectDelay = RECONNECT_MIN_DELAY_MS;
+            // Il server adatta frequenza, dimensione e formato dei frame alle capacità dichiarate
+            socket.send(JSON.stringify({ type: "hello", content: await getClientCapabilities() }));
+            socket.send('{"type":"start-video-streaming", "content": ""}');
+        };
+
+        socket.onclose = () => {
+            console.log("Disconnected from the server");
+            // Riconnessione con attesa crescente: entro il tempo di grazia la sessione viene ripresa
+            setTimeout(connect, reconnectDelay);
+            reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_DELAY_MS);
+        };
+
+        socket.onerror = (error) => {
+            console.log("Error occurred");
+        };
 
-    socket.onclose = () => {
-        console.log("Disconnected from the server");
+        socket.onmessage = handleSocketMessage;
     };
 
-    socket.onerror = (error) => {
-        console.log("Error occurred");
-    }
+    let lastAudioErrorAt = 0;
 
-    socket.onmessage = function (event) {
+    function handleSocketMessage(event) {
         try {
+            if (event.data instanceof ArrayBuffer) {
+                handleBinaryMessage(event.data);
+                return;
+            }
+
             const response = JSON.parse(event.data);
 
-            if (response.ok && response.motorStarted) {
+            if (response.uploadId !== undefined || response.uploadError) {
+                handleUploadResponse(response);
+            }
+            else if (response.effectError) {
+                showNoty("error", `Effetto sonoro "${response.effect}" non disponibile.`);
+            }
+            else if (response.audioError) {
+                // La manopola invia un valore a ogni movimento: un solo avviso ogni pochi secondi
+                const now = Date.now();
+                if (now - lastAudioErrorAt > 3000) {
+                    lastAudioErrorAt = now;
+                    showNoty("error", `${response.audioError}.`);
+                }
+            }
+            else if (response.ok && response.motorStarted) {
                 legoStatusButton.classList.remove("off");
                 legoStatusButton.classList.add("on");
             }
@@ -68,7 +115,10 @@ document.addEventListener("DOMContentLoaded", () => {
                 addStats({ totalDuration: Math.round(response.activationTime), maxSpeed: response.maxSpeed, maxSpeedMph: Math.round(response.maxSpeed * 0.621371) })
             }
             else if (response.ok && response.streaming && response.frame) {
-                updateCamera(response.frame);
+                updateCamera(response.frame, response.codec);
+            }
+            else if (response.ok && response.stream) {
+                console.log("Parametri dello streaming negoziati:", response.stream);
             }
             else if (response.ok && response.photoPath) {
                 showNoty("success", `Nuova immagine salvata: ${response.photoPath}`);
@@ -76,38 +126,23 @@ document.addEventListener("DOMContentLoaded", () => {
             else if (response.ok && response.videoPath) {
                 showNoty("success", `Nuova video salvato: ${response.videoPath}`);
             }
-            else if (response.ok && response.motorspeed !== undefined) {
-                updateSpeed(response.motorspeed);
-
-                if (response.direction) {
-                    updateDirection(response.direction, true);
-                } else if (response.stopping) {
-                    updateDirection(
-                        Array.from(activeDirections).filter(direction =>
-                            ["forward", "backward"].includes(direction)
-                        ),
-                        false
-                    );
+            else if (response.ok && response.role) {
+                resumeToken = response.resumeToken || null;
+                if (response.resumed) {
+                    showNoty("info", "Connessione ripristinata: sessione di guida ripresa.");
                 }
-            } else if (response.ok && response.motorangle !== undefined) {
-                updateAngle(response.motorangle);
-
-                if (response.direction) {
-                    updateDirection(response.direction, true);
-                } else if (response.straightening) {
-                    updateDirection(
-                        Array.from(activeDirections).filter(direction =>
-                            ["left", "right"].includes(direction)
-                        ),
-                        false
-                    );
+                else if (response.role === "spectator") {
+                    showNoty("info", "Un altro client sta guidando il LEGO: sei connesso come spettatore.");
                 }
             }
+            else if (response.ok && response.state) {
+                updateState(response.state);
+            }
             else if (response.ok && response.audioDuration && response.audioName) {
                 updateSongPreview(response.audioName, response.audioDuration);
-            }
-            else if (response.ok && response.currentAudioTime) {
-                updateSongTime(response.currentAudioTime);
+                if (response.audioReady === false) {
+                    showNoty("error", `Impossibile riprodurre il file audio: ${response.audioName}`);
+                }
             }
             else if (response.ok && response.endSound) {
                 audioInput.removeAllFiles(true);
@@ -115,9 +150,66 @@ document.addEventListener("DOMContentLoaded", () => {
         } catch (error) {
             console.error("Errore nella risposta WebSocket:", error);
         }
-    };
+    }
+
+    connect();
 
 
+    /**
+     * Applies a state delta published by the server at a fixed tick rate.
+     * Only the fields that changed since the previous message are present.
+     *
+     * @param {Object} state - Changed fields (speed, angle, motion, steering, audioPlaying, audioPosition, ...).
+     * @returns {void}
+     */
+
+    let linkDegraded = false;
+
+    const updateState = (state) => {
+        if (state.speed !== undefined) {
+            updateSpeed(state.speed);
+        }
+
+        if (state.angle !== undefined) {
+            updateAngle(state.angle);
+        }
+
+        if (state.motion !== undefined) {
+            updateDirection(["forward", "backward"], false);
+            if (["forward", "backward"].includes(state.motion)) {
+                updateDirection(state.motion, true);
+            }
+        }
+
+        if (state.steering !== undefined) {
+            updateDirection(["left", "right"], false);
+            if (["left", "right"].includes(state.steering)) {
+                updateDirection(state.steering, true);
+            }
+        }
+
+        // La posizione arriva solo ad avvio, pausa, ripresa e fine: tra un messaggio e l'altro viene interpolata
+        if (state.audioPlaying !== undefined || state.audioPosition !== undefined || state.audioStartedAt !== undefined) {
+            if (state.audioPlaying !== undefined) {
+                audioClock.playing = state.audioPlaying;
+            }
+            if (state.audioPosition !== undefined) {
+                audioClock.position = state.audioPosition;
+            }
+            audioClock.receivedAt = performance.now();
+            updateSongTime(audioClock.position);
+        }
+
+        if (state.linkDegraded !== undefined && state.linkDegraded !== linkDegraded) {
+            linkDegraded = state.linkDegraded;
+            if (linkDegraded) {
+                showNoty("error", "Collegamento lento: il LEGO è stato fermato per sicurezza.");
+            } else {
+                showNoty("info", "Collegamento ripristinato: i comandi di movimento sono di nuovo attivi.");
+            }
+        }
+    };
+
     /**
     * Event Listener for Keyboard Input to Control Movement.
     *
@@ -143,6 +235,11 @@ document.addEventListener("DOMContentLoaded", () => {
             case 'd':
                 socket.send(`{"type":"turn-right","content":""}`);
                 break;
+            case 'h':
+                if (!event.repeat) {
+                    socket.send(`{"type":"play-effect","content":"horn"}`);
+                }
+                break;
         }
     });
 
@@ -253,17 +350,90 @@ document.addEventListener("DOMContentLoaded", () => {
 
     // ===================== CONFIGURAZIONE DELLA VIDEOCAMERA NEL MOMENTO CHE IL CLIENT RICEVE I FRAME OTTENUTI DAL SOCKET SERVER =====================
     /**
-     * Updates the camera preview on a canvas element.  This function takes a base64 encoded JPEG image frame and renders it onto a canvas.  Handles resizing the canvas to match the image dimensions.
+     * Updates the camera preview on a canvas element.  This function takes a base64 encoded image frame and renders it onto a canvas.  Handles resizing the canvas to match the image dimensions.
 
-    * @param {string} frame -immagine jpg codificata con base64 che rappresenta il frame della videocamera.
+    * @param {string} frame -immagine codificata con base64 che rappresenta il frame della videocamera.
+    * @param {string} [codec="jpeg"] - Formato dell'immagine negoziato con il server ("jpeg" o "webp").
     * @returns {void} 
     */
 
     const canvas = document.getElementById('camera-canvas');
     const ctx = canvas.getContext('2d');
 
-    const updateCamera = async (frame) => {
-        const blob = await fetch(`data:image/jpeg;base64,${frame}`).then(res => res.blob());
+    // Formati dei frame binari, nell'ordine dell'indice inviato dal server
+    const FRAME_CODECS = ["jpeg", "webp"];
+    const BINARY_FRAME_TAG = 0x01;
+
+    const updateCamera = async (frame, codec = "jpeg") => {
+        const blob = await fetch(`data:image/${codec};base64,${frame}`).then(res => res.blob());
+        await drawFrame(blob);
+    };
+
+    /**
+     * Handles a binary message from the server: byte 0 is the message tag, byte 1 the codec index,
+     * followed by the compressed frame.
+     *
+     * @param {ArrayBuffer} data - The binary message.
+     * @returns {void}
+     */
+    const handleBinaryMessage = (data) => {
+        const header = new Uint8Array(data, 0, 2);
+        if (header[0] !== BINARY_FRAME_TAG) return;
+
+        const codec = FRAME_CODECS[header[1]] || "jpeg";
+        drawFrame(new Blob([new Uint8Array(data, 2)], { type: `image/${codec}` }));
+    };
+
+    /**
+     * Estimates the display refresh rate by timing a few animation frames.
+     *
+     * @param {number} [frames=20] - Number of frames to sample.
+     * @returns {Promise<number>} The estimated refresh rate in Hz.
+     */
+    const measureRefreshRate = (frames = 20) => new Promise((resolve) => {
+        const timestamps = [];
+        const step = (now) => {
+            timestamps.push(now);
+            if (timestamps.length <= frames) {
+                requestAnimationFrame(step);
+                return;
+            }
+            const elapsed = timestamps[timestamps.length - 1] - timestamps[0];
+            resolve(Math.round(1000 * frames / elapsed));
+        };
+        requestAnimationFrame(step);
+    });
+
+    /**
+     * Builds the content of the "hello" message: refresh rate, viewport size in device pixels,
+     * supported frame codecs and preferred transport.
+     *
+     * @returns {Promise<Object>} The client capabilities.
+     */
+    const getClientCapabilities = async () => {
+        const probe = document.createElement("canvas");
+        probe.width = probe.height = 1;
+        const codecs = ["jpeg"];
+        if (probe.toDataURL("image/webp").startsWith("data:image/webp")) codecs.push("webp");
+
+        return {
+            refreshRate: await measureRefreshRate(),
+            viewport: {
+                width: Math.round(canvas.clientWidth * window.devicePixelRatio) || window.innerWidth,
+                height: Math.round(canvas.clientHeight * window.devicePixelRatio) || window.innerHeight
+            },
+            codecs,
+            transport: "binary"
+        };
+    };
+
+    /**
+     * Decodes a frame and draws it on the camera canvas.
+     *
+     * @param {Blob} blob - The compressed frame.
+     * @returns {Promise<void>}
+     */
+    const drawFrame = async (blob) => {
         const bitmap = await createImageBitmap(blob);
 
         canvas.width = bitmap.width;
@@ -358,6 +528,8 @@ document.addEventListener("DOMContentLoaded", () => {
      * @returns {void}
      */
 
+    const audioClock = { playing: false, position: 0, receivedAt: 0 };
+
     const updateSongTime = (songCurrentTime) => {
         if (!currentSongDuration) return;
 
@@ -374,6 +546,14 @@ document.addEventListener("DOMContentLoaded", () => {
         gsap.to(progressBar, { width: `${progressPercentage}%`, duration: 0.3, ease: "power2.out", overwrite: true });
     };
 
+    // Avanzamento locale della posizione mentre il brano è in riproduzione
+    setInterval(() => {
+        if (audioClock.playing && currentSongDuration) {
+            const elapsed = (performance.now() - audioClock.receivedAt) / 1000;
+            updateSongTime(Math.min(audioClock.position + elapsed, currentSongDuration));
+        }
+    }, 250);
+
     // ===================== CONFIGURAZIONE DROPZONE INPUT =====================
     Dropzone.autoDiscover = false;
     const dropZonePreview = `
@@ -403,17 +583,7 @@ document.addEventListener("DOMContentLoaded", () => {
             this.on("addedfile", file => {
                 songInputDisplay.style.display = "none";
 
-                const reader = new FileReader();
-                reader.onload = event => {
-                    if (socket.readyState === WebSocket.OPEN) {
-                        socket.send(JSON.stringify({
-                            type: "new-audio",
-                            name: file.name,
-                            content: event.target.result.split(",")[1] // Rimuove il prefisso `data:audio/...;base64,`
-                        }));
-                    }
-                };
-                reader.readAsDataURL(file);
+                startUpload(file);
             });
 
             this.on("removedfile", () => {
@@ -421,6 +591,85 @@ document.addEventListener("DOMContentLoaded", () => {
             });
         }
     });
+
+    // ===================== CARICAMENTO AUDIO A BLOCCHI =====================
+    const UPLOAD_CHUNK_SIZE = 256 * 1024;
+    const UPLOAD_HEADER_SIZE = 24; // uploadId (16 byte) + offset (uint64 big-endian)
+    let currentUpload = null;
+
+    /**
+     * Starts (or resumes) the chunked upload of an audio file.
+     * The server replies with the upload id and the offset from which to send.
+     *
+     * @param {File} file - The audio file selected in the dropzone.
+     * @returns {void}
+     */
+
+    const startUpload = (file) => {
+        if (socket.readyState !== WebSocket.OPEN) return;
+
+        const resumeId = currentUpload && currentUpload.file === file ? currentUpload.id : undefined;
+        currentUpload = { file: file, id: resumeId };
+
+        socket.send(JSON.stringify({
+            type: "audio-upload-begin",
+            content: { name: file.name, size: file.size, uploadId: resumeId }
+        }));
+    };
+
+    /**
+     * Sends the next chunk of the current upload as a binary frame:
+     * a 24-byte header followed by the file slice.
+     *
+     * @param {number} offset - Offset of the chunk in the file.
+     * @returns {void}
+     */
+
+    const sendUploadChunk = (offset) => {
+        const { file, id } = currentUpload;
+        const header = new ArrayBuffer(UPLOAD_HEADER_SIZE);
+        const view = new DataView(header);
+
+        for (let i = 0; i < 16; i++) {
+            view.setUint8(i, parseInt(id.substr(i * 2, 2), 16));
+        }
+        view.setBigUint64(16, BigInt(offset));
+
+        socket.send(new Blob([header, file.slice(offset, offset + UPLOAD_CHUNK_SIZE)]));
+    };
+
+    /**
+     * Handles the server acknowledgements of the chunked upload protocol.
+     *
+     * @param {Object} response - Server message with uploadId/uploadOffset or uploadError.
+     * @returns {void}
+     */
+
+    const handleUploadResponse = (response) => {
+        if (!currentUpload) return;
+
+        if (!response.ok) {
+            // Offset disallineato: si riprende da quello atteso dal server
+            if (response.uploadOffset !== undefined) {
+                sendUploadChunk(response.uploadOffset);
+                return;
+            }
+            showNoty("error", `Caricamento audio non riuscito: ${response.uploadError}`);
+            currentUpload = null;
+            return;
+        }
+
+        currentUpload.id = response.uploadId;
+
+        if (response.uploadOffset < currentUpload.file.size) {
+            sendUploadChunk(response.uploadOffset);
+        }
+        else {
+            socket.send(JSON.stringify({ type: "audio-upload-commit", content: { uploadId: response.uploadId } }));
+            currentUpload = null;
+        }
+    };
+
     // ===================== CONFIGURAZIONE BOTTONE PER VOLUME E VELOCITÀ DI RIPRODUZIONE =====================
     const knobs = document.querySelectorAll('.volume-knob');
     knobs.forEach(knob => {